@@ -2,41 +2,142 @@ import atexit
 import os
 import threading
 
+from . import compat
+from .internal import forksafe
 from .internal.logger import get_logger
 
 
 _LOG = get_logger(__name__)
 
 
+class _PeriodicScheduler(object):
+    """Run the periodic workers in a single thread.
+
+    Each worker is run when its deadline is reached, or right away when it is woken up or stopped. The thread is
+    started when a worker is added and exits once all the workers are stopped. The workers are stopped when the
+    program exits, and are dropped in the child of a forked process, where the thread is not running anymore.
+    """
+
+    def __init__(self, name="ddtrace.PeriodicScheduler"):
+        self.name = name
+        self._workers = []
+        self._thread = None
+        self._condition = None
+        self._atexit_registered = False
+        forksafe.register(self._after_fork)
+
+    def add(self, worker):
+        """Schedule a started worker."""
+        if self._condition is None:
+            # Created lazily so that the lock is the gevent one when gevent is used.
+            self._condition = threading.Condition()
+
+        with self._condition:
+            if not self._atexit_registered:
+                atexit.register(self._atexit)
+                self._atexit_registered = True
+            self._workers.append(worker)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._target, name=self.name)
+                self._thread.daemon = True
+                self._thread.start()
+            else:
+                self._condition.notify()
+
+    def wakeup(self, worker, stop=False):
+        """Run a worker without waiting for its deadline, and stop it if ``stop`` is set."""
+        with self._condition:
+            if stop:
+                worker._stop_requested = True
+            worker._deadline = 0
+            self._condition.notify()
+
+    def reschedule(self, worker, deadline):
+        """Set the deadline of a worker that just ran, unless it was woken up while running."""
+        with self._condition:
+            if worker._deadline is not None:
+                return
+            worker._deadline = deadline
+
+    def is_current_thread(self):
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def _next_workers(self):
+        """Wait for the workers to run.
+
+        :returns: The workers to run, or ``None`` if there are no workers left.
+        """
+        with self._condition:
+            while self._workers:
+                now = compat.monotonic()
+                workers = [worker for worker in self._workers if worker._deadline <= now]
+                if workers:
+                    return workers
+                self._condition.wait(min(worker._deadline for worker in self._workers) - now)
+            self._thread = None
+            return None
+
+    def _target(self):
+        while True:
+            workers = self._next_workers()
+            if workers is None:
+                break
+            for worker in workers:
+                if worker._stop_requested:
+                    with self._condition:
+                        self._workers.remove(worker)
+                worker._run_scheduled()
+
+    def _atexit(self):
+        for worker in list(self._workers):
+            worker.stop()
+        for worker in list(self._workers):
+            worker._atexit()
+
+    def _after_fork(self):
+        # The thread is not running in the child process: the workers of the parent process are stopped.
+        for worker in self._workers:
+            worker._stopped = threading.Event()
+            worker._stopped.set()
+        self._workers = []
+        self._thread = None
+        self._condition = None
+
+
+_scheduler = _PeriodicScheduler()
+
+
 class PeriodicWorkerThread(object):
     """Periodic worker thread.
 
-    This class can be used to instantiate a worker thread that will run its `run_periodic` function every `interval`
-    seconds.
+    This class can be used to instantiate a worker that will run its `run_periodic` function every `interval`
+    seconds. The worker can be woken up with `wakeup` to run `run_periodic` before the interval elapses.
 
     The method `on_shutdown` will be called on worker shutdown. The worker will be shutdown when the program exits and
     can be waited for with the `exit_timeout` parameter.
 
+    All the workers run in a single thread shared by the tracer. This thread is started again when a worker is started
+    in the child of a forked process.
+
     """
 
     _DEFAULT_INTERVAL = 1.0
 
     def __init__(self, interval=_DEFAULT_INTERVAL, exit_timeout=None, name=None, daemon=True):
-        """Create a new worker thread that runs a function periodically.
+        """Create a new worker that runs a function periodically.
 
         :param interval: The interval in seconds to wait between calls to `run_periodic`.
-        :param exit_timeout: The timeout to use when exiting the program and waiting for the thread to finish.
+        :param exit_timeout: The timeout to use when exiting the program and waiting for the worker to finish.
         :param name: Name of the worker.
-        :param daemon: Whether the worker should be a daemon.
+        :param daemon: Unused: the workers are stopped when the program exits.
         """
-
-        self._thread = threading.Thread(target=self._target, name=name)
-        self._thread.daemon = daemon
-        self._stop = threading.Event()
+        self.name = name
+        self._stop_requested = False
+        self._stopped = threading.Event()
+        self._deadline = None
         self.started = False
         self.interval = interval
         self.exit_timeout = exit_timeout
-        atexit.register(self._atexit)
 
     def _atexit(self):
         self.stop()
@@ -45,32 +146,61 @@ class PeriodicWorkerThread(object):
             _LOG.debug(
                 "Waiting %d seconds for %s to finish. Hit %s to quit.",
                 self.exit_timeout,
-                self._thread.name,
+                self.name,
                 key,
             )
             self.join(self.exit_timeout)
 
     def start(self):
         """Start the periodic worker."""
-        _LOG.debug("Starting %s thread", self._thread.name)
-        self._thread.start()
+        if self.started:
+            raise RuntimeError("workers can only be started once")
+        _LOG.debug("Starting %s worker", self.name)
+        self._deadline = 0 if self._stop_requested else compat.monotonic() + self.interval
         self.started = True
+        _scheduler.add(self)
 
     def stop(self):
         """Stop the worker."""
-        _LOG.debug("Stopping %s thread", self._thread.name)
-        self._stop.set()
+        _LOG.debug("Stopping %s worker", self.name)
+        if self.is_alive() and not self._stop_requested:
+            _scheduler.wakeup(self, stop=True)
+        self._stop_requested = True
+
+    def wakeup(self):
+        """Wake up the worker to run `run_periodic` without waiting for the interval to elapse."""
+        if self.is_alive():
+            _scheduler.wakeup(self)
 
     def is_alive(self):
-        return self._thread.is_alive()
+        return self.started and not self._stopped.is_set()
 
     def join(self, timeout=None):
-        return self._thread.join(timeout)
-
-    def _target(self):
-        while not self._stop.wait(self.interval):
+        # The worker cannot be waited for from the thread that runs it
+        if self.started and not _scheduler.is_current_thread():
+            self._stopped.wait(timeout)
+
+    def _run_scheduled(self):
+        """Run the worker from the scheduler thread."""
+        if self._stop_requested:
+            if self._stopped.is_set():
+                # Stopped while being run: the scheduler runs the worker again before dropping it
+                return
+            try:
+                self._on_shutdown()
+            except Exception:
+                _LOG.error("Error while shutting down %s worker", self.name, exc_info=True)
+            finally:
+                self._stopped.set()
+            return
+
+        # Not scheduled while running: the worker is only woken up again by `wakeup` or `stop`
+        self._deadline = None
+        try:
             self.run_periodic()
-        self._on_shutdown()
+        except Exception:
+            _LOG.error("Error in %s worker", self.name, exc_info=True)
+        _scheduler.reschedule(self, compat.monotonic() + self.interval)
 
     @staticmethod
     def run_periodic():
@@ -78,7 +208,7 @@ class PeriodicWorkerThread(object):
         pass
 
     def _on_shutdown(self):
-        _LOG.debug("Shutting down %s thread", self._thread.name)
+        _LOG.debug("Shutting down %s worker", self.name)
         self.on_shutdown()
 
     @staticmethod
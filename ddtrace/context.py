@@ -23,7 +23,10 @@ class Context(object):
     generates the job itself. On the other hand, if it's part of the same
     ``Context``, it will be related to the original trace.
 
-    This data structure is thread-safe.
+    This data structure is thread-safe. Only the methods that update several
+    attributes at once take a lock: the properties read or set a single
+    attribute, which is atomic, so they do not need to synchronize with the
+    other threads using the context.
     """
 
     _partial_flush_enabled = asbool(get_env("tracer", "partial_flush_enabled", default=False))
@@ -49,26 +52,22 @@ class Context(object):
     @property
     def trace_id(self):
         """Return current context trace_id."""
-        with self._lock:
-            return self._parent_trace_id
+        return self._parent_trace_id
 
     @property
     def span_id(self):
         """Return current context span_id."""
-        with self._lock:
-            return self._parent_span_id
+        return self._parent_span_id
 
     @property
     def sampling_priority(self):
         """Return current context sampling priority."""
-        with self._lock:
-            return self._sampling_priority
+        return self._sampling_priority
 
     @sampling_priority.setter
     def sampling_priority(self, value):
         """Set sampling priority."""
-        with self._lock:
-            self._sampling_priority = value
+        self._sampling_priority = value
 
     def clone(self):
         """
@@ -84,6 +83,32 @@ class Context(object):
             new_ctx._current_span = self._current_span
             return new_ctx
 
+    def _propagation_handle(self):
+        """
+        Return what is needed to continue the trace in another execution,
+        e.g. in another thread, as a tuple.
+
+        Unlike ``clone()``, this takes no lock and does not create a
+        ``Context``: the attributes are read individually, which is atomic.
+        The ``Context`` is created with ``_from_propagation_handle()`` when
+        the other execution needs it.
+        """
+        return (
+            self._parent_trace_id,
+            self._parent_span_id,
+            self._sampling_priority,
+            self.dd_origin,
+            self._current_span,
+        )
+
+    @classmethod
+    def _from_propagation_handle(cls, handle):
+        """Create a ``Context`` continuing the trace of a propagation handle."""
+        trace_id, span_id, sampling_priority, dd_origin, current_span = handle
+        ctx = cls(trace_id=trace_id, span_id=span_id, sampling_priority=sampling_priority, dd_origin=dd_origin)
+        ctx._current_span = current_span
+        return ctx
+
     def get_current_root_span(self):
         """
         Return the root span of the context or None if it does not exist.
@@ -97,8 +122,7 @@ class Context(object):
         span in asynchronous environments, because some spans can be closed
         earlier while child spans still need to finish their traced execution.
         """
-        with self._lock:
-            return self._current_span
+        return self._current_span
 
     def _set_current_span(self, span):
         """
@@ -123,6 +147,17 @@ class Context(object):
             self._trace.append(span)
             span._context = self
 
+    def _add_finished_spans(self, spans):
+        """
+        Add already finished spans to the context trace list without changing
+        the last active span.
+        """
+        with self._lock:
+            for span in spans:
+                span._context = self
+            self._trace.extend(spans)
+            self._finished_spans += len(spans)
+
     def close_span(self, span):
         """
         Mark a span as a finished, increasing the internal counter to prevent
@@ -163,8 +198,10 @@ class Context(object):
                 self._sampling_priority = None
                 return trace, sampled
             elif self._partial_flush_enabled:
-                finished_spans = [t for t in self._trace if t.finished]
-                if len(finished_spans) >= self._partial_flush_min_spans:
+                # Since the trace only holds the spans that were not flushed yet, the
+                # number of finished spans is the number of spans closed since the
+                # last flush.
+                if self._finished_spans >= self._partial_flush_min_spans:
                     # partial flush when enabled and we have more than the minimal required spans
                     trace = self._trace
                     sampled = self._is_sampled()
@@ -181,7 +218,14 @@ class Context(object):
 
                     # Any open spans will remain as `self._trace`
                     # Any finished spans will get returned to be flushed
-                    self._trace = [t for t in self._trace if not t.finished]
+                    finished_spans = []
+                    open_spans = []
+                    for t in trace:
+                        if t.finished:
+                            finished_spans.append(t)
+                        else:
+                            open_spans.append(t)
+                    self._trace = open_spans
                     return finished_spans, sampled
             return None, None
 
@@ -9,6 +9,7 @@ from ...constants import ANALYTICS_SAMPLE_RATE_KEY
 from ...constants import SPAN_MEASURED_KEY
 from ...ext import SpanTypes
 from ...ext import sql
+from ...internal.sql import sql_resource
 from ...pin import Pin
 from ...settings import config
 
@@ -31,7 +32,7 @@ class AIOTracedCursor(wrapt.ObjectProxy):
         service = pin.service
 
         with pin.tracer.trace(self._datadog_name, service=service,
-                              resource=resource, span_type=SpanTypes.SQL) as s:
+                              resource=sql_resource(resource), span_type=SpanTypes.SQL) as s:
             s.set_tag(SPAN_MEASURED_KEY)
             s.set_tag(sql.QUERY, resource)
             s.set_tags(pin.tags)
@@ -90,7 +90,8 @@ class TraceMiddleware:
 
         if self.integration_config.distributed_tracing:
             propagator = HTTPPropagator()
-            context = propagator.extract(headers)
+            # The header pairs of the scope are read as is, without decoding all of them
+            context = propagator.extract(scope.get("headers"))
             if context.trace_id:
                 self.tracer.context_provider.activate(context)
 
@@ -22,6 +22,16 @@ be configured as follows::
     loop.run_until_complete(some_work())
     loop.close()
 
+With Python 3.7+, the ``AsyncioContextVarsProvider`` stores the ``Context`` in a
+context variable rather than on the current ``Task``, so that it is not looked up
+from the event loop for each span. The tasks created by a task inherit a clone of
+its ``Context``::
+
+    from ddtrace import tracer
+    from ddtrace.contrib.asyncio.provider import AsyncioContextVarsProvider
+
+    tracer.configure(context_provider=AsyncioContextVarsProvider())
+
 In addition, helpers are provided to simplify how the tracing ``Context`` is
 handled between scheduled coroutines and ``Future`` invoked in separated
 threads:
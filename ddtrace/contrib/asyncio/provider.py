@@ -1,12 +1,18 @@
 import asyncio
 
+from ...compat import contextvars
 from ...context import Context
+from ...provider import BaseContextProvider
 from ...provider import DefaultContextProvider
+from .compat import asyncio_current_task
 
 
 # Task attribute used to set/get the Context instance
 CONTEXT_ATTR = "__datadog_context"
 
+# Context variable storing the task owning the active Context and the Context
+_DD_ASYNCIO_CONTEXTVAR = contextvars.ContextVar("datadog_asyncio_contextvar", default=None)
+
 
 class AsyncioContextProvider(DefaultContextProvider):
     """
@@ -32,6 +38,14 @@ class AsyncioContextProvider(DefaultContextProvider):
         setattr(task, CONTEXT_ATTR, context)
         return context
 
+    def _activate_parent(self, handle, loop=None):
+        """Continue the trace of a parent execution in the current execution."""
+        if not self._get_loop(loop):
+            # The Context is only created if needed by the thread-local storage
+            super(AsyncioContextProvider, self)._activate_parent(handle)
+        else:
+            BaseContextProvider._activate_parent(self, handle)
+
     def _get_loop(self, loop=None):
         """Helper to try and resolve the current loop"""
         try:
@@ -85,3 +99,52 @@ class AsyncioContextProvider(DefaultContextProvider):
         ctx = Context()
         setattr(task, CONTEXT_ATTR, ctx)
         return ctx
+
+
+class AsyncioContextVarsProvider(DefaultContextProvider):
+    """
+    Context provider that stores the ``Context`` of the current asyncio
+    execution in a context variable. It requires Python 3.7+, where asyncio
+    copies the context variables to the tasks it creates.
+
+    The ``Context`` of a task is therefore available in the tasks it creates,
+    without looking up the loop or setting attributes on the tasks. The first
+    time a task uses the ``Context`` it inherited, it is replaced by a clone
+    so that the spans of the child task are not added to the trace of its
+    parent. Outside of a task, the ``Context`` is local to the thread.
+    """
+
+    def __init__(self):
+        _DD_ASYNCIO_CONTEXTVAR.set(None)
+
+    def activate(self, context, loop=None):
+        """Sets the scoped ``Context`` for the current running ``Task``."""
+        _DD_ASYNCIO_CONTEXTVAR.set((asyncio_current_task(), context))
+        return context
+
+    def _has_active_context(self, loop=None):
+        """Helper to determine if we have a currently active context"""
+        return _DD_ASYNCIO_CONTEXTVAR.get() is not None
+
+    # The Context is stored in its own context variable
+    _activate_parent = BaseContextProvider._activate_parent
+
+    def active(self, loop=None):
+        """
+        Returns the scoped Context for this execution flow. A new ``Context``
+        is created if the current ``Task`` has none, and the ``Context``
+        inherited from the parent ``Task`` is cloned.
+        """
+        task = asyncio_current_task()
+        owned = _DD_ASYNCIO_CONTEXTVAR.get()
+        if owned is None:
+            ctx = Context()
+        else:
+            owner, ctx = owned
+            if owner is task:
+                return ctx
+            # The Context was inherited from the parent task
+            ctx = ctx.clone()
+
+        _DD_ASYNCIO_CONTEXTVAR.set((task, ctx))
+        return ctx
@@ -15,6 +15,7 @@ from ...ext import cassandra as cassx
 from ...ext import errors
 from ...ext import net
 from ...internal.logger import get_logger
+from ...internal.sql import sql_resource
 from ...pin import Pin
 from ...settings import config
 from ...utils.deprecation import deprecated
@@ -287,7 +288,7 @@ def _sanitize_query(span, query):
     else:
         resource = 'unknown-query-type'  # FIXME[matt] what else do to here?
 
-    span.resource = stringify(resource)[:RESOURCE_MAX_LENGTH]
+    span.resource = stringify(sql_resource(resource))[:RESOURCE_MAX_LENGTH]
 
 
 #
@@ -2,13 +2,19 @@
 Generic dbapi tracing code.
 """
 
+from ... import compat
 from ...constants import ANALYTICS_SAMPLE_RATE_KEY
+from ...constants import ENV_KEY
+from ...constants import ORIGIN_KEY
+from ...constants import SAMPLING_PRIORITY_KEY
 from ...constants import SPAN_MEASURED_KEY
 from ...ext import SpanTypes
 from ...ext import sql
 from ...internal.logger import get_logger
+from ...internal.sql import sql_resource
 from ...pin import Pin
 from ...settings import config
+from ...span import Span
 from ...utils.formats import asbool
 from ...utils.formats import get_env
 from ...vendor import six
@@ -22,8 +28,14 @@ log = get_logger(__name__)
 config._add('dbapi2', dict(
     _default_service="db",
     trace_fetch_methods=asbool(get_env('dbapi2', 'trace_fetch_methods', default=False)),
+    aggregate_fetch_methods=asbool(get_env('dbapi2', 'aggregate_fetch_methods', default=False)),
 ))
 
+# Metrics of the fetch calls aggregated on the query span
+FETCH_COUNT = 'db.fetch.count'
+FETCH_ROWS = 'db.fetch.rows'
+FETCH_DURATION = 'db.fetch.duration_ns'
+
 
 class TracedCursor(wrapt.ObjectProxy):
     """ TracedCursor wraps a psql cursor and traces its queries. """
@@ -34,6 +46,7 @@ class TracedCursor(wrapt.ObjectProxy):
         name = pin.app or 'sql'
         self._self_datadog_name = '{}.query'.format(name)
         self._self_last_execute_operation = None
+        self._self_fetch_metrics = None
         self._self_config = cfg or config.dbapi2
 
     def _trace_method(self, method, name, resource, extra_tags, *args, **kwargs):
@@ -41,7 +54,8 @@ class TracedCursor(wrapt.ObjectProxy):
         Internal function to trace the call to the underlying cursor method
         :param method: The callable to be wrapped
         :param name: The name of the resulting span.
-        :param resource: The sql query. Sql queries are obfuscated on the agent side.
+        :param resource: The sql query. Sql queries are obfuscated on the agent side, or normalized by the
+            tracer if ``config.sql_normalization_enabled`` is set.
         :param extra_tags: A dict of tags to store into the span's meta
         :param args: The args that will be passed as positional args to the wrapped method
         :param kwargs: The args that will be passed as kwargs to the wrapped method
@@ -52,12 +66,18 @@ class TracedCursor(wrapt.ObjectProxy):
             return method(*args, **kwargs)
         measured = name == self._self_datadog_name
         cfg = _get_config(self._self_config)
+        if measured and self._self_fetch_metrics is not None:
+            # The new query ends the fetches of the previous one
+            self._self_fetch_metrics.finish()
+            self._self_fetch_metrics = None
 
         with pin.tracer.trace(
-            name, service=ext_service(pin, cfg), resource=resource, span_type=SpanTypes.SQL
+            name, service=ext_service(pin, cfg), resource=sql_resource(resource), span_type=SpanTypes.SQL
         ) as s:
             if measured:
                 s.set_tag(SPAN_MEASURED_KEY)
+                if self._aggregate_fetch_methods():
+                    self._self_fetch_metrics = _FetchMetrics(pin.tracer, s)
             # No reason to tag the query since it is set as the resource by the agent. See:
             # https://github.com/DataDog/datadog-trace-agent/blob/bda1ebbf170dd8c5879be993bdd4dbae70d10fda/obfuscate/sql.go#L232
             s.set_tags(pin.tags)
@@ -83,6 +103,9 @@ class TracedCursor(wrapt.ObjectProxy):
                 if isinstance(row_count, six.integer_types) and row_count >= 0:
                     s.set_tag(sql.ROWS, row_count)
 
+    def _aggregate_fetch_methods(self):
+        return False
+
     def executemany(self, query, *args, **kwargs):
         """ Wraps the cursor.executemany method"""
         self._self_last_execute_operation = query
@@ -91,8 +114,12 @@ class TracedCursor(wrapt.ObjectProxy):
         #      These differences should be overridden at the integration specific layer (e.g. in `sqlite3/patch.py`)
         # FIXME[matt] properly handle kwargs here. arg names can be different
         # with different libs.
+        extra_tags = {'sql.executemany': 'true'}
+        # Record the size of the batch when the parameters are a sequence
+        if args and hasattr(args[0], '__len__'):
+            extra_tags['sql.executemany.size'] = len(args[0])
         return self._trace_method(
-            self.__wrapped__.executemany, self._self_datadog_name, query, {'sql.executemany': 'true'},
+            self.__wrapped__.executemany, self._self_datadog_name, query, extra_tags,
             query, *args, **kwargs)
 
     def execute(self, query, *args, **kwargs):
@@ -124,18 +151,50 @@ class FetchTracedCursor(TracedCursor):
     Sub-class of :class:`TracedCursor` that also instruments `fetchone`, `fetchall`, and `fetchmany` methods.
 
     We do not trace these functions by default since they can get very noisy (e.g. `fetchone` with 100k rows).
+
+    If ``aggregate_fetch_methods`` is enabled, no span is created for the fetch calls: their number, the number of
+    rows they returned and their cumulative duration are instead recorded as metrics of the span of the query. The
+    fetches done once the span of the query was flushed, e.g. when the query is the root of its trace, are reported by
+    a ``<query>.fetch`` child span submitted when the results are exhausted or when the cursor executes another query.
     """
+    def _aggregate_fetch_methods(self):
+        # Same as _get_config(self._self_config).aggregate_fetch_methods, without copying the config on each call
+        return self._self_config.get('aggregate_fetch_methods', config.dbapi2.aggregate_fetch_methods)
+
+    def _trace_fetch_method(self, method, name, extra_tags, max_rows, *args, **kwargs):
+        if not self._aggregate_fetch_methods():
+            return self._trace_method(method, name, self._self_last_execute_operation, extra_tags, *args, **kwargs)
+
+        metrics = self._self_fetch_metrics
+        pin = Pin.get_from(self)
+        if metrics is None or not pin or not pin.enabled():
+            return method(*args, **kwargs)
+
+        start_ns = compat.monotonic_ns()
+        row_count = 0
+        try:
+            rows = method(*args, **kwargs)
+            if max_rows == 1:
+                row_count = 0 if rows is None else 1
+            else:
+                row_count = len(rows) if hasattr(rows, '__len__') else 0
+            return rows
+        finally:
+            metrics.record(start_ns, compat.monotonic_ns() - start_ns, row_count)
+            # Less rows than requested means that the results are exhausted
+            if max_rows is None or row_count < max_rows:
+                metrics.finish()
+                self._self_fetch_metrics = None
+
     def fetchone(self, *args, **kwargs):
         """ Wraps the cursor.fetchone method"""
         span_name = '{}.{}'.format(self._self_datadog_name, 'fetchone')
-        return self._trace_method(self.__wrapped__.fetchone, span_name, self._self_last_execute_operation, {},
-                                  *args, **kwargs)
+        return self._trace_fetch_method(self.__wrapped__.fetchone, span_name, {}, 1, *args, **kwargs)
 
     def fetchall(self, *args, **kwargs):
         """ Wraps the cursor.fetchall method"""
         span_name = '{}.{}'.format(self._self_datadog_name, 'fetchall')
-        return self._trace_method(self.__wrapped__.fetchall, span_name, self._self_last_execute_operation, {},
-                                  *args, **kwargs)
+        return self._trace_fetch_method(self.__wrapped__.fetchall, span_name, {}, None, *args, **kwargs)
 
     def fetchmany(self, *args, **kwargs):
         """ Wraps the cursor.fetchmany method"""
@@ -151,8 +210,95 @@ class FetchTracedCursor(TracedCursor):
             default_array_size = getattr(self.__wrapped__, 'arraysize', None)
             extra_tags = {size_tag_key: default_array_size} if default_array_size else {}
 
-        return self._trace_method(self.__wrapped__.fetchmany, span_name, self._self_last_execute_operation, extra_tags,
-                                  *args, **kwargs)
+        max_rows = extra_tags.get(size_tag_key) or 1
+        return self._trace_fetch_method(self.__wrapped__.fetchmany, span_name, extra_tags, max_rows, *args, **kwargs)
+
+
+class _FetchMetrics(object):
+    """
+    Fetch metrics of a query.
+
+    The metrics are recorded on the span of the query as long as it is not flushed. A flushed span must not be
+    modified anymore, so the fetches done afterwards are reported by a separate span, child of the query span, once
+    :meth:`finish` is called.
+    """
+    __slots__ = (
+        'tracer', 'span', 'context', 'trace', 'trace_id', 'span_id', 'name', 'service', 'resource', 'sampled',
+        'sampling_priority', 'origin', 'count', 'rows', 'duration_ns', 'start_ns', 'first_ns', 'last_ns',
+    )
+
+    def __init__(self, tracer, span):
+        # Must be created before the query span is finished
+        context = span.context
+        self.tracer = tracer
+        self.span = span
+        self.context = context
+        # Flushing the spans of a context replaces its list of spans: the query span is not flushed as long as the
+        # list is still the one of the context.
+        self.trace = context._trace
+        # Copied for the fetch span since the query span may be reused once flushed
+        self.trace_id = span.trace_id
+        self.span_id = span.span_id
+        self.name = span.name
+        self.service = span.service
+        self.resource = span.resource
+        self.sampled = span.sampled
+        self.sampling_priority = context.sampling_priority
+        self.origin = context.dd_origin
+        self.count = 0
+        self.rows = 0
+        self.duration_ns = 0
+        self.start_ns = None
+        self.first_ns = None
+        self.last_ns = None
+
+    def record(self, start_ns, duration_ns, rows):
+        if self.span is not None:
+            if self.context._trace is self.trace:
+                span = self.span
+                span.set_metric(FETCH_COUNT, (span.get_metric(FETCH_COUNT) or 0) + 1)
+                span.set_metric(FETCH_ROWS, (span.get_metric(FETCH_ROWS) or 0) + rows)
+                span.set_metric(FETCH_DURATION, (span.get_metric(FETCH_DURATION) or 0) + duration_ns)
+                return
+            self.span = None
+
+        if self.start_ns is None:
+            # The fetch span starts with the first fetch done once the query span was flushed
+            self.start_ns = compat.time_ns() - duration_ns
+            self.first_ns = start_ns
+        self.last_ns = start_ns + duration_ns
+        self.count += 1
+        self.rows += rows
+        self.duration_ns += duration_ns
+
+    def finish(self):
+        """Submit the fetch span if fetches were done once the query span was flushed."""
+        if not self.count or not self.sampled:
+            return
+
+        span = Span(
+            self.tracer,
+            '{}.fetch'.format(self.name),
+            service=self.service,
+            resource=self.resource,
+            span_type=SpanTypes.SQL,
+            trace_id=self.trace_id,
+            parent_id=self.span_id,
+        )
+        span.start_ns = self.start_ns
+        span.duration_ns = self.last_ns - self.first_ns
+        span.set_metric(FETCH_COUNT, self.count)
+        span.set_metric(FETCH_ROWS, self.rows)
+        span.set_metric(FETCH_DURATION, self.duration_ns)
+        if self.tracer.tags:
+            span.set_tags(self.tracer.tags)
+        if config.env:
+            span._set_str_tag(ENV_KEY, config.env)
+        if self.sampling_priority is not None:
+            span.set_metric(SAMPLING_PRIORITY_KEY, self.sampling_priority)
+        if self.origin is not None:
+            span.meta[ORIGIN_KEY] = str(self.origin)
+        self.tracer.write([span])
 
 
 def _get_config(new_cfg):
@@ -5,14 +5,15 @@ in a new thread, that thread can continue the previously generated trace.
 
 The integration doesn't trace automatically threads execution, so manual
 instrumentation or another integration must be activated. Threads propagation
-is not enabled by default with the `patch_all()` method and must be activated
+is enabled by default with the `patch_all()` method, and can be activated
 as follows::
 
-    from ddtrace import patch, patch_all
+    from ddtrace import patch
 
     patch(futures=True)
-    # or, when instrumenting all libraries
-    patch_all(futures=True)
+
+Only what is needed to continue the trace is captured when a work is
+submitted: the context of the thread is created if the work starts a span.
 """
 from ...utils.importlib import require_modules
 
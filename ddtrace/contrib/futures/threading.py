@@ -17,30 +17,30 @@ def _wrap_submit(func, instance, args, kwargs):
     #
     #      The resolution is to not create/propagate a new context if one does not exist, but let the
     #      future's thread create the context instead.
-    current_ctx = None
+    handle = None
     if ddtrace.tracer.context_provider._has_active_context():
-        current_ctx = ddtrace.tracer.context_provider.active()
-
-        # If we have a context then make sure we clone it
+        # If we have a context then only capture what is needed to continue its trace
         # DEV: We don't know if the future will finish executing before the parent span finishes
-        #      so we clone to ensure we properly collect/report the future's spans
-        current_ctx = current_ctx.clone()
+        #      so the future's thread gets its own context to properly collect/report the future's spans.
+        #      It is only created if the future's thread needs it, and the handle is read without
+        #      taking the context lock.
+        handle = ddtrace.tracer.context_provider.active()._propagation_handle()
 
     # extract the target function that must be executed in
     # a new thread and the `target` arguments
     fn = args[0]
     fn_args = args[1:]
-    return func(_wrap_execution, current_ctx, fn, fn_args, kwargs)
+    return func(_wrap_execution, handle, fn, fn_args, kwargs)
 
 
-def _wrap_execution(ctx, fn, args, kwargs):
+def _wrap_execution(handle, fn, args, kwargs):
     """
     Intermediate target function that is executed in a new thread;
     it receives the original function with arguments and keyword
-    arguments, including our tracing `Context`. The current context
-    provider sets the Active context in a thread local storage
-    variable because it's outside the asynchronous loop.
+    arguments, including the propagation handle of our tracing `Context`.
+    The current context provider continues the trace in a thread local
+    storage variable because it's outside the asynchronous loop.
     """
-    if ctx is not None:
-        ddtrace.tracer.context_provider.activate(ctx)
+    if handle is not None:
+        ddtrace.tracer.context_provider._activate_parent(handle)
     return fn(*args, **kwargs)
@@ -2,6 +2,7 @@ import gevent
 import gevent.pool as gpool
 
 from .provider import CONTEXT_ATTR
+from .provider import PARENT_CONTEXT_ATTR
 
 
 GEVENT_VERSION = gevent.version_info[0:3]
@@ -12,15 +13,21 @@ class TracingMixin(object):
         # get the current Context if available
         current_g = gevent.getcurrent()
         ctx = getattr(current_g, CONTEXT_ATTR, None)
+        if ctx:
+            # copy the state of the trace now, but only create the new
+            # context that inherits the current active span if the greenlet
+            # uses it
+            parent = ctx._propagation_handle()
+        else:
+            # the current greenlet did not use the context it inherited yet
+            parent = getattr(current_g, PARENT_CONTEXT_ATTR, None)
 
         # create the Greenlet as usual
         super(TracingMixin, self).__init__(*args, **kwargs)
 
         # the context is always available made exception of the main greenlet
-        if ctx:
-            # create a new context that inherits the current active span
-            new_ctx = ctx.clone()
-            setattr(self, CONTEXT_ATTR, new_ctx)
+        if parent:
+            setattr(self, PARENT_CONTEXT_ATTR, parent)
 
 
 class TracedGreenlet(TracingMixin, gevent.Greenlet):
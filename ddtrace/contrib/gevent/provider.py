@@ -7,6 +7,25 @@ from ...provider import BaseContextProvider
 # Greenlet attribute used to set/get the Context instance
 CONTEXT_ATTR = "__datadog_context"
 
+# Greenlet attribute used to store the propagation handle of the parent
+# greenlet Context taken when the greenlet is spawned, until the greenlet
+# needs a Context
+PARENT_CONTEXT_ATTR = "__datadog_parent_context"
+
+
+def _inherit_context(greenlet):
+    """Create the Context of a greenlet from the Context of its parent greenlet, if any."""
+    handle = getattr(greenlet, PARENT_CONTEXT_ATTR, None)
+    if handle is None:
+        return None
+
+    # the parent Context may have been reset or reused since the greenlet was
+    # spawned: the Context is built from the state copied at spawn time
+    ctx = Context._from_propagation_handle(handle)
+    setattr(greenlet, CONTEXT_ATTR, ctx)
+    delattr(greenlet, PARENT_CONTEXT_ATTR)
+    return ctx
+
 
 class GeventContextProvider(BaseContextProvider):
     """
@@ -14,24 +33,39 @@ class GeventContextProvider(BaseContextProvider):
     execution. It must be used in asynchronous programming that relies
     in the ``gevent`` library. Framework instrumentation that uses the
     gevent WSGI server (or gevent in general), can use this provider.
+
+    The ``Context`` of a greenlet spawned from a traced greenlet is only
+    created from the ``Context`` of its parent when it is first used.
     """
 
     def _get_current_context(self):
         """Helper to get the current context from the current greenlet"""
         current_g = gevent.getcurrent()
         if current_g is not None:
-            return getattr(current_g, CONTEXT_ATTR, None)
+            ctx = getattr(current_g, CONTEXT_ATTR, None)
+            if ctx is None:
+                return _inherit_context(current_g)
+            return ctx
         return None
 
     def _has_active_context(self):
         """Helper to determine if we have a currently active context"""
-        return self._get_current_context() is not None
+        current_g = gevent.getcurrent()
+        if current_g is None:
+            return False
+        return (
+            getattr(current_g, CONTEXT_ATTR, None) is not None
+            or getattr(current_g, PARENT_CONTEXT_ATTR, None) is not None
+        )
 
     def activate(self, context):
         """Sets the scoped ``Context`` for the current running ``Greenlet``."""
         current_g = gevent.getcurrent()
         if current_g is not None:
             setattr(current_g, CONTEXT_ATTR, context)
+            if getattr(current_g, PARENT_CONTEXT_ATTR, None) is not None:
+                # the inherited context is replaced
+                delattr(current_g, PARENT_CONTEXT_ATTR)
             return context
 
     def active(self):
@@ -42,7 +76,8 @@ class GeventContextProvider(BaseContextProvider):
         """
         ctx = self._get_current_context()
         if ctx is not None:
-            # return the active Context for this greenlet (if any)
+            # return the active Context for this greenlet (if any), or the
+            # Context inherited from the parent greenlet
             return ctx
 
         # the Greenlet doesn't have a Context so it's created and attached
@@ -14,6 +14,7 @@ from ...ext import SpanTypes
 from ...ext import db
 from ...ext import net
 from ...ext import sql
+from ...internal.sql import sql_resource
 from ...utils.deprecation import deprecated
 
 
@@ -54,7 +55,7 @@ class TracedCursor(cursor):
             if not s.sampled:
                 return super(TracedCursor, self).execute(query, vars)
 
-            s.resource = query
+            s.resource = sql_resource(query)
             s.set_tags(self._datadog_tags)
             try:
                 return super(TracedCursor, self).execute(query, vars)
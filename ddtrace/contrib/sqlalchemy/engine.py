@@ -23,6 +23,7 @@ from ...constants import SPAN_MEASURED_KEY
 from ...ext import SpanTypes
 from ...ext import net as netx
 from ...ext import sql as sqlx
+from ...internal.sql import sql_resource
 from ...pin import Pin
 from ...settings import config
 
@@ -90,7 +91,7 @@ class EngineTracer(object):
             self.name,
             service=pin.service,
             span_type=SpanTypes.SQL,
-            resource=statement,
+            resource=sql_resource(statement),
         )
         span.set_tag(SPAN_MEASURED_KEY)
 
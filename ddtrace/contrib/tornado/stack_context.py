@@ -4,6 +4,7 @@ import tornado
 from tornado.ioloop import IOLoop
 
 from ...context import Context
+from ...provider import BaseContextProvider
 from ...provider import DefaultContextProvider
 
 
@@ -121,6 +122,14 @@ if _USE_STACK_CONTEXT:
                         stack_ctx._context = ctx
             return ctx
 
+        def _activate_parent(self, handle):
+            """Continue the trace of a parent execution in the current execution."""
+            if not self._has_io_loop():
+                # the Context is only created if needed by the thread-local storage
+                super(TracerStackContext, self)._activate_parent(handle)
+            else:
+                BaseContextProvider._activate_parent(self, handle)
+
 
 else:
     # no-op when not using stack_context
@@ -124,6 +124,38 @@ def get_error_ranges(error_range_str):
     return error_ranges
 
 
+class _ErrorStatuses(object):
+    """Error status codes parsed from the value of ``config.http_server.error_statuses``.
+
+    The status codes below ``TABLE_SIZE``, i.e. all the HTTP status codes, are
+    looked up in a table: the ranges are only checked for other values.
+    """
+
+    TABLE_SIZE = 600
+
+    __slots__ = ("value", "ranges", "table")
+
+    def __init__(self, value):
+        self.value = value
+        self.ranges = get_error_ranges(value)
+        table = [False] * self.TABLE_SIZE
+        for low, high in self.ranges:
+            for code in range(max(low, 0), min(high + 1, self.TABLE_SIZE)):
+                table[code] = True
+        self.table = tuple(table)
+
+    def __contains__(self, status_code):
+        if 0 <= status_code < self.TABLE_SIZE:
+            return self.table[status_code]
+        for error_range in self.ranges:
+            if error_range[0] <= status_code <= error_range[1]:
+                return True
+        return False
+
+
+_error_statuses = _ErrorStatuses(config.http_server.error_statuses)
+
+
 def is_error_code(status_code):
     """Returns a boolean representing whether or not a status code is an error code.
     Error status codes by default are 500-599.
@@ -134,12 +166,13 @@ def is_error_code(status_code):
 
     Ranges and singular error codes are permitted and can be separated using commas.
     """
+    global _error_statuses
 
-    error_ranges = get_error_ranges(config.http_server.error_statuses)
-    for error_range in error_ranges:
-        if error_range[0] <= int(status_code) <= error_range[1]:
-            return True
-    return False
+    error_statuses = _error_statuses
+    # The error statuses are only parsed again when the configuration changes
+    if config.http_server.error_statuses != error_statuses.value:
+        error_statuses = _error_statuses = _ErrorStatuses(config.http_server.error_statuses)
+    return int(status_code) in error_statuses
 
 
 def set_http_meta(
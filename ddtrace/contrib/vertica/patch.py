@@ -10,6 +10,7 @@ from ...ext import SpanTypes
 from ...ext import db as dbx
 from ...ext import net
 from ...internal.logger import get_logger
+from ...internal.sql import sql_resource
 from ...pin import Pin
 from ...settings import config
 from ...utils.wrappers import unwrap
@@ -22,11 +23,11 @@ _PATCHED = False
 
 
 def copy_span_start(instance, span, conf, *args, **kwargs):
-    span.resource = args[0]
+    span.resource = sql_resource(args[0])
 
 
 def execute_span_start(instance, span, conf, *args, **kwargs):
-    span.resource = args[0]
+    span.resource = sql_resource(args[0])
 
 
 def execute_span_end(instance, result, span, conf, *args, **kwargs):
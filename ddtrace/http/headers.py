@@ -61,10 +61,10 @@ def _store_headers(headers, span, integration_config, request_or_response):
         return
 
     for header_name, header_value in headers.items():
-        if not integration_config.header_is_traced(header_name):
+        tag_names = integration_config._header_tag_names(header_name)
+        if tag_names is None:
             continue
-        tag_name = _normalize_tag_name(request_or_response, header_name)
-        span.set_tag(tag_name, header_value)
+        span.set_tag(tag_names[request_or_response], header_value)
 
 
 def _normalize_tag_name(request_or_response, header_name):
@@ -1,8 +1,12 @@
 from cpython cimport *
 from cpython.bytearray cimport PyByteArray_Check
+from libc.string cimport memcpy
 import struct
+import threading
 
 from ..span import Span
+from .buffer import BufferFull
+from .buffer import BufferItemTooLarge
 
 
 cdef extern from "Python.h":
@@ -32,6 +36,10 @@ cdef extern from "buff_converter.h":
 
 cdef long long ITEM_LIMIT = (2**32)-1
 
+# Size of the largest msgpack array header (0xdd + 32-bit count)
+DEF ARRAY_HEADER_SIZE = 5
+DEF INITIAL_BUFFER_SIZE = 1024*1024
+
 
 cdef inline int PyBytesLike_Check(object o):
     return PyBytes_Check(o) or PyByteArray_Check(o)
@@ -184,84 +192,162 @@ cdef class Packer(object):
                 else:
                     # List of spans
                     for i in range(L):
-                        ret = self._pack(o[i])
+                        item = o[i]
+                        if isinstance(item, Span):
+                            ret = self._pack_span(item)
+                        else:
+                            ret = self._pack(item)
                         if ret != 0: break
 
             elif isinstance(o, Span):
-                has_span_type = <bint>(o.span_type is not None)
-                has_meta = <bint>(len(o.meta) > 0)
-                has_metrics = <bint>(len(o.metrics) > 0)
+                ret = self._pack_span(o)
+            else:
+                PyErr_Format(TypeError, b"can not serialize '%.200s' object", Py_TYPE(o).tp_name)
+            return ret
 
-                L = 12 - (1 - has_span_type) - (1 - has_meta) - (1 - has_metrics)
+    cdef inline int _pack_text(self, object text) except -1:
+        cdef int ret
 
-                ret = msgpack_pack_map(&self.pk, L)
+        if self.encoding == NULL and PyUnicode_CheckExact(text):
+            ret = msgpack_pack_unicode(&self.pk, text, ITEM_LIMIT)
+            if ret == -2:
+                raise ValueError("unicode string is too large")
+            return ret
+        return self._pack(text)
 
-                if ret == 0:
-                    ret = pack_bytes(&self.pk, <char *>b"trace_id", 8)
-                    if ret != 0: return ret
-                    ret = self._pack(o.trace_id)
-                    if ret != 0: return ret
-
-                    ret = pack_bytes(&self.pk, <char *>b"parent_id", 9)
-                    if ret != 0: return ret
-                    ret = self._pack(o.parent_id)
-                    if ret != 0: return ret
-
-                    ret = pack_bytes(&self.pk, <char *>b"span_id", 7)
-                    if ret != 0: return ret
-                    ret = self._pack(o.span_id)
-                    if ret != 0: return ret
-
-                    ret = pack_bytes(&self.pk, <char *>b"service", 7)
-                    if ret != 0: return ret
-                    ret = self._pack(o.service)
-                    if ret != 0: return ret
-
-                    ret = pack_bytes(&self.pk, <char *>b"resource", 8)
-                    if ret != 0: return ret
-                    ret = self._pack(o.resource)
-                    if ret != 0: return ret
-
-                    ret = pack_bytes(&self.pk, <char *>b"name", 4)
-                    if ret != 0: return ret
-                    ret = self._pack(o.name)
-                    if ret != 0: return ret
-
-                    ret = pack_bytes(&self.pk, <char *>b"error", 5)
-                    if ret != 0: return ret
-                    ret = self._pack(1 if o.error else 0)
-                    if ret != 0: return ret
-
-                    ret = pack_bytes(&self.pk, <char *>b"start", 5)
-                    if ret != 0: return ret
-                    ret = self._pack(o.start_ns)
-                    if ret != 0: return ret
-
-                    ret = pack_bytes(&self.pk, <char *>b"duration", 8)
-                    if ret != 0: return ret
-                    ret = self._pack(o.duration_ns)
-                    if ret != 0: return ret
-
-                    if has_span_type:
-                        ret = pack_bytes(&self.pk, <char *>b"type", 4)
-                        if ret != 0: return ret
-                        ret = self._pack(o.span_type)
-                        if ret != 0: return ret
-
-                    if has_meta:
-                        ret = pack_bytes(&self.pk, <char *>b"meta", 4)
-                        if ret != 0: return ret
-                        ret = self._pack(o.meta)
-                        if ret != 0: return ret
-
-                    if has_metrics:
-                        ret = pack_bytes(&self.pk, <char *>b"metrics", 7)
-                        if ret != 0: return ret
-                        ret = self._pack(o.metrics)
-                        if ret != 0: return ret
+    cdef inline int _pack_meta(self, dict meta) except -1:
+        cdef int ret
+        cdef Py_ssize_t L
+
+        L = len(meta)
+        if L > ITEM_LIMIT:
+            raise ValueError("dict is too large")
+
+        ret = msgpack_pack_map(&self.pk, L)
+        if ret == 0:
+            for k, v in meta.items():
+                ret = self._pack_text(k)
+                if ret != 0: break
+                ret = self._pack_text(v)
+                if ret != 0: break
+        return ret
+
+    cdef inline int _pack_metrics(self, dict metrics) except -1:
+        cdef int ret
+        cdef Py_ssize_t L
+
+        L = len(metrics)
+        if L > ITEM_LIMIT:
+            raise ValueError("dict is too large")
+
+        ret = msgpack_pack_map(&self.pk, L)
+        if ret == 0:
+            for k, v in metrics.items():
+                ret = self._pack_text(k)
+                if ret != 0: break
+                if PyFloat_CheckExact(v):
+                    ret = msgpack_pack_double(&self.pk, <double>v)
+                else:
+                    ret = self._pack(v)
+                if ret != 0: break
+        return ret
+
+    cdef int _pack_span(self, object span) except -1:
+        """Pack a span as a v0.4 span map.
+
+        The span attributes are read once and written straight into the
+        buffer, which avoids building the intermediate dictionary returned by
+        ``Span.to_dict()``.
+        """
+        cdef int ret
+        cdef Py_ssize_t L
+        cdef bint has_span_type
+        cdef bint has_meta
+        cdef bint has_metrics
+
+        span_type = span._span_type
+        meta = span.meta
+        metrics = span.metrics
+
+        has_span_type = span_type is not None
+        has_meta = len(meta) > 0
+        has_metrics = len(metrics) > 0
+
+        L = 9 + has_span_type + has_meta + has_metrics
+
+        ret = msgpack_pack_map(&self.pk, L)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"trace_id", 8)
+        if ret != 0: return ret
+        ret = self._pack(span.trace_id)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"parent_id", 9)
+        if ret != 0: return ret
+        ret = self._pack(span.parent_id)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"span_id", 7)
+        if ret != 0: return ret
+        ret = self._pack(span.span_id)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"service", 7)
+        if ret != 0: return ret
+        ret = self._pack_text(span.service)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"resource", 8)
+        if ret != 0: return ret
+        ret = self._pack_text(span.resource)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"name", 4)
+        if ret != 0: return ret
+        ret = self._pack_text(span.name)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"error", 5)
+        if ret != 0: return ret
+        ret = msgpack_pack_int(&self.pk, 1 if span.error else 0)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"start", 5)
+        if ret != 0: return ret
+        ret = self._pack(span.start_ns)
+        if ret != 0: return ret
+
+        ret = pack_bytes(&self.pk, <char *>b"duration", 8)
+        if ret != 0: return ret
+        ret = self._pack(span.duration_ns)
+        if ret != 0: return ret
+
+        if has_span_type:
+            ret = pack_bytes(&self.pk, <char *>b"type", 4)
+            if ret != 0: return ret
+            ret = self._pack_text(span_type)
+            if ret != 0: return ret
+
+        if has_meta:
+            ret = pack_bytes(&self.pk, <char *>b"meta", 4)
+            if ret != 0: return ret
+            if PyDict_CheckExact(meta):
+                ret = self._pack_meta(meta)
             else:
-                PyErr_Format(TypeError, b"can not serialize '%.200s' object", Py_TYPE(o).tp_name)
-            return ret
+                ret = self._pack(meta)
+            if ret != 0: return ret
+
+        if has_metrics:
+            ret = pack_bytes(&self.pk, <char *>b"metrics", 7)
+            if ret != 0: return ret
+            if PyDict_CheckExact(metrics):
+                ret = self._pack_metrics(metrics)
+            else:
+                ret = self._pack(metrics)
+            if ret != 0: return ret
+
+        return ret
 
     cpdef pack(self, object obj):
         cdef int ret
@@ -314,3 +400,149 @@ cdef class MsgpackEncoder(object):
             return struct.pack(">BH", 0xdc, count) + buf
         else:
             return struct.pack(">BI", 0xdd, count) + buf
+
+
+cdef class _EncodedPayload(object):
+    """Read-only buffer that owns the memory of a flushed :class:`BufferedEncoder`."""
+    cdef char *buf
+    cdef Py_ssize_t offset
+    cdef Py_ssize_t length
+
+    def __dealloc__(self):
+        PyMem_Free(self.buf)
+        self.buf = NULL
+
+    def __len__(self):
+        return self.length
+
+    def __getbuffer__(self, Py_buffer *view, int flags):
+        PyBuffer_FillInfo(view, self, self.buf + self.offset, self.length, 1, flags)
+
+    def __releasebuffer__(self, Py_buffer *view):
+        pass
+
+
+cdef class BufferedEncoder(object):
+    """A thread-safe buffer that encodes traces straight into a single
+    msgpack array payload to be sent to a Datadog Agent.
+
+    Traces are appended to one contiguous buffer as they are put. Room for the
+    array header is reserved at the start of the buffer and the header is
+    written in place when the buffer is flushed, so that the payload can be
+    handed over without joining or copying the encoded traces.
+
+    :param max_size: The maximum size (in bytes) of the buffer.
+    :param max_item_size: The maximum size of any encoded trace in the buffer.
+    """
+    content_type = "application/msgpack"
+
+    cdef Packer _packer
+    cdef readonly size_t max_size
+    cdef readonly size_t max_item_size
+    cdef size_t _count
+    cdef object _lock
+
+    def __cinit__(self, size_t max_size, size_t max_item_size):
+        self.max_size = max_size
+        self.max_item_size = max_item_size
+        self._count = 0
+        self._lock = threading.Lock()
+        self._packer = Packer()
+        self._packer.pk.length = ARRAY_HEADER_SIZE
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def size(self):
+        """Return the size in bytes of the encoded traces in the buffer."""
+        return self._packer.pk.length - ARRAY_HEADER_SIZE
+
+    def put(self, list trace):
+        """Encode a trace (list of spans) and append it to the buffer.
+
+        :raises BufferItemTooLarge: if the encoded trace is larger than the item limit.
+        :raises BufferFull: if the encoded trace does not fit in the buffer.
+
+        Both exceptions carry the size of the encoded trace as their argument.
+        """
+        cdef size_t start
+        cdef size_t item_len
+
+        with self._lock:
+            start = self._packer.pk.length
+            try:
+                self._packer._pack(trace)
+            except Exception:
+                self._packer.pk.length = start
+                raise
+
+            item_len = self._packer.pk.length - start
+            if item_len > self.max_item_size or item_len > self.max_size:
+                self._packer.pk.length = start
+                raise BufferItemTooLarge(item_len)
+
+            if self._packer.pk.length - ARRAY_HEADER_SIZE > self.max_size:
+                self._packer.pk.length = start
+                raise BufferFull(item_len)
+
+            self._count += 1
+
+    def flush(self):
+        """Return the buffered traces as an encoded msgpack array.
+
+        The buffer is cleared in the process.
+
+        :returns: A tuple with a read-only ``memoryview`` over the encoded
+            payload (``None`` if the buffer is empty) and the number of traces
+            it contains.
+        """
+        cdef char *buf
+        cdef size_t count
+
+        with self._lock:
+            count = self._count
+            if count == 0:
+                return None, 0
+
+            buf = <char*> PyMem_Malloc(INITIAL_BUFFER_SIZE)
+            if buf == NULL:
+                raise MemoryError("Unable to allocate internal buffer.")
+
+            payload = self._detach()
+            self._packer.pk.buf = buf
+            self._packer.pk.buf_size = INITIAL_BUFFER_SIZE
+            self._packer.pk.length = ARRAY_HEADER_SIZE
+            self._count = 0
+
+        return memoryview(payload), count
+
+    cdef _EncodedPayload _detach(self):
+        """Patch the array header in place and hand the buffer over to a payload."""
+        cdef unsigned char header[ARRAY_HEADER_SIZE]
+        cdef Py_ssize_t header_len
+        cdef size_t count = self._count
+        cdef _EncodedPayload payload
+
+        if count <= 0xf:
+            header[0] = 0x90 + count
+            header_len = 1
+        elif count <= 0xffff:
+            header[0] = 0xdc
+            header[1] = (count >> 8) & 0xff
+            header[2] = count & 0xff
+            header_len = 3
+        else:
+            header[0] = 0xdd
+            header[1] = (count >> 24) & 0xff
+            header[2] = (count >> 16) & 0xff
+            header[3] = (count >> 8) & 0xff
+            header[4] = count & 0xff
+            header_len = 5
+
+        payload = _EncodedPayload.__new__(_EncodedPayload)
+        payload.buf = self._packer.pk.buf
+        payload.offset = ARRAY_HEADER_SIZE - header_len
+        payload.length = self._packer.pk.length - payload.offset
+        memcpy(payload.buf + payload.offset, header, header_len)
+        return payload
@@ -60,6 +60,10 @@ from ddtrace import compat
 cdef uint64_t state
 cdef object pid = None
 
+# The generator is seeded again by a fork hook when available, so that the pid
+# does not need to be checked
+cdef bint fork_hooks = hasattr(os, "register_at_fork")
+
 
 cpdef _getstate():
     return state
@@ -71,7 +75,7 @@ cpdef seed():
 
 
 cpdef rand64bits(check_pid=True):
-    if check_pid:
+    if check_pid and not fork_hooks:
         global pid
         current_pid = os.getpid()
 
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+import threading
+
+
+class LRUCache(object):
+    """
+    Thread-safe mapping holding at most ``maxsize`` items, discarding the least
+    recently used ones first.
+    """
+
+    __slots__ = ("maxsize", "_items", "_lock")
+
+    def __init__(self, maxsize):
+        """
+        Constructor for LRUCache.
+
+        :param maxsize: The maximum number of items in the cache.
+        :type maxsize: :obj:`int`
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be greater than 0")
+
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memodict=None):
+        # Locks cannot be copied: start from an empty cache
+        return self.__class__(self.maxsize)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """
+        Return the value of ``key`` and mark it as the most recently used, or
+        ``default`` if it is not in the cache.
+        """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        """
+        Set the value of ``key``, discarding the least recently used item if the
+        cache is full.
+        """
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        """Remove all the items from the cache."""
+        with self._lock:
+            self._items.clear()
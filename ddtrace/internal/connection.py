@@ -0,0 +1,137 @@
+import errno
+import threading
+
+from ddtrace.vendor import attr
+
+from ..api import Response
+from ..compat import get_connection_response
+from ..compat import httplib
+from .logger import get_logger
+from .uds import UDSHTTPConnection
+
+
+log = get_logger(__name__)
+
+# Errors of a request over a reused connection that was closed by the agent
+# before it could process the request: sending the request failed, or the
+# connection was closed before any byte of the response was received.
+_SEND_RETRY_ERRNOS = (errno.EPIPE, errno.ECONNRESET)
+_NO_RESPONSE_ERROR = getattr(httplib, "RemoteDisconnected", httplib.BadStatusLine)
+
+
+@attr.s
+class ConnectionStats(object):
+    """Usage counters of a :class:`PersistentConnection`."""
+
+    requests = attr.ib(default=0, type=int)
+    """Number of requests sent."""
+    connects = attr.ib(default=0, type=int)
+    """Number of connections opened."""
+    reuses = attr.ib(default=0, type=int)
+    """Number of requests sent over an already open connection."""
+    reconnects = attr.ib(default=0, type=int)
+    """Number of connections opened to replace one that was closed by an error or by the peer."""
+    errors = attr.ib(default=0, type=int)
+    """Number of requests that failed with a connection error."""
+
+
+class PersistentConnection(object):
+    """An HTTP/1.1 connection to the Datadog Agent kept alive across requests.
+
+    The underlying connection is opened on the first request and reused for
+    the following ones. It is closed whenever a request fails or the agent
+    asks for it to be closed, and a new one is opened on the next request. A
+    request failing on a reused connection because the agent closed it while
+    it was idle is retried once on a fresh connection. Requests failing after
+    the agent may have processed them are not retried, so that a payload is
+    never submitted twice.
+
+    Instances must not be shared across a fork: create a new one in the child
+    process instead.
+    """
+
+    def __init__(self, hostname, port, uds_path=None, https=False, timeout=2):
+        self.hostname = hostname
+        self.port = port
+        self.uds_path = uds_path
+        self.https = https
+        self.timeout = timeout
+        self.stats = ConnectionStats()
+        self._conn = None
+        self._sending = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self.uds_path is None:
+            if self.https:
+                conn = httplib.HTTPSConnection(self.hostname, self.port, timeout=self.timeout)
+            else:
+                conn = httplib.HTTPConnection(self.hostname, self.port, timeout=self.timeout)
+        else:
+            conn = UDSHTTPConnection(self.uds_path, self.https, self.hostname, self.port, timeout=self.timeout)
+
+        if self.stats.connects:
+            self.stats.reconnects += 1
+        self.stats.connects += 1
+        return conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _request(self, conn, method, url, body, headers):
+        self._sending = True
+        conn.request(method, url, body, headers)
+        self._sending = False
+        # DEV: This will call `resp.read()` which must happen before the next request is sent over the connection
+        resp = get_connection_response(conn)
+        response = Response.from_http_response(resp)
+        if resp.will_close:
+            self._close()
+        return response
+
+    def request(self, method, url, body=None, headers=None):
+        """Send a request and return its :class:`ddtrace.api.Response`."""
+        if headers is None:
+            headers = {}
+
+        with self._lock:
+            self.stats.requests += 1
+            reused = self._conn is not None
+            if reused:
+                self.stats.reuses += 1
+            else:
+                self._conn = self._connect()
+
+            try:
+                return self._request(self._conn, method, url, body, headers)
+            except (httplib.HTTPException, OSError, IOError) as e:
+                self.stats.errors += 1
+                self._close()
+                if not (reused and self._is_stale_connection_error(e)):
+                    raise
+                log.debug("request over a reused connection failed, retrying on a new connection", exc_info=True)
+            except Exception:
+                self.stats.errors += 1
+                self._close()
+                raise
+
+            self._conn = self._connect()
+            try:
+                return self._request(self._conn, method, url, body, headers)
+            except Exception:
+                self.stats.errors += 1
+                self._close()
+                raise
+
+    def _is_stale_connection_error(self, error):
+        """Return whether a request failed because the connection was closed before the agent received it."""
+        if self._sending:
+            return getattr(error, "errno", None) in _SEND_RETRY_ERRNOS
+        return isinstance(error, _NO_RESPONSE_ERROR)
+
+    def close(self):
+        """Close the underlying connection, if any."""
+        with self._lock:
+            self._close()
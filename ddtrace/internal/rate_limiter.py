@@ -8,6 +8,9 @@ from .. import compat
 class RateLimiter(object):
     """
     A token bucket rate limiter implementation
+
+    Only the token bucket is updated under a lock, and only when the rate
+    limit is positive. The clock is read once per request.
     """
 
     __slots__ = (
@@ -54,15 +57,14 @@ class RateLimiter(object):
         :returns: Whether the current request is allowed or not
         :rtype: :obj:`bool`
         """
+        now = compat.monotonic()
         # Determine if it is allowed
-        allowed = self._is_allowed()
+        allowed = self._is_allowed(now)
         # Update counts used to determine effective rate
-        self._update_rate_counts(allowed)
+        self._update_rate_counts(allowed, now)
         return allowed
 
-    def _update_rate_counts(self, allowed):
-        now = compat.monotonic()
-
+    def _update_rate_counts(self, allowed, now):
         # No tokens have been seen yet, start a new window
         if not self.current_window:
             self.current_window = now
@@ -80,7 +82,7 @@ class RateLimiter(object):
             self.tokens_allowed += 1
         self.tokens_total += 1
 
-    def _is_allowed(self):
+    def _is_allowed(self, now):
         # Rate limit of 0 blocks everything
         if self.rate_limit == 0:
             return False
@@ -91,7 +93,7 @@ class RateLimiter(object):
 
         # Lock, we need this to be thread safe, it should be shared by all threads
         with self._lock:
-            self._replenish()
+            self._replenish(now)
 
             if self.tokens >= 1:
                 self.tokens -= 1
@@ -99,13 +101,12 @@ class RateLimiter(object):
 
             return False
 
-    def _replenish(self):
+    def _replenish(self, now):
         # If we are at the max, we do not need to add any more
         if self.tokens == self.max_tokens:
             return
 
         # Add more available tokens based on how much time has passed
-        now = compat.monotonic()
         elapsed = now - self.last_update
         self.last_update = now
 
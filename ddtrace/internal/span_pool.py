@@ -0,0 +1,91 @@
+import sys
+import weakref
+
+from ..span import Span
+from ..utils.formats import get_env
+
+
+DEFAULT_SPAN_POOL_SIZE = int(get_env("trace", "span_pool_size", default=0))
+
+
+def _refcounts(trace):
+    trace_refcount = sys.getrefcount(trace)
+    for span in trace:
+        return trace_refcount, sys.getrefcount(span)
+
+
+# Reference counts of a trace passed to SpanPool.release by a caller that does
+# not reference it anymore and of one of its spans while it is checked, which
+# depend on the Python version.
+if hasattr(sys, "getrefcount"):
+    _TRACE_REFCOUNT, _SPAN_REFCOUNT = _refcounts([object()])
+
+
+class SpanPool(object):
+    """Bounded pool of spans to reuse for new spans.
+
+    The spans of the traces sent by the writer are released to the pool so
+    that new spans can be initialized in place rather than allocated. A trace
+    is only released if none of its spans is referenced anymore outside of the
+    trace, so that a span still used by the application is never reinitialized.
+    This is checked with the reference count of the spans, which is only
+    available with CPython: the pool is disabled with other implementations.
+
+    The pool is disabled if its maximum size is 0.
+    """
+
+    def __init__(self, max_size=DEFAULT_SPAN_POOL_SIZE):
+        if not hasattr(sys, "getrefcount"):
+            max_size = 0
+        self.max_size = max_size
+        self._spans = []
+
+    def __len__(self):
+        return len(self._spans)
+
+    def acquire(self, *args, **kwargs):
+        """Return a span from the pool, or a new span if the pool is empty.
+
+        The arguments are the arguments of :class:`ddtrace.Span`.
+        """
+        try:
+            span = self._spans.pop()
+        except IndexError:
+            return Span(*args, **kwargs)
+        span.__init__(*args, **kwargs)
+        return span
+
+    def release(self, trace):
+        """Release the spans of a finished trace to the pool.
+
+        The trace must not be referenced by the caller, e.g. it is popped from
+        a list in the call.
+
+        :returns: Whether the spans were added to the pool.
+        """
+        if len(self._spans) + len(trace) > self.max_size or sys.getrefcount(trace) > _TRACE_REFCOUNT:
+            return False
+
+        # Spans are also referenced by their children in the trace
+        children = {}
+        for span in trace:
+            if span._parent is not None:
+                parent_id = id(span._parent)
+                children[parent_id] = children.get(parent_id, 0) + 1
+
+        for span in trace:
+            if weakref.getweakrefcount(span) or sys.getrefcount(span) > _SPAN_REFCOUNT + children.get(id(span), 0):
+                return False
+
+        for span in trace:
+            # Drop the references to other objects until the span is reused
+            span._parent = None
+            span._context = None
+            span.tracer = None
+            span.meta = None
+            span.metrics = None
+        self._spans.extend(trace)
+        return True
+
+
+span_pool = SpanPool()
@@ -0,0 +1,66 @@
+import re
+
+from ..settings import config
+from ..vendor import six
+from .cache import LRUCache
+
+
+# Maximum number of normalized queries kept in the cache
+NORMALIZATION_CACHE_SIZE = 1024
+
+_TOKENS = re.compile(
+    r"""
+    (?P<space>(?:\s|--[^\n]*|/\*.*?\*/)+)
+    | (?P<string>[EeNnBbXx]?'(?:[^'\\]|''|\\.)*'|\$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$)
+    | (?P<identifier>"(?:[^"]|"")*"|`[^`]*`|[A-Za-z_][\w$]*)
+    | (?P<placeholder>%\(\w+\)s|%s|:\w+|\$\d+)
+    | (?P<number>(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?))
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+# Lists of literals, e.g. ``IN (1, 2, 3)``, and lists of such lists, e.g.
+# ``VALUES (1, 2), (3, 4)``
+_LITERALS_LIST = re.compile(r"\( ?\?(?: ?, ?\?)* ?\)")
+_LITERALS_LISTS = re.compile(r"\(\?\)(?: ?, ?\(\?\))+")
+
+_normalized_queries = LRUCache(NORMALIZATION_CACHE_SIZE)
+
+
+def _normalize_token(match):
+    kind = match.lastgroup
+    if kind in ("string", "number"):
+        return "?"
+    if kind == "space":
+        return " "
+    return match.group(0)
+
+
+def normalize_query(query):
+    """Return the query with its literals replaced by ``?``.
+
+    Comments are removed, whitespaces are collapsed and lists of literals
+    are collapsed into a single ``(?)``, so that the queries differing only by
+    their literals are normalized to the same string. Identifiers and query
+    parameters placeholders are kept as is.
+
+    The normalized queries are cached by query.
+    """
+    normalized = _normalized_queries.get(query)
+    if normalized is None:
+        normalized = _TOKENS.sub(_normalize_token, query)
+        normalized = _LITERALS_LIST.sub("(?)", normalized)
+        normalized = _LITERALS_LISTS.sub("(?)", normalized).strip()
+        _normalized_queries.set(query, normalized)
+    return normalized
+
+
+def sql_resource(query):
+    """Return the resource of a span tracing ``query``.
+
+    The query is normalized if ``config.sql_normalization_enabled`` is set,
+    otherwise it is returned as is, to be obfuscated by the agent.
+    """
+    if config.sql_normalization_enabled and isinstance(query, six.string_types):
+        return normalize_query(query)
+    return query
@@ -0,0 +1,131 @@
+import threading
+
+from ..constants import SPAN_MEASURED_KEY
+from ..ext import http
+
+
+# Duration of the time buckets the stats are aggregated in, matching the
+# buckets of the stats computed by the Datadog Agent.
+DEFAULT_BUCKET_SIZE_NS = 10 * 1000000000
+
+
+def _is_top_level(span, services):
+    # The parent may belong to another chunk of the trace with partial flush
+    parent = span._parent
+    if parent is not None:
+        return parent.service != span.service
+    return span.parent_id not in services or services[span.parent_id] != span.service
+
+
+class SpanStatsAggregator(object):
+    """Aggregate hits, top-level hits, errors and durations of finished spans.
+
+    Spans are grouped by service, name, resource and HTTP status code in time
+    buckets of ``bucket_size_ns`` nanoseconds, based on the time the span
+    finished. Like the stats computed by the Datadog Agent, only top-level
+    spans, i.e. the spans whose parent belongs to another service or is
+    remote, and measured spans are counted.
+
+    Aggregating the stats in the tracer allows to drop the traces that are not
+    sampled instead of sending them to the agent.
+    """
+
+    def __init__(self, bucket_size_ns=DEFAULT_BUCKET_SIZE_NS):
+        self.bucket_size_ns = bucket_size_ns
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def add_trace(self, trace):
+        """Add the spans of a finished trace to the stats."""
+        services = {span.span_id: span.service for span in trace}
+        bucket_size_ns = self.bucket_size_ns
+
+        with self._lock:
+            for span in trace:
+                top_level = _is_top_level(span, services)
+                if not (top_level or span.metrics.get(SPAN_MEASURED_KEY)):
+                    continue
+
+                duration_ns = span.duration_ns or 0
+                end_ns = span.start_ns + duration_ns
+                bucket_start = end_ns - end_ns % bucket_size_ns
+                bucket = self._buckets.get(bucket_start)
+                if bucket is None:
+                    bucket = self._buckets[bucket_start] = {}
+
+                key = (span.service, span.name, span.resource, span.meta.get(http.STATUS_CODE))
+                stats = bucket.get(key)
+                if stats is None:
+                    # hits, top-level hits, errors, duration
+                    stats = bucket[key] = [0, 0, 0, 0]
+                stats[0] += 1
+                if top_level:
+                    stats[1] += 1
+                if span.error:
+                    stats[2] += 1
+                stats[3] += duration_ns
+
+    def flush(self, now_ns=None):
+        """Remove and return the aggregated stats.
+
+        :param now_ns: Only the buckets that ended before this time, in
+            nanoseconds since the epoch, are flushed. All buckets are flushed if
+            ``None``.
+        :returns: The flushed buckets as a list of ``(start_ns, stats)`` tuples,
+            where ``stats`` maps ``(service, name, resource, http_status_code)``
+            to ``[hits, top_level_hits, errors, duration_ns]``.
+        """
+        with self._lock:
+            if now_ns is None:
+                flushed = self._buckets
+                self._buckets = {}
+            else:
+                flushed = {}
+                for start in list(self._buckets):
+                    if start + self.bucket_size_ns <= now_ns:
+                        flushed[start] = self._buckets.pop(start)
+
+        return sorted(flushed.items())
+
+    def payload(self, buckets, env=None, version=None, hostname=""):
+        """Return the payload for the stats endpoint of the Datadog Agent.
+
+        The payload follows the structure of the client stats payload of the
+        agent. Latency distributions are not computed: only hits, top-level
+        hits, errors and total durations are reported.
+        """
+        return {
+            "Hostname": hostname,
+            "Env": env or "",
+            "Version": version or "",
+            "Stats": [
+                {
+                    "Start": start,
+                    "Duration": self.bucket_size_ns,
+                    "Stats": [_grouped_stats(key, values) for key, values in stats.items()],
+                }
+                for start, stats in buckets
+            ],
+        }
+
+
+def _grouped_stats(key, values):
+    service, name, resource, status_code = key
+    hits, top_level_hits, errors, duration = values
+    return {
+        "Service": service or "",
+        "Name": name or "",
+        "Resource": resource or "",
+        "HTTPStatusCode": _status_code(status_code),
+        "Hits": hits,
+        "TopLevelHits": top_level_hits,
+        "Errors": errors,
+        "Duration": duration,
+    }
+
+
+def _status_code(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
@@ -7,20 +7,26 @@ import ddtrace
 
 from .. import _worker
 from .. import compat
-from ..api import Response
 from ..compat import httplib
 from ..constants import KEEP_SPANS_RATE_KEY
-from ..encoding import Encoder
+from ..constants import SAMPLING_PRIORITY_KEY
 from ..encoding import JSONEncoderV2
+from ..ext.priority import AUTO_REJECT
 from ..sampler import BasePrioritySampler
+from ..utils.formats import asbool
+from ..utils.formats import get_env
 from ..utils.time import StopWatch
+from ._encoding import BufferedEncoder
+from ._encoding import Packer
 from .buffer import BufferFull
 from .buffer import BufferItemTooLarge
 from .buffer import TraceBuffer
+from .connection import PersistentConnection
 from .logger import get_logger
 from .runtime import container
 from .sma import SimpleMovingAverage
-from .uds import UDSHTTPConnection
+from .span_pool import span_pool
+from .stats import SpanStatsAggregator
 
 
 log = get_logger(__name__)
@@ -35,6 +41,41 @@ LOG_ERR_INTERVAL = 60
 DEFAULT_SMA_WINDOW = 10
 
 
+def _get_flush_threshold(default=0.5):
+    """Return the flush threshold set in the environment, or ``default`` if it is not set or invalid."""
+    value = get_env("trace", "writer_flush_threshold")
+    if value is None:
+        return default
+    try:
+        threshold = float(value)
+    except ValueError:
+        threshold = None
+    if threshold is None or not 0 < threshold <= 1:
+        log.warning(
+            "invalid value %r for DD_TRACE_WRITER_FLUSH_THRESHOLD, it must be greater than 0 and lesser or equal to 1: "
+            "using %s",
+            value,
+            default,
+        )
+        return default
+    return threshold
+
+
+# Fraction of the buffer size above which the worker is woken up to flush the
+# buffer without waiting for the next processing interval.
+DEFAULT_FLUSH_THRESHOLD = _get_flush_threshold()
+
+DEFAULT_DEFERRED_ENCODING = asbool(get_env("trace", "writer_deferred_encoding", default=False))
+
+# Estimated size in bytes of an encoded span, used to bound the number of spans
+# waiting to be encoded when encoding is deferred to the worker thread.
+ESTIMATED_SPAN_SIZE = 256
+
+DEFAULT_COMPUTE_STATS = asbool(get_env("trace", "compute_stats", default=False))
+
+STATS_ENDPOINT = "/v0.6/stats"
+
+
 def _human_size(nbytes):
     """Return a human-readable size."""
     i = 0
@@ -46,6 +87,22 @@ def _human_size(nbytes):
     return "%s%s" % (f, suffixes[i])
 
 
+def _is_rejected(trace):
+    """Return whether a trace was rejected by the sampler and can be dropped.
+
+    Rejected traces with errors are kept so that the agent can still sample
+    them.
+    """
+    priority = trace[0].metrics.get(SAMPLING_PRIORITY_KEY)
+    if priority is None:
+        # The chunks of a partially flushed trace do not include the root span
+        # that the sampling priority is set on.
+        context = trace[0].context
+        if context is not None:
+            priority = context.sampling_priority
+    return priority is not None and priority <= AUTO_REJECT and not any(span.error for span in trace)
+
+
 class LogWriter:
     def __init__(self, out=sys.stdout, sampler=None, priority_sampler=None):
         self._sampler = sampler
@@ -78,6 +135,28 @@ class AgentWriter(_worker.PeriodicWorkerThread):
     payloads up to 50MB. A trace payload is just a list of traces and the agent
     expects a trace to be complete. That is, all spans with the same trace_id
     should be in the same trace.
+
+    Traces are flushed every ``processing_interval`` seconds. When the buffered
+    traces grow past ``flush_threshold`` times the buffer size, the flush
+    happens right away so that bursts of traces do not fill up the buffer and
+    get dropped.
+
+    With ``deferred_encoding`` enabled, finished traces are queued as they are
+    and encoded by the worker thread, which takes encoding off the thread that
+    finished the trace. The queue is bounded by an estimate of the encoded size
+    of its spans so that traces are dropped under the same conditions as when
+    they are encoded right away.
+
+    With ``compute_stats`` enabled, the hits, errors and durations of the spans
+    of every trace are aggregated by the writer and sent to the agent
+    periodically, so that the traces rejected by the sampler can be dropped
+    instead of being encoded and sent to the agent. Stats are only computed,
+    and traces dropped, once the agent is known to accept them: until then,
+    the traces are sent as usual. The number of dropped traces and spans is
+    reported to the agent with the next payload of traces.
+
+    When the span pool is enabled, the encoded traces are released to the pool
+    by the worker thread once they are sent.
     """
 
     def __init__(
@@ -97,13 +176,26 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         timeout=2,
         dogstatsd=None,
         report_metrics=False,
+        flush_threshold=DEFAULT_FLUSH_THRESHOLD,
+        deferred_encoding=DEFAULT_DEFERRED_ENCODING,
+        compute_stats=DEFAULT_COMPUTE_STATS,
     ):
         super(AgentWriter, self).__init__(
             interval=processing_interval, exit_timeout=shutdown_timeout, name=self.__class__.__name__
         )
         self._buffer_size = buffer_size
         self._max_payload_size = max_payload_size
-        self._buffer = TraceBuffer(max_size=self._buffer_size, max_item_size=self._max_payload_size)
+        if not 0 < flush_threshold <= 1:
+            raise ValueError("flush_threshold must be greater than 0 and lesser or equal to 1")
+        self._flush_threshold = flush_threshold
+        self._flush_size = int(buffer_size * flush_threshold)
+        self._deferred_encoding = deferred_encoding
+        # The pending traces buffer uses the number of spans of a trace as its size
+        self._pending = TraceBuffer(
+            max_size=max(1, buffer_size // ESTIMATED_SPAN_SIZE),
+            max_item_size=max(1, max_payload_size // ESTIMATED_SPAN_SIZE),
+        )
+        self._pending_flush_size = int(self._pending.max_size * flush_threshold)
         self._sampler = sampler
         self._priority_sampler = priority_sampler
         self._hostname = hostname
@@ -117,6 +209,19 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             "Datadog-Meta-Tracer-Version": ddtrace.__version__,
         }
         self._timeout = timeout
+        if compute_stats:
+            self._stats = SpanStatsAggregator()
+        else:
+            self._stats = None
+        # Whether the agent accepts the stats computed by the tracer, or None until it is known
+        self._stats_supported = None if compute_stats else False
+        # Protects the stats support and the counts of the traces dropped since the last payload
+        self._stats_lock = threading.Lock()
+        self._dropped_p0_traces = 0
+        self._dropped_p0_spans = 0
+        self._connection = PersistentConnection(
+            self._hostname, self._port, uds_path=self._uds_path, https=self._https, timeout=self._timeout
+        )
 
         if priority_sampler is not None:
             self._endpoint = "/v0.4/traces"
@@ -131,7 +236,10 @@ class AgentWriter(_worker.PeriodicWorkerThread):
                 }
             )
 
-        self._encoder = Encoder()
+        self._encoder = BufferedEncoder(max_size=self._buffer_size, max_item_size=self._max_payload_size)
+        # Encoded traces to release to the span pool
+        self._encoded_traces = []
+        self._encoded_spans = 0
         self._headers.update({"Content-Type": self._encoder.content_type})
 
         self._started_lock = threading.Lock()
@@ -175,34 +283,33 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             https=self._https,
             shutdown_timeout=self.exit_timeout,
             priority_sampler=self._priority_sampler,
+            flush_threshold=self._flush_threshold,
+            deferred_encoding=self._deferred_encoding,
+            compute_stats=self._stats is not None,
         )
-        writer._encoder = self._encoder
         writer._headers = self._headers
         writer._endpoint = self._endpoint
         return writer
 
     def _put(self, data, headers):
-        if self._uds_path is None:
-            if self._https:
-                conn = httplib.HTTPSConnection(self._hostname, self._port, timeout=self._timeout)
-            else:
-                conn = httplib.HTTPConnection(self._hostname, self._port, timeout=self._timeout)
+        with StopWatch() as sw:
+            response = self._connection.request("PUT", self._endpoint, data, headers)
+
+        t = sw.elapsed()
+        if t >= self.interval:
+            log_level = logging.WARNING
         else:
-            conn = UDSHTTPConnection(self._uds_path, self._https, self._hostname, self._port, timeout=self._timeout)
+            log_level = logging.DEBUG
+        log.log(log_level, "sent %s in %.5fs", _human_size(len(data)), t)
+        return response
 
-        with StopWatch() as sw:
-            try:
-                conn.request("PUT", self._endpoint, data, headers)
-                resp = compat.get_connection_response(conn)
-                return Response.from_http_response(resp)
-            finally:
-                conn.close()
-            t = sw.elapsed()
-            if t >= self.interval:
-                log_level = logging.WARNING
-            else:
-                log_level = logging.DEBUG
-            log.log(log_level, "sent %s in %.5fs", _human_size(len(data)), t)
+    @property
+    def connection_stats(self):
+        """Usage counters of the connection to the agent.
+
+        :rtype: :class:`ddtrace.internal.connection.ConnectionStats`
+        """
+        return self._connection.stats
 
     @property
     def agent_url(self):
@@ -220,9 +327,15 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             return payload
         raise ValueError
 
-    def _send_payload(self, payload, count):
+    def _send_payload(self, payload, count, extra_headers=None):
+        """Send a payload of traces to the agent.
+
+        :returns: Whether the payload was accepted by the agent.
+        """
         headers = self._headers.copy()
         headers["X-Datadog-Trace-Count"] = str(count)
+        if extra_headers:
+            headers.update(extra_headers)
 
         self._metrics_dist("http.requests")
 
@@ -244,7 +357,7 @@ class AgentWriter(_worker.PeriodicWorkerThread):
                     response.status,
                 )
             else:
-                return self._send_payload(payload, count)
+                return self._send_payload(payload, count, extra_headers)
         elif response.status >= 400:
             log.error(
                 "failed to send traces to Datadog Agent at %s: HTTP error status %s, reason %s",
@@ -254,6 +367,7 @@ class AgentWriter(_worker.PeriodicWorkerThread):
             )
             self._metrics_dist("http.dropped.bytes", len(payload))
             self._metrics_dist("http.dropped.traces", count)
+            return False
         elif self._priority_sampler or isinstance(self._sampler, BasePrioritySampler):
             result_traces_json = response.get_json()
             if result_traces_json and "rate_by_service" in result_traces_json:
@@ -268,6 +382,7 @@ class AgentWriter(_worker.PeriodicWorkerThread):
                         )
                 except ValueError:
                     log.error("sample_rate is negative, cannot update the rate samplers")
+        return response.status < 400
 
     def write(self, spans):
         # Start the AgentWriter on first write.
@@ -280,62 +395,252 @@ class AgentWriter(_worker.PeriodicWorkerThread):
         if not spans:
             return
 
+        if self._stats_supported is None:
+            with self._stats_lock:
+                if self._stats_supported is None:
+                    # The traces are sent without stats until the agent is known to accept them
+                    self._write(spans)
+                    return
+
+        if self._stats_supported:
+            self._stats.add_trace(spans)
+            if _is_rejected(spans):
+                self._metrics_dist("writer.rejected.traces")
+                with self._stats_lock:
+                    self._dropped_p0_traces += 1
+                    self._dropped_p0_spans += len(spans)
+                return
+
+        self._write(spans)
+
+    def _write(self, spans):
         self._metrics_dist("writer.accepted.traces")
 
         self._set_keep_rate(spans)
 
+        if self._deferred_encoding:
+            self._enqueue(spans)
+        elif self._encode(spans) and self._encoder.size >= self._flush_size:
+            self.wakeup()
+
+    def _enqueue(self, spans):
+        try:
+            self._pending.put(spans)
+        except BufferItemTooLarge:
+            log.warning(
+                "trace (%d spans) larger than payload limit (%d spans), dropping",
+                len(spans),
+                self._pending.max_item_size,
+            )
+            self._metrics_dist("buffer.dropped.traces", 1, tags=["reason:t_too_big"])
+        except BufferFull:
+            log.warning(
+                "trace queue (%s traces %d/%d spans) cannot fit trace of %d spans, dropping",
+                len(self._pending),
+                self._pending.size,
+                self._pending.max_size,
+                len(spans),
+            )
+            self._metrics_dist("buffer.dropped.traces", 1, tags=["reason:full"])
+        else:
+            if self._pending.size >= self._pending_flush_size:
+                self.wakeup()
+
+    def _encode(self, spans):
+        """Encode a trace into the buffer.
+
+        :returns: Whether the trace was encoded or dropped.
+        """
         try:
-            encoded = self._encoder.encode_trace(spans)
+            self._encoder.put(spans)
+        except BufferItemTooLarge as e:
+            payload_size = e.args[0]
+            log.warning(
+                "trace (%db) larger than payload limit (%db), dropping",
+                payload_size,
+                self._max_payload_size,
+            )
+            self._metrics_dist("buffer.dropped.traces", 1, tags=["reason:t_too_big"])
+            self._metrics_dist("buffer.dropped.bytes", payload_size, tags=["reason:t_too_big"])
+        except BufferFull as e:
+            payload_size = e.args[0]
+            log.warning(
+                "trace buffer (%s traces %db/%db) cannot fit trace of size %db, dropping",
+                len(self._encoder),
+                self._encoder.size,
+                self._encoder.max_size,
+                payload_size,
+            )
+            self._metrics_dist("buffer.dropped.traces", 1, tags=["reason:full"])
+            self._metrics_dist("buffer.dropped.bytes", payload_size, tags=["reason:full"])
         except Exception:
             log.error("failed to encode trace with encoder %r", self._encoder, exc_info=True)
             self._metrics_dist("encoder.dropped.traces", 1)
         else:
-            try:
-                self._buffer.put(encoded)
-            except BufferItemTooLarge:
-                log.warning(
-                    "trace (%db) larger than payload limit (%db), dropping",
-                    len(encoded),
-                    self._max_payload_size,
-                )
-                self._metrics_dist("buffer.dropped.traces", 1, tags=["reason:t_too_big"])
-                self._metrics_dist("buffer.dropped.bytes", len(encoded), tags=["reason:t_too_big"])
-            except BufferFull:
-                log.warning(
-                    "trace buffer (%s traces %db/%db) cannot fit trace of size %db, dropping",
-                    len(self._buffer),
-                    self._buffer.size,
-                    self._buffer.max_size,
-                    len(encoded),
-                )
-                self._metrics_dist("buffer.dropped.traces", 1, tags=["reason:full"])
-                self._metrics_dist("buffer.dropped.bytes", len(encoded), tags=["reason:full"])
-            else:
-                self._metrics_dist("buffer.accepted.traces", 1)
-                self._metrics_dist("buffer.accepted.spans", len(spans))
+            self._metrics_dist("buffer.accepted.traces", 1)
+            self._metrics_dist("buffer.accepted.spans", len(spans))
+            # Only keep the traces that can fit in the pool
+            if len(span_pool) + self._encoded_spans + len(spans) <= span_pool.max_size:
+                self._encoded_traces.append(spans)
+                self._encoded_spans += len(spans)
+            return True
+        return False
+
+    def _flush_encoded(self):
+        """Send the encoded traces to the agent.
+
+        :returns: Whether a payload was flushed, even if it could not be sent.
+        """
+        encoded, n_traces = self._encoder.flush()
+        if not n_traces:
+            return False
+
+        self._send_encoded(encoded, n_traces, computed_stats=self._stats_supported)
+        return True
+
+    def _send_encoded(self, encoded, n_traces, computed_stats):
+        """Send encoded traces to the agent.
+
+        :param computed_stats: Whether the stats of the traces were computed by the tracer.
+        :returns: Whether a payload was sent.
+        """
+        extra_headers = None
+        if computed_stats:
+            with self._stats_lock:
+                dropped_traces, self._dropped_p0_traces = self._dropped_p0_traces, 0
+                dropped_spans, self._dropped_p0_spans = self._dropped_p0_spans, 0
+            extra_headers = {
+                "Datadog-Client-Computed-Stats": "yes",
+                "Datadog-Client-Dropped-P0-Traces": str(dropped_traces),
+                "Datadog-Client-Dropped-P0-Spans": str(dropped_spans),
+            }
+
+        try:
+            sent = self._send_payload(encoded, n_traces, extra_headers)
+        except (httplib.HTTPException, OSError, IOError):
+            log.error("failed to send traces to Datadog Agent at %s", self.agent_url, exc_info=True)
+            self._metrics_dist("http.errors", tags=["type:err"])
+            self._metrics_dist("http.dropped.bytes", len(encoded))
+            self._metrics_dist("http.dropped.traces", n_traces)
+            sent = False
+
+        if computed_stats and not sent:
+            # Report the dropped traces with the next payload instead
+            with self._stats_lock:
+                self._dropped_p0_traces += dropped_traces
+                self._dropped_p0_spans += dropped_spans
+
+        if self._report_metrics:
+            # Note that we cannot use the batching functionality of dogstatsd because
+            # it's not thread-safe.
+            # https://github.com/DataDog/datadogpy/issues/439
+            # This really isn't ideal as now we're going to do a ton of socket calls.
+            self.dogstatsd.increment("datadog.tracer.http.requests")
+            self.dogstatsd.distribution("datadog.tracer.http.sent.bytes", len(encoded))
+            self.dogstatsd.distribution("datadog.tracer.http.sent.traces", n_traces)
+        return sent
+
+    def _put_stats(self, buckets):
+        """Send stats to the agent.
+
+        :returns: The response of the agent.
+        """
+        payload = Packer().pack(self._stats.payload(buckets, env=ddtrace.config.env, version=ddtrace.config.version))
+        return self._connection.request("PUT", STATS_ENDPOINT, payload, self._headers)
+
+    def _check_stats_endpoint(self):
+        """Check whether the agent accepts the stats computed by the tracer.
+
+        Once it does, the traces written so far are sent without stats, and the
+        stats of the traces written next are computed by the tracer.
+
+        :returns: Whether a payload of traces was flushed, even if it could not be sent.
+        """
+        try:
+            response = self._put_stats([])
+        except (httplib.HTTPException, OSError, IOError):
+            log.debug("failed to check the stats endpoint of Datadog Agent at %s", self.agent_url, exc_info=True)
+            return False
+
+        if response.status in (404, 415):
+            log.warning(
+                "Datadog Agent at %s does not support stats computed by the tracer, sending all the traces",
+                self.agent_url,
+            )
+            with self._stats_lock:
+                self._stats_supported = False
+            return False
+        if response.status >= 400:
+            # Try again on the next flush
+            return False
+
+        with self._stats_lock:
+            if self._deferred_encoding:
+                for spans in self._pending.get():
+                    self._encode(spans)
+            encoded, n_traces = self._encoder.flush()
+            self._stats_supported = True
+        if not n_traces:
+            return False
+        self._send_encoded(encoded, n_traces, computed_stats=False)
+        return True
+
+    def _flush_stats(self, now_ns=None):
+        """Send the aggregated stats to the agent.
+
+        :param now_ns: Only send the stats of the time buckets that ended before
+            this time, in nanoseconds since the epoch. All the stats are sent if
+            ``None``.
+        """
+        buckets = self._stats.flush(now_ns)
+        if not buckets:
+            return
+
+        try:
+            response = self._put_stats(buckets)
+        except (httplib.HTTPException, OSError, IOError):
+            log.error("failed to send stats to Datadog Agent at %s", self.agent_url, exc_info=True)
+            return
+
+        if response.status >= 400:
+            log.error(
+                "failed to send stats to Datadog Agent at %s: HTTP error status %s, reason %s",
+                self.agent_url,
+                response.status,
+                response.reason,
+            )
+
+    def _release_encoded_traces(self):
+        encoded_traces, self._encoded_traces = self._encoded_traces, []
+        self._encoded_spans = 0
+        while encoded_traces:
+            span_pool.release(encoded_traces.pop())
 
     def flush_queue(self):
-        enc_traces = self._buffer.get()
-        if enc_traces:
-            encoded = self._encoder.join_encoded(enc_traces)
-            try:
-                self._send_payload(encoded, len(enc_traces))
-            except (httplib.HTTPException, OSError, IOError):
-                log.error("failed to send traces to Datadog Agent at %s", self.agent_url, exc_info=True)
-                self._metrics_dist("http.errors", tags=["type:err"])
-                self._metrics_dist("http.dropped.bytes", len(encoded))
-                self._metrics_dist("http.dropped.traces", len(enc_traces))
-
-            if self._report_metrics:
-                # Note that we cannot use the batching functionality of dogstatsd because
-                # it's not thread-safe.
-                # https://github.com/DataDog/datadogpy/issues/439
-                # This really isn't ideal as now we're going to do a ton of socket calls.
-                self.dogstatsd.increment("datadog.tracer.http.requests")
-                self.dogstatsd.distribution("datadog.tracer.http.sent.bytes", len(encoded))
-                self.dogstatsd.distribution("datadog.tracer.http.sent.traces", len(enc_traces))
-                for name, metric in self._metrics.items():
-                    self.dogstatsd.distribution("datadog.tracer.%s" % name, metric["count"], tags=metric["tags"])
+        flushed = False
+
+        if self._stats_supported is None:
+            flushed = self._check_stats_endpoint()
+
+        if self._deferred_encoding:
+            for spans in self._pending.get():
+                # The pending traces are bounded by an estimate of their encoded size:
+                # send what is encoded so far rather than dropping traces if it was off.
+                if self._encoder.size >= self._flush_size:
+                    flushed = self._flush_encoded() or flushed
+                self._encode(spans)
+
+        flushed = self._flush_encoded() or flushed
+
+        if self._stats_supported:
+            self._flush_stats(compat.time_ns())
+
+        if self._encoded_traces:
+            self._release_encoded_traces()
+
+        if flushed and self._report_metrics:
+            for name, metric in self._metrics.items():
+                self.dogstatsd.distribution("datadog.tracer.%s" % name, metric["count"], tags=metric["tags"])
 
         self._set_drop_rate()
 
@@ -344,4 +649,10 @@ class AgentWriter(_worker.PeriodicWorkerThread):
     def run_periodic(self):
         self.flush_queue()
 
-    on_shutdown = run_periodic
+    def on_shutdown(self):
+        try:
+            self.flush_queue()
+            if self._stats_supported:
+                self._flush_stats()
+        finally:
+            self._connection.close()
@@ -33,3 +33,96 @@ cpdef pyframe_to_frames(frame, max_nframes):
             frames.append((code.co_filename, frame.f_lineno, code.co_name))
         frame = frame.f_back
     return frames, nframes
+
+
+cdef class FramesCache(object):
+    """Cache of the serialized frames of the stacks sampled by a collector.
+
+    The frames are interned by code object and last executed instruction, so that a frame is only serialized, and its
+    line number computed, the first time it is seen. The last stack serialized for each key, e.g. a thread id, is
+    kept: when the frame chain sampled again is unchanged, the previous list of frames is returned as is.
+
+    The returned lists of frames are shared and must not be modified.
+
+    :param max_codes: The maximum number of code objects to keep frames for. The cache of frames is cleared once full.
+    """
+
+    cdef public int max_codes
+    # id(code object) -> (code object, {f_lasti: (filename, lineno, function_name)})
+    # Code objects are compared by identity: equal code objects can have different file or function names. The code
+    # object is kept so that its id is not reused.
+    cdef dict _frames
+    # key -> (max_nframes, code objects, f_lasti, frames, nframes)
+    cdef dict _stacks
+
+    def __init__(self, max_codes=4096):
+        self.max_codes = max_codes
+        self._frames = {}
+        self._stacks = {}
+
+    def __len__(self):
+        return len(self._frames)
+
+    cdef _intern_frame(self, frame, code, lasti):
+        code_id = id(code)
+        entry = self._frames.get(code_id)
+        if entry is None:
+            if len(self._frames) >= self.max_codes:
+                self._frames.clear()
+            lines = {}
+            self._frames[code_id] = (code, lines)
+        else:
+            lines = entry[1]
+        serialized = lines.get(lasti)
+        if serialized is None:
+            serialized = lines[lasti] = (code.co_filename, frame.f_lineno, code.co_name)
+        return serialized
+
+    cdef bint _is_unchanged(self, stack, frame, max_nframes):
+        cached_max_nframes, codes, lastis, frames, nframes = stack
+        if cached_max_nframes != max_nframes:
+            return False
+        cdef Py_ssize_t ncodes = len(codes)
+        cdef Py_ssize_t i = 0
+        while frame is not None:
+            if i < ncodes and (frame.f_code is not codes[i] or frame.f_lasti != lastis[i]):
+                return False
+            i += 1
+            frame = frame.f_back
+        return i == nframes
+
+    cpdef pyframe_to_frames(self, key, frame, max_nframes):
+        """Convert a Python frame to a list of frames, reusing the previous result for ``key`` if it is unchanged.
+
+        :param key: The key of the stack, e.g. the id of the sampled thread.
+        :param frame: The frame object to serialize.
+        :param max_nframes: The maximum number of frames to return.
+        :return: The serialized frames and the number of frames present in the original traceback."""
+        stack = self._stacks.get(key)
+        if stack is not None and self._is_unchanged(stack, frame, max_nframes):
+            return stack[3], stack[4]
+
+        codes = []
+        lastis = []
+        frames = []
+        nframes = 0
+        while frame is not None:
+            nframes += 1
+            if len(frames) < max_nframes:
+                code = frame.f_code
+                lasti = frame.f_lasti
+                codes.append(code)
+                lastis.append(lasti)
+                frames.append(self._intern_frame(frame, code, lasti))
+            frame = frame.f_back
+        self._stacks[key] = (max_nframes, codes, lastis, frames, nframes)
+        return frames, nframes
+
+    def clear_stacks(self, existing_keys):
+        """Forget the stacks whose key is not part of ``existing_keys``.
+
+        :param existing_keys: A set of keys to keep.
+        """
+        for key in list(self._stacks):
+            if key not in existing_keys:
+                del self._stacks[key]
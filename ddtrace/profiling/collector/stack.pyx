@@ -159,6 +159,69 @@ class StackSampleEvent(event.StackBasedEvent):
     cpu_time_ns = attr.ib(default=0)
 
 
+@attr.s(slots=True)
+class StackSampleAggregate(object):
+    """Aggregate of `StackSampleEvent`, usable as the container of these events in a `Recorder`.
+
+    Each event is added to the counters of its thread, trace, span and stack, so that the memory used depends on the
+    number of distinct stacks rather than on the number of samples. Stacks are interned and referenced by their id,
+    which is their index in `stacks`.
+    """
+
+    maxlen = attr.ib(default=None)
+    """The maximum number of counters. Events that would need a new counter once it is reached are dropped."""
+
+    stacks = attr.ib(init=False, factory=list)
+    """The interned stacks, as tuples of frames."""
+
+    samples = attr.ib(init=False, factory=dict)
+    """A dict of {(thread id, thread native id, thread name, trace id, span id, stack id, nframes):
+    [number of samples, cpu time, wall time]}."""
+
+    nevents = attr.ib(init=False, default=0)
+    """The number of events added."""
+
+    sampling_period_sum = attr.ib(init=False, default=0)
+    """The sum of the sampling period of the events added."""
+
+    _stack_ids = attr.ib(init=False, factory=dict, repr=False)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def extend(self, events):
+        """Add events to the aggregate."""
+        for event in events:
+            frames = tuple(event.frames)
+            stack_id = self._stack_ids.get(frames)
+            if stack_id is None:
+                if self.maxlen is not None and len(self.samples) >= self.maxlen:
+                    continue
+                stack_id = self._stack_ids[frames] = len(self.stacks)
+                self.stacks.append(frames)
+
+            # If multiple traces were active, we pick only one, as the pprof exporter does
+            key = (
+                event.thread_id,
+                event.thread_native_id,
+                event.thread_name,
+                min(event.trace_ids) if event.trace_ids else None,
+                min(event.span_ids) if event.span_ids else None,
+                stack_id,
+                event.nframes,
+            )
+            counters = self.samples.get(key)
+            if counters is None:
+                if self.maxlen is not None and len(self.samples) >= self.maxlen:
+                    continue
+                counters = self.samples[key] = [0, 0, 0]
+            counters[0] += 1
+            counters[1] += event.cpu_time_ns
+            counters[2] += event.wall_time_ns
+            self.nevents += 1
+            self.sampling_period_sum += event.sampling_period
+
+
 @event.event_class
 class StackExceptionSampleEvent(event.StackBasedEvent):
     """A a sample storing raised exceptions and their stack frames."""
@@ -313,7 +376,7 @@ cdef collect_threads(thread_id_ignore_list, thread_time, thread_span_links) with
 
 
 
-cdef stack_collect(ignore_profiler, thread_time, max_nframes, interval, wall_time, thread_span_links):
+cdef stack_collect(ignore_profiler, thread_time, max_nframes, interval, wall_time, thread_span_links, frames_cache):
 
     if ignore_profiler:
         # Do not use `threading.enumerate` to not mess with locking (gevent!)
@@ -329,6 +392,8 @@ cdef stack_collect(ignore_profiler, thread_time, max_nframes, interval, wall_tim
         # FIXME also use native thread id
         thread_span_links.clear_threads(tuple(thread[0] for thread in running_threads))
 
+    frames_cache.clear_stacks({thread[0] for thread in running_threads})
+
     stack_events = []
     exc_events = []
 
@@ -341,7 +406,7 @@ cdef stack_collect(ignore_profiler, thread_time, max_nframes, interval, wall_tim
         if task_id in thread_id_ignore_list:
             continue
 
-        frames, nframes = _traceback.pyframe_to_frames(frame, max_nframes)
+        frames, nframes = frames_cache.pyframe_to_frames(thread_id, frame, max_nframes)
 
         stack_events.append(
             StackSampleEvent(
@@ -468,6 +533,7 @@ class StackCollector(collector.PeriodicCollector):
     _thread_time = attr.ib(init=False, repr=False, eq=False)
     _last_wall_time = attr.ib(init=False, repr=False, eq=False)
     _thread_span_links = attr.ib(default=None, init=False, repr=False, eq=False)
+    _frames_cache = attr.ib(init=False, repr=False, eq=False)
 
     @max_time_usage_pct.validator
     def _check_max_time_usage(self, attribute, value):
@@ -477,6 +543,7 @@ class StackCollector(collector.PeriodicCollector):
     def _init(self):
         self._thread_time = _ThreadTime()
         self._last_wall_time = compat.monotonic_ns()
+        self._frames_cache = _traceback.FramesCache()
         if self.tracer is not None:
             self._thread_span_links = _ThreadSpanLinks()
             self.tracer.on_start_span(self._thread_span_links.link_span)
@@ -503,6 +570,7 @@ class StackCollector(collector.PeriodicCollector):
 
         all_events = stack_collect(
             self.ignore_profiler, self._thread_time, self.nframes, self.interval, wall_time, self._thread_span_links,
+            self._frames_cache,
         )
 
         used_wall_time_ns = compat.monotonic_ns() - now
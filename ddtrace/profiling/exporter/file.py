@@ -22,7 +22,7 @@ class PprofFileExporter(pprof.PprofExporter):
         :param start_time_ns: The start time of recording.
         :param end_time_ns: The end time of recording.
         """
-        profile = super(PprofFileExporter, self).export(events, start_time_ns, end_time_ns)
+        profile = self._export_serialized(events, start_time_ns, end_time_ns)
         with gzip.open(self.prefix + (".%d.%d" % (os.getpid(), self._increment)), "wb") as f:
-            f.write(profile.SerializeToString())
+            f.write(profile)
         self._increment += 1
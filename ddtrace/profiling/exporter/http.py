@@ -146,10 +146,10 @@ class PprofHTTPExporter(pprof.PprofExporter):
         if self._container_info and self._container_info.container_id:
             headers["Datadog-Container-Id"] = self._container_info.container_id
 
-        profile = super(PprofHTTPExporter, self).export(events, start_time_ns, end_time_ns)
+        profile = self._export_serialized(events, start_time_ns, end_time_ns)
         s = six.BytesIO()
         with gzip.GzipFile(fileobj=s, mode="wb") as gz:
-            gz.write(profile.SerializeToString())
+            gz.write(profile)
         fields = {
             "runtime-id": runtime.get_runtime_id().encode("ascii"),
             "recording-start": (
@@ -164,7 +164,7 @@ class PprofHTTPExporter(pprof.PprofExporter):
             "chunk-data": s.getvalue(),
         }
 
-        service = self.service or os.path.basename(profile.string_table[profile.mapping[0].filename])
+        service = self.service or os.path.basename(str(self._get_program_name()))
 
         content_type, body = self._encode_multipart_formdata(
             fields,
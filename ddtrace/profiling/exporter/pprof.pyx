@@ -21,40 +21,25 @@ from ddtrace.vendor import six
 
 
 _ITEMGETTER_ZERO = operator.itemgetter(0)
-_ITEMGETTER_ONE = operator.itemgetter(1)
-_ATTRGETTER_ID = operator.attrgetter("id")
-
-
-@attr.s
-class _Sequence(object):
-    start_at = attr.ib(default=1)
-    next_id = attr.ib(init=False, default=None)
-
-    def __attrs_post_init__(self):
-        self.next_id = self.start_at
-
-    def generate(self):
-        """Generate a new unique id and return it."""
-        generated_id = self.next_id
-        self.next_id += 1
-        return generated_id
 
 
 @attr.s
 class _StringTable(object):
-    _strings = attr.ib(init=False, factory=lambda: {"": 0})
-    _seq_id = attr.ib(init=False, factory=_Sequence)
+    """Table of the strings of a profile, where the id of a string is its index in the table."""
+
+    _strings = attr.ib(init=False, factory=lambda: [""])
+    _ids = attr.ib(init=False, factory=lambda: {"": 0})
 
     def to_id(self, string):
         try:
-            return self._strings[string]
+            return self._ids[string]
         except KeyError:
-            generated_id = self._strings[string] = self._seq_id.generate()
+            generated_id = self._ids[string] = len(self._strings)
+            self._strings.append(string)
             return generated_id
 
     def __iter__(self):
-        for string, _ in sorted(self._strings.items(), key=_ITEMGETTER_ONE):
-            yield string
+        return iter(self._strings)
 
     def __len__(self):
         return len(self._strings)
@@ -64,13 +49,15 @@ class _StringTable(object):
 class _PprofConverter(object):
     """Convert stacks generated by a Profiler to pprof format."""
 
-    # Those attributes will be serialize in a `pprof_pb2.Profile`
-    _functions = attr.ib(init=False, factory=dict)
-    _locations = attr.ib(init=False, factory=dict)
+    # Those attributes will be serialize in a `pprof_pb2.Profile`.
+    # Functions and locations are stored as tuples in lists where the id of an entry is its index + 1, as 0 is not a
+    # valid id in pprof: `pprof_pb2.Function` and `pprof_pb2.Location` objects are only built with the profile.
+    _functions = attr.ib(init=False, factory=list)
+    _locations = attr.ib(init=False, factory=list)
     _string_table = attr.ib(init=False, factory=_StringTable)
 
-    _last_location_id = attr.ib(init=False, factory=_Sequence)
-    _last_func_id = attr.ib(init=False, factory=_Sequence)
+    _function_ids = attr.ib(init=False, factory=dict, repr=False)
+    _location_ids = attr.ib(init=False, factory=dict, repr=False)
 
     # A dict where key is a (Location, [Labels]) and value is a a dict.
     # This dict has sample-type (e.g. "cpu-time") as key and the numeric value.
@@ -78,55 +65,64 @@ class _PprofConverter(object):
         factory=lambda: collections.defaultdict(lambda: collections.defaultdict(lambda: 0)), init=False, repr=False
     )
 
-    def _to_Function(self, filename, funcname):
+    def _to_function_id(self, filename, funcname):
+        key = (filename, funcname)
         try:
-            return self._functions[(filename, funcname)]
+            return self._function_ids[key]
         except KeyError:
-            func = pprof_pb2.Function(
-                id=self._last_func_id.generate(),
-                name=self._str(funcname),
-                filename=self._str(filename),
-            )
-            self._functions[(filename, funcname)] = func
-            return func
+            # (name, filename)
+            self._functions.append((self._str(funcname), self._str(filename)))
+            function_id = self._function_ids[key] = len(self._functions)
+            return function_id
 
-    def _to_Location(self, filename, lineno, funcname=None):
+    def _to_location_id(self, filename, lineno, funcname=None):
+        key = (filename, lineno, funcname)
         try:
-            return self._locations[(filename, lineno, funcname)]
+            return self._location_ids[key]
         except KeyError:
             if funcname is None:
                 real_funcname = _line2def.filename_and_lineno_to_def(filename, lineno)
             else:
                 real_funcname = funcname
-            location = pprof_pb2.Location(
-                id=self._last_location_id.generate(),
-                line=[
-                    pprof_pb2.Line(
-                        function_id=self._to_Function(filename, real_funcname).id,
-                        line=lineno,
-                    ),
-                ],
-            )
-            self._locations[(filename, lineno, funcname)] = location
-            return location
+            # (function_id, line)
+            self._locations.append((self._to_function_id(filename, real_funcname), lineno))
+            location_id = self._location_ids[key] = len(self._locations)
+            return location_id
 
     def _str(self, string):
         """Convert a string to an id from the string table."""
         return self._string_table.to_id(str(string))
 
     def _to_locations(self, frames, nframes):
-        locations = [self._to_Location(filename, lineno, funcname).id for filename, lineno, funcname in frames]
+        locations = [self._to_location_id(filename, lineno, funcname) for filename, lineno, funcname in frames]
 
         omitted = nframes - len(frames)
         if omitted:
             locations.append(
-                self._to_Location("", 0, "<%d frame%s omitted>" % (omitted, ("s" if omitted > 1 else ""))).id
+                self._to_location_id("", 0, "<%d frame%s omitted>" % (omitted, ("s" if omitted > 1 else "")))
             )
 
         return tuple(locations)
 
     def convert_stack_event(
         self, thread_id, thread_native_id, thread_name, trace_id, span_id, frames, nframes, samples
+    ):
+        self.convert_stack_samples(
+            thread_id,
+            thread_native_id,
+            thread_name,
+            trace_id,
+            span_id,
+            frames,
+            nframes,
+            len(samples),
+            sum(s.cpu_time_ns for s in samples),
+            sum(s.wall_time_ns for s in samples),
+        )
+
+    def convert_stack_samples(
+        self, thread_id, thread_native_id, thread_name, trace_id, span_id, frames, nframes, nsamples, cpu_time_ns,
+        wall_time_ns
     ):
         location_key = (
             self._to_locations(frames, nframes),
@@ -139,9 +135,9 @@ class _PprofConverter(object):
             ),
         )
 
-        self._location_values[location_key]["cpu-samples"] = len(samples)
-        self._location_values[location_key]["cpu-time"] = sum(s.cpu_time_ns for s in samples)
-        self._location_values[location_key]["wall-time"] = sum(s.wall_time_ns for s in samples)
+        self._location_values[location_key]["cpu-samples"] = nsamples
+        self._location_values[location_key]["cpu-time"] = cpu_time_ns
+        self._location_values[location_key]["wall-time"] = wall_time_ns
 
     def convert_memalloc_event(self, thread_id, thread_native_id, thread_name, frames, nframes, events):
         location_key = (
@@ -230,52 +226,189 @@ class _PprofConverter(object):
         self._location_values[location_key]["exception-samples"] = len(events)
 
     def convert_memory_event(self, stats, sampling_ratio):
-        location = tuple(self._to_Location(frame.filename, frame.lineno).id for frame in reversed(stats.traceback))
+        location = tuple(self._to_location_id(frame.filename, frame.lineno) for frame in reversed(stats.traceback))
         location_key = (location, tuple())
         self._location_values[location_key]["alloc-samples"] = int(stats.count / sampling_ratio)
         self._location_values[location_key]["alloc-space"] = int(stats.size / sampling_ratio)
 
-    def _build_profile(self, start_time_ns, duration_ns, period, sample_types, program_name):
-        pprof_sample_type = [
-            pprof_pb2.ValueType(type=self._str(type_), unit=self._str(unit)) for type_, unit in sample_types
-        ]
+    def _profile_string_ids(self, sample_types, program_name):
+        """Convert the strings of the samples and of the profile metadata to ids from the string table.
 
-        sample = [
-            pprof_pb2.Sample(
-                location_id=locations,
-                value=[values.get(sample_type_name, 0) for sample_type_name, unit in sample_types],
-                label=[pprof_pb2.Label(key=self._str(key), str=self._str(s)) for key, s in labels],
+        :return: A tuple of the sample types as ``(type, unit)`` ids, the samples as ``(location_ids, values, labels)``
+            where labels are ``(key, str)`` ids, the period type as ``(type, unit)`` ids and the program name id.
+        """
+        sample_type_ids = [(self._str(type_), self._str(unit)) for type_, unit in sample_types]
+
+        samples = [
+            (
+                locations,
+                [values.get(sample_type_name, 0) for sample_type_name, unit in sample_types],
+                [(self._str(key), self._str(s)) for key, s in labels],
             )
             for (locations, labels), values in sorted(six.iteritems(self._location_values), key=_ITEMGETTER_ZERO)
         ]
 
-        period_type = pprof_pb2.ValueType(type=self._str("time"), unit=self._str("nanoseconds"))
+        period_type_ids = (self._str("time"), self._str("nanoseconds"))
+
+        return sample_type_ids, samples, period_type_ids, self._str(program_name)
 
-        # WARNING: no code should use _str() here as once the _string_table is serialized below,
+    def _build_profile(self, start_time_ns, duration_ns, period, sample_types, program_name):
+        # WARNING: no code should use _str() after this call as the _string_table is serialized below,
         # it won't be updated if you call _str later in the code here
+        sample_type_ids, samples, period_type_ids, program_name_id = self._profile_string_ids(
+            sample_types, program_name
+        )
+
         return pprof_pb2.Profile(
-            sample_type=pprof_sample_type,
-            sample=sample,
+            sample_type=[pprof_pb2.ValueType(type=type_, unit=unit) for type_, unit in sample_type_ids],
+            sample=[
+                pprof_pb2.Sample(
+                    location_id=locations,
+                    value=values,
+                    label=[pprof_pb2.Label(key=key, str=s) for key, s in labels],
+                )
+                for locations, values, labels in samples
+            ],
             mapping=[
                 pprof_pb2.Mapping(
                     id=1,
-                    filename=self._str(program_name),
+                    filename=program_name_id,
                 ),
             ],
-            # Sort location and function by id so the output is reproducible
-            location=sorted(self._locations.values(), key=_ATTRGETTER_ID),
-            function=sorted(self._functions.values(), key=_ATTRGETTER_ID),
+            location=[
+                pprof_pb2.Location(id=location_id, line=[pprof_pb2.Line(function_id=function_id, line=lineno)])
+                for location_id, (function_id, lineno) in enumerate(self._locations, 1)
+            ],
+            function=[
+                pprof_pb2.Function(id=function_id, name=name, filename=filename)
+                for function_id, (name, filename) in enumerate(self._functions, 1)
+            ],
             string_table=list(self._string_table),
             time_nanos=start_time_ns,
             duration_nanos=duration_ns,
             period=period,
-            period_type=period_type,
+            period_type=pprof_pb2.ValueType(type=period_type_ids[0], unit=period_type_ids[1]),
         )
 
+    def _serialize_profile(self, start_time_ns, duration_ns, period, sample_types, program_name):
+        """Serialize the profile that `_build_profile` returns without building the `pprof_pb2` objects.
+
+        :return: The protobuf encoding of the `pprof_pb2.Profile`.
+        """
+        sample_type_ids, samples, period_type_ids, program_name_id = self._profile_string_ids(
+            sample_types, program_name
+        )
+
+        cdef bytearray buf = bytearray()
+        cdef bytearray msg = bytearray()
+        cdef bytearray packed = bytearray()
+
+        for type_, unit in sample_type_ids:
+            _encode_value_type(buf, 1, type_, unit, msg)
+
+        for locations, values, labels in samples:
+            del msg[:]
+            _encode_packed(msg, 1, locations, packed)
+            _encode_packed(msg, 2, values, packed)
+            for key, s in labels:
+                del packed[:]
+                _encode_int(packed, 1, key)
+                _encode_int(packed, 2, s)
+                _encode_bytes(msg, 3, packed)
+            _encode_bytes(buf, 2, msg)
+
+        del msg[:]
+        _encode_int(msg, 1, 1)
+        _encode_int(msg, 5, program_name_id)
+        _encode_bytes(buf, 3, msg)
+
+        for location_id, (function_id, lineno) in enumerate(self._locations, 1):
+            del msg[:]
+            _encode_int(msg, 1, location_id)
+            del packed[:]
+            _encode_int(packed, 1, function_id)
+            _encode_int(packed, 2, lineno)
+            _encode_bytes(msg, 4, packed)
+            _encode_bytes(buf, 4, msg)
+
+        for function_id, (name, filename) in enumerate(self._functions, 1):
+            del msg[:]
+            _encode_int(msg, 1, function_id)
+            _encode_int(msg, 2, name)
+            _encode_int(msg, 4, filename)
+            _encode_bytes(buf, 5, msg)
+
+        for string in self._string_table:
+            if isinstance(string, six.text_type):
+                string = string.encode("utf-8")
+            _encode_bytes(buf, 6, string)
+
+        _encode_int(buf, 9, start_time_ns)
+        _encode_int(buf, 10, duration_ns)
+        _encode_value_type(buf, 11, period_type_ids[0], period_type_ids[1], msg)
+        if period is not None:
+            _encode_int(buf, 12, period)
+
+        return bytes(buf)
+
+
+# Minimal protobuf encoding of the pprof messages, following the field order and the omission of default values of
+# the protobuf serialization so that the output is identical.
+cdef inline void _encode_varint(bytearray buf, unsigned long long value) except *:
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+cdef inline void _encode_int(bytearray buf, int field, long long value) except *:
+    if value:
+        # Wire type 0: varint
+        _encode_varint(buf, field << 3)
+        _encode_varint(buf, <unsigned long long>value)
+
+
+cdef inline void _encode_bytes(bytearray buf, int field, value) except *:
+    # Wire type 2: length-delimited
+    _encode_varint(buf, (field << 3) | 2)
+    _encode_varint(buf, len(value))
+    buf.extend(value)
+
+
+cdef inline void _encode_packed(bytearray buf, int field, values, bytearray packed) except *:
+    if values:
+        del packed[:]
+        for value in values:
+            _encode_varint(packed, <unsigned long long><long long>value)
+        _encode_bytes(buf, field, packed)
+
+
+cdef inline void _encode_value_type(
+    bytearray buf, int field, long long type_, long long unit, bytearray msg
+) except *:
+    del msg[:]
+    _encode_int(msg, 1, type_)
+    _encode_int(msg, 2, unit)
+    _encode_bytes(buf, field, msg)
+
 
 class PprofExporter(exporter.Exporter):
     """Export recorder events to pprof format."""
 
+    _SAMPLE_TYPES = (
+        ("cpu-samples", "count"),
+        ("cpu-time", "nanoseconds"),
+        ("wall-time", "nanoseconds"),
+        ("exception-samples", "count"),
+        ("lock-acquire", "count"),
+        ("lock-acquire-wait", "nanoseconds"),
+        ("lock-release", "count"),
+        ("lock-release-hold", "nanoseconds"),
+        ("alloc-samples", "count"),
+        ("alloc-space", "bytes"),
+        ("heap-space", "bytes"),
+    )
+
     @staticmethod
     def _get_program_name(default="-"):
         try:
@@ -401,35 +534,50 @@ class PprofExporter(exporter.Exporter):
             return a
         return max(a, b)
 
-    def export(self, events, start_time_ns, end_time_ns):
-        """Convert events to pprof format.
+    def _convert(self, events):
+        """Convert events to a `_PprofConverter`.
 
         :param events: The event dictionary from a `ddtrace.profiling.recorder.Recorder`.
-        :param start_time_ns: The start time of recording.
-        :param end_time_ns: The end time of recording.
-        :return: A protobuf Profile object.
+        :return: The converter and the average sampling period of the stack events.
         """
-        program_name = self._get_program_name()
-
         sum_period = 0
         nb_event = 0
 
         converter = _PprofConverter()
 
         # Handle StackSampleEvent
-        stack_events = []
-        for event in events.get(stack.StackSampleEvent, []):
-            stack_events.append(event)
-            sum_period += event.sampling_period
-            nb_event += 1
+        stack_events = events.get(stack.StackSampleEvent, [])
+        if isinstance(stack_events, stack.StackSampleAggregate):
+            sum_period += stack_events.sampling_period_sum
+            nb_event += stack_events.nevents
+            for (
+                (thread_id, thread_native_id, thread_name, trace_id, span_id, stack_id, nframes),
+                (nsamples, cpu_time_ns, wall_time_ns),
+            ) in six.iteritems(stack_events.samples):
+                converter.convert_stack_samples(
+                    thread_id,
+                    thread_native_id,
+                    self._get_thread_name(thread_id, thread_name),
+                    "" if trace_id is None else str(trace_id),
+                    "" if span_id is None else str(span_id),
+                    stack_events.stacks[stack_id],
+                    nframes,
+                    nsamples,
+                    cpu_time_ns,
+                    wall_time_ns,
+                )
+        else:
+            for event in stack_events:
+                sum_period += event.sampling_period
+                nb_event += 1
 
-        for (
-            (thread_id, thread_native_id, thread_name, trace_id, span_id, frames, nframes),
-            stack_events,
-        ) in self._group_stack_events(stack_events):
-            converter.convert_stack_event(
-                thread_id, thread_native_id, thread_name, trace_id, span_id, frames, nframes, list(stack_events)
-            )
+            for (
+                (thread_id, thread_native_id, thread_name, trace_id, span_id, frames, nframes),
+                grouped_events,
+            ) in self._group_stack_events(stack_events):
+                converter.convert_stack_event(
+                    thread_id, thread_native_id, thread_name, trace_id, span_id, frames, nframes, list(grouped_events)
+                )
 
         # Handle Lock events
         for event_class, convert_fn in (
@@ -522,26 +670,40 @@ class PprofExporter(exporter.Exporter):
         else:
             period = None
 
-        duration_ns = end_time_ns - start_time_ns
-
-        sample_types = (
-            ("cpu-samples", "count"),
-            ("cpu-time", "nanoseconds"),
-            ("wall-time", "nanoseconds"),
-            ("exception-samples", "count"),
-            ("lock-acquire", "count"),
-            ("lock-acquire-wait", "nanoseconds"),
-            ("lock-release", "count"),
-            ("lock-release-hold", "nanoseconds"),
-            ("alloc-samples", "count"),
-            ("alloc-space", "bytes"),
-            ("heap-space", "bytes"),
-        )
+        return converter, period
 
+    def export(self, events, start_time_ns, end_time_ns):
+        """Convert events to pprof format.
+
+        :param events: The event dictionary from a `ddtrace.profiling.recorder.Recorder`.
+        :param start_time_ns: The start time of recording.
+        :param end_time_ns: The end time of recording.
+        :return: A protobuf Profile object.
+        """
+        converter, period = self._convert(events)
         return converter._build_profile(
             start_time_ns=start_time_ns,
-            duration_ns=duration_ns,
+            duration_ns=end_time_ns - start_time_ns,
+            period=period,
+            sample_types=self._SAMPLE_TYPES,
+            program_name=self._get_program_name(),
+        )
+
+    def _export_serialized(self, events, start_time_ns, end_time_ns):
+        """Convert events to pprof format and serialize the profile.
+
+        This is the same as serializing the profile returned by `export` without building the protobuf objects.
+
+        :param events: The event dictionary from a `ddtrace.profiling.recorder.Recorder`.
+        :param start_time_ns: The start time of recording.
+        :param end_time_ns: The end time of recording.
+        :return: The serialized protobuf Profile.
+        """
+        converter, period = self._convert(events)
+        return converter._serialize_profile(
+            start_time_ns=start_time_ns,
+            duration_ns=end_time_ns - start_time_ns,
             period=period,
-            sample_types=sample_types,
-            program_name=program_name,
+            sample_types=self._SAMPLE_TYPES,
+            program_name=self._get_program_name(),
         )
@@ -262,6 +262,11 @@ class _ProfilerInstance(_service.Service):
                 memalloc.MemoryHeapSampleEvent: None,
             },
             default_max_events=int(os.environ.get("DD_PROFILING_MAX_EVENTS", recorder.Recorder._DEFAULT_MAX_EVENTS)),
+            aggregators=(
+                {stack.StackSampleEvent: stack.StackSampleAggregate}
+                if formats.asbool(os.environ.get("DD_PROFILING_AGGREGATE_STACK_SAMPLES", "false"))
+                else {}
+            ),
         )
 
         if formats.asbool(os.environ.get("DD_PROFILING_MEMALLOC", "true")):
@@ -31,6 +31,13 @@ class Recorder(object):
     max_events = attr.ib(factory=dict)
     """A dict of {event_type_class: max events} to limit the number of events to record."""
 
+    aggregators = attr.ib(factory=dict)
+    """A dict of {event_type_class: aggregator class} to aggregate events instead of storing them.
+
+    An aggregator is instantiated with the maximum number of events as `maxlen` argument and events are added with its
+    `extend` method.
+    """
+
     events = attr.ib(init=False, repr=False, eq=False)
     _events_lock = attr.ib(init=False, repr=False, factory=_nogevent.DoubleLock, eq=False)
     _pid = attr.ib(init=False, repr=False, factory=os.getpid)
@@ -64,7 +71,8 @@ class Recorder(object):
                 q.extend(events)
 
     def _get_deque_for_event_type(self, event_type):
-        return collections.deque(maxlen=self.max_events.get(event_type, self.default_max_events))
+        container_class = self.aggregators.get(event_type, collections.deque)
+        return container_class(maxlen=self.max_events.get(event_type, self.default_max_events))
 
     def _reset_events(self):
         self.events = _defaultdictkey(self._get_deque_for_event_type)
@@ -28,6 +28,75 @@ POSSIBLE_HTTP_HEADER_ORIGIN = frozenset(
     [HTTP_HEADER_ORIGIN, get_wsgi_header(HTTP_HEADER_ORIGIN)]
 )
 
+_TRACE_ID = 0
+_PARENT_ID = 1
+_SAMPLING_PRIORITY = 2
+_ORIGIN = 3
+
+_HEADER_FIELDS = (
+    (HTTP_HEADER_TRACE_ID, _TRACE_ID),
+    (HTTP_HEADER_PARENT_ID, _PARENT_ID),
+    (HTTP_HEADER_SAMPLING_PRIORITY, _SAMPLING_PRIORITY),
+    (HTTP_HEADER_ORIGIN, _ORIGIN),
+)
+
+# Field of the lowercased names of the headers
+_LOWER_HEADER_FIELDS = {}
+for _header, _field in _HEADER_FIELDS:
+    _LOWER_HEADER_FIELDS[_header] = _field
+    _LOWER_HEADER_FIELDS[get_wsgi_header(_header).lower()] = _field
+
+# Field of the common spellings of the headers, to avoid lowercasing them
+_HEADER_FIELDS_BY_NAME = dict(_LOWER_HEADER_FIELDS)
+for _header, _field in _HEADER_FIELDS:
+    _HEADER_FIELDS_BY_NAME[_header.title()] = _field
+    _HEADER_FIELDS_BY_NAME[_header.upper()] = _field
+    _HEADER_FIELDS_BY_NAME[get_wsgi_header(_header)] = _field
+
+# Field of the headers as found in ASGI scopes, where names are lowercased byte strings
+_ASGI_HEADER_FIELDS = dict((_header.encode('ascii'), _field) for _header, _field in _HEADER_FIELDS)
+
+# Name of the headers as found in WSGI environs, e.g. Django's request.META, where names are uppercased
+_WSGI_HEADER_FIELDS = tuple((get_wsgi_header(_header), _field) for _header, _field in _HEADER_FIELDS)
+
+# First characters of the header names, to skip the other headers without lowercasing them
+_HEADER_FIRST_CHARS = frozenset('xXhH')
+
+
+def _extract_header_values(headers):
+    """Return the values of the distributed tracing headers as a list indexed by field.
+
+    The headers are scanned once. The header names are matched case-insensitively,
+    with either their HTTP or their WSGI spelling. The first matching header wins.
+    """
+    values = [None, None, None, None]
+
+    if isinstance(headers, (list, tuple)):
+        # ASGI headers: a sequence of (name, value) byte string pairs with lowercased names
+        for name, value in headers:
+            field = _ASGI_HEADER_FIELDS.get(name)
+            if field is not None and values[field] is None:
+                values[field] = value.decode('latin-1')
+        return values
+
+    if isinstance(headers, dict) and 'REQUEST_METHOD' in headers:
+        # WSGI environ: HTTP headers names are always uppercased and prefixed
+        for name, field in _WSGI_HEADER_FIELDS:
+            values[field] = headers.get(name)
+        return values
+
+    for name, value in headers.items():
+        field = _HEADER_FIELDS_BY_NAME.get(name)
+        if field is None:
+            if name[:1] not in _HEADER_FIRST_CHARS:
+                continue
+            field = _LOWER_HEADER_FIELDS.get(name.lower())
+            if field is None:
+                continue
+        if values[field] is None:
+            values[field] = value
+    return values
+
 
 class HTTPPropagator(object):
     """A HTTP Propagator using HTTP headers as carrier."""
@@ -114,35 +183,38 @@ class HTTPPropagator(object):
                 with tracer.trace('my_controller') as span:
                     span.set_meta('http.url', url)
 
-        :param dict headers: HTTP headers to extract tracing attributes.
+        :param headers: HTTP headers to extract tracing attributes: a mapping of
+            header names to values, a WSGI environ or a list of ``(name, value)``
+            byte string pairs as found in ASGI scopes.
         :return: New `Context` with propagated attributes.
         """
         if not headers:
             return Context()
 
+        values = None
         try:
-            trace_id = HTTPPropagator.extract_trace_id(headers)
-            parent_span_id = HTTPPropagator.extract_parent_span_id(headers)
-            sampling_priority = HTTPPropagator.extract_sampling_priority(headers)
-            origin = HTTPPropagator.extract_origin(headers)
+            values = _extract_header_values(headers)
+            trace_id, parent_span_id, sampling_priority, origin = values
 
             if sampling_priority is not None:
                 sampling_priority = int(sampling_priority)
 
             return Context(
-                trace_id=trace_id,
-                span_id=parent_span_id,
+                trace_id=int(trace_id) if trace_id is not None else 0,
+                span_id=int(parent_span_id) if parent_span_id is not None else 0,
                 sampling_priority=sampling_priority,
                 dd_origin=origin,
             )
         # If headers are invalid and cannot be parsed, return a new context and log the issue.
         except Exception:
+            if values is None:
+                values = [None, None, None, None]
             log.debug(
                 'invalid x-datadog-* headers, trace-id: %s, parent-id: %s, priority: %s, origin: %s',
-                headers.get(HTTP_HEADER_TRACE_ID, 0),
-                headers.get(HTTP_HEADER_PARENT_ID, 0),
-                headers.get(HTTP_HEADER_SAMPLING_PRIORITY),
-                headers.get(HTTP_HEADER_ORIGIN, ''),
+                values[_TRACE_ID] or 0,
+                values[_PARENT_ID] or 0,
+                values[_SAMPLING_PRIORITY],
+                values[_ORIGIN] or '',
                 exc_info=True,
             )
             return Context()
@@ -7,6 +7,9 @@ from .context import Context
 
 
 _DD_CONTEXTVAR = contextvars.ContextVar("datadog_contextvar", default=None)
+# Propagation handle of the parent execution, which the Context of the current
+# execution is only created from when it is needed
+_DD_PARENT_CONTEXTVAR = contextvars.ContextVar("datadog_parent_contextvar", default=None)
 
 
 class BaseContextProvider(six.with_metaclass(abc.ABCMeta)):
@@ -31,6 +34,15 @@ class BaseContextProvider(six.with_metaclass(abc.ABCMeta)):
     def active(self):
         pass
 
+    def _activate_parent(self, handle):
+        """Continue the trace of a parent execution in the current execution.
+
+        :param handle: The propagation handle of the ``Context`` of the parent
+            execution, see ``Context._propagation_handle()``, or ``None`` to
+            start a new trace.
+        """
+        self.activate(Context._from_propagation_handle(handle) if handle is not None else None)
+
     def __call__(self, *args, **kwargs):
         """Method available for backward-compatibility. It proxies the call to
         ``self.active()`` and must not do anything more.
@@ -56,13 +68,24 @@ class DefaultContextProvider(BaseContextProvider):
         :rtype: bool
         """
         ctx = _DD_CONTEXTVAR.get()
-        return ctx is not None
+        return ctx is not None or _DD_PARENT_CONTEXTVAR.get() is not None
 
     def activate(self, ctx):
         """Makes the given ``context`` active, so that the provider calls
         the thread-local storage implementation.
         """
         _DD_CONTEXTVAR.set(ctx)
+        if _DD_PARENT_CONTEXTVAR.get() is not None:
+            _DD_PARENT_CONTEXTVAR.set(None)
+
+    def _activate_parent(self, handle):
+        """Continue the trace of a parent execution in the current execution.
+
+        The ``Context`` is only created from the handle if it is needed, e.g.
+        when a span is started.
+        """
+        _DD_CONTEXTVAR.set(None)
+        _DD_PARENT_CONTEXTVAR.set(handle)
 
     def active(self):
         """Returns the current active ``Context`` for this tracer. Returned
@@ -71,7 +94,8 @@ class DefaultContextProvider(BaseContextProvider):
         """
         ctx = _DD_CONTEXTVAR.get()
         if not ctx:
-            ctx = Context()
+            handle = _DD_PARENT_CONTEXTVAR.get()
+            ctx = Context() if handle is None else Context._from_propagation_handle(handle)
             self.activate(ctx)
 
         return ctx
@@ -3,6 +3,7 @@
 Any `sampled = False` trace won't be written, and can be ignored by the instrumentation.
 """
 import abc
+import operator
 
 from .compat import iteritems
 from .compat import pattern_type
@@ -12,6 +13,7 @@ from .constants import SAMPLING_LIMIT_DECISION
 from .constants import SAMPLING_RULE_DECISION
 from .ext.priority import AUTO_KEEP
 from .ext.priority import AUTO_REJECT
+from .internal.cache import LRUCache
 from .internal.logger import get_logger
 from .internal.rate_limiter import RateLimiter
 from .utils.formats import get_env
@@ -25,6 +27,9 @@ MAX_TRACE_ID = 2 ** 64
 # Has to be the same factor and key as the Agent to allow chained sampling
 KNUTH_FACTOR = 1111111111111111111
 
+# Maximum number of (service, name) pairs for which the matching sampling rule is cached
+RULE_CACHE_SIZE = 1024
+
 
 class BaseSampler(six.with_metaclass(abc.ABCMeta)):
     @abc.abstractmethod
@@ -116,7 +121,7 @@ RateByServiceSampler._default_key = RateByServiceSampler._key()
 
 
 class DatadogSampler(BaseSampler, BasePrioritySampler):
-    __slots__ = ("default_sampler", "limiter", "rules")
+    __slots__ = ("default_sampler", "limiter", "_rules", "_rule_matcher")
 
     NO_RATE_LIMIT = -1
     DEFAULT_RATE_LIMIT = 100
@@ -168,6 +173,20 @@ class DatadogSampler(BaseSampler, BasePrioritySampler):
         if default_sample_rate is not None:
             self.default_sampler = SamplingRule(sample_rate=default_sample_rate)
 
+    @property
+    def rules(self):
+        """The sampling rules, from the most specific to the least specific.
+
+        The rules are compiled when set and recompiled when the list is found
+        to have changed when sampling.
+        """
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules):
+        self._rules = rules
+        self._rule_matcher = _SamplingRuleMatcher(rules)
+
     def update_rate_by_service_sample_rates(self, sample_rates):
         # Pass through the call to our RateByServiceSampler
         if isinstance(self.default_sampler, RateByServiceSampler):
@@ -189,15 +208,16 @@ class DatadogSampler(BaseSampler, BasePrioritySampler):
         :returns: Whether the span was sampled or not
         :rtype: :obj:`bool`
         """
-        # If there are rules defined, then iterate through them and find one that wants to sample
-        matching_rule = None
-        # Go through all rules and grab the first one that matched
+        rules = self._rules
+        rule_matcher = self._rule_matcher
+        if len(rules) != len(rule_matcher.rules) or any(map(operator.is_not, rules, rule_matcher.rules)):
+            # The list of rules was changed in place
+            rule_matcher = self._rule_matcher = _SamplingRuleMatcher(rules)
+
+        # Grab the first rule that matches
         # DEV: This means rules should be ordered by the user from most specific to least specific
-        for rule in self.rules:
-            if rule.matches(span):
-                matching_rule = rule
-                break
-        else:
+        matching_rule = rule_matcher.match(span)
+        if matching_rule is None:
             # If this is the old sampler, sample and return
             if isinstance(self.default_sampler, RateByServiceSampler):
                 if self.default_sampler.sample(span):
@@ -363,3 +383,97 @@ class SamplingRule(BaseSampler):
         )
 
     __str__ = __repr__
+
+
+def _is_exact_pattern(pattern):
+    if pattern is SamplingRule.NO_RULE:
+        return True
+    if callable(pattern) or isinstance(pattern, pattern_type):
+        return False
+    try:
+        hash(pattern)
+    except TypeError:
+        return False
+    return True
+
+
+class _SamplingRuleMatcher(object):
+    """Find the first of a list of :class:`SamplingRule` matching a span.
+
+    The rules matching the service and name of spans by equality are indexed by
+    the values they match, so that they are found with a few dictionary lookups
+    whatever their number. The other rules are evaluated in order, up to the
+    first indexed rule matching the span.
+
+    The rule matching a (service, name) pair is cached unless a rule whose
+    result may not only depend on them, i.e. a rule with a function pattern or
+    a subclass of :class:`SamplingRule`, had to be evaluated.
+    """
+
+    __slots__ = ("rules", "_exact", "_others", "_cache")
+
+    # Cached value for the pairs that no rule matches
+    _NO_MATCH = object()
+
+    def __init__(self, rules, cache_size=RULE_CACHE_SIZE):
+        # Copied so that the indexes cannot be invalidated by changes to the list
+        self.rules = tuple(rules)
+        # (index, rule) of the first exact rule for each (service, name) pattern pair
+        self._exact = {}
+        # (index, rule, cacheable) of the rules to evaluate
+        self._others = []
+        for i, rule in enumerate(self.rules):
+            if type(rule) is SamplingRule and _is_exact_pattern(rule.service) and _is_exact_pattern(rule.name):
+                self._exact.setdefault((rule.service, rule.name), (i, rule))
+            else:
+                cacheable = type(rule) is SamplingRule and not (callable(rule.service) or callable(rule.name))
+                self._others.append((i, rule, cacheable))
+        self._cache = LRUCache(cache_size)
+
+    def _match_exact(self, service, name):
+        exact = self._exact
+        first = None
+        for key in (
+            (service, name),
+            (service, SamplingRule.NO_RULE),
+            (SamplingRule.NO_RULE, name),
+            (SamplingRule.NO_RULE, SamplingRule.NO_RULE),
+        ):
+            indexed = exact.get(key)
+            if indexed is not None and (first is None or indexed[0] < first[0]):
+                first = indexed
+        return first
+
+    def match(self, span):
+        """Return the first rule matching the span, or ``None`` if no rule matches."""
+        if not self.rules:
+            return None
+
+        key = (span.service, span.name)
+        try:
+            cached = self._cache.get(key)
+        except TypeError:
+            # Unhashable service or name: evaluate all the rules
+            for rule in self.rules:
+                if rule.matches(span):
+                    return rule
+            return None
+
+        if cached is not None:
+            return None if cached is self._NO_MATCH else cached
+
+        first = self._match_exact(*key)
+        cacheable = True
+        for i, rule, rule_cacheable in self._others:
+            if first is not None and i > first[0]:
+                break
+            cacheable = cacheable and rule_cacheable
+            if rule.matches(span):
+                first = (i, rule)
+                break
+
+        matching_rule = None if first is None else first[1]
+        if cacheable:
+            self._cache.set(key, self._NO_MATCH if matching_rule is None else matching_rule)
+
+        return matching_rule
@@ -79,6 +79,8 @@ class Config(object):
 
         self.health_metrics_enabled = asbool(get_env("trace", "health_metrics_enabled", default=False))
 
+        self.sql_normalization_enabled = asbool(get_env("trace", "sql_normalization_enabled", default=False))
+
     def __getattr__(self, name):
         if name not in self._config:
             self._config[name] = IntegrationConfig(self, name)
@@ -147,6 +149,16 @@ class Config(object):
         """
         return self.http.header_is_traced(header_name)
 
+    def _header_tag_names(self, header_name):
+        """
+        Returns the tag names of a traced header, keyed by ``request`` and ``response``.
+        :param header_name: the header name
+        :type header_name: str
+        :return: the tag names, or None if the header is not traced
+        :rtype: dict
+        """
+        return self.http._header_tag_names(header_name)
+
     def _get_service(self, default=None):
         """
         Returns the globally configured service.
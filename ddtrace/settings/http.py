@@ -1,9 +1,18 @@
+from ..http.headers import REQUEST
+from ..http.headers import RESPONSE
+from ..http.headers import _normalize_tag_name
+from ..internal.cache import LRUCache
 from ..internal.logger import get_logger
 from ..utils.http import normalize_header_name
 
 
 log = get_logger(__name__)
 
+# Maximum number of header names for which the tracing decision is cached
+HEADER_TAGS_CACHE_SIZE = 512
+
+_NOT_CACHED = object()
+
 
 class HttpConfig(object):
     """
@@ -13,6 +22,8 @@ class HttpConfig(object):
 
     def __init__(self):
         self._whitelist_headers = set()
+        # Tag names of the header names, or None for the headers which are not traced
+        self._header_tags = LRUCache(HEADER_TAGS_CACHE_SIZE)
         self.trace_query_string = None
 
     @property
@@ -37,6 +48,7 @@ class HttpConfig(object):
                 continue
             self._whitelist_headers.add(normalized_header_name)
 
+        self._header_tags.clear()
         return self
 
     def header_is_traced(self, header_name):
@@ -46,9 +58,27 @@ class HttpConfig(object):
         :type header_name: str
         :rtype: bool
         """
-        normalized_header_name = normalize_header_name(header_name)
-        log.debug("Checking header '%s' tracing in whitelist %s", normalized_header_name, self._whitelist_headers)
-        return normalized_header_name in self._whitelist_headers
+        return self._header_tag_names(header_name) is not None
+
+    def _header_tag_names(self, header_name):
+        """
+        Returns the tag names of a traced header, keyed by ``request`` and ``response``.
+        :param header_name: the header name
+        :type header_name: str
+        :return: the tag names, or None if the header is not traced
+        :rtype: dict
+        """
+        tag_names = self._header_tags.get(header_name, _NOT_CACHED)
+        if tag_names is _NOT_CACHED:
+            if normalize_header_name(header_name) in self._whitelist_headers:
+                tag_names = {
+                    REQUEST: _normalize_tag_name(REQUEST, header_name),
+                    RESPONSE: _normalize_tag_name(RESPONSE, header_name),
+                }
+            else:
+                tag_names = None
+            self._header_tags.set(header_name, tag_names)
+        return tag_names
 
     def __repr__(self):
         return "<{} traced_headers={} trace_query_string={}>".format(
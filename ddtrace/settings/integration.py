@@ -93,6 +93,20 @@ class IntegrationConfig(AttrDict):
             else self.global_config.header_is_traced(header_name)
         )
 
+    def _header_tag_names(self, header_name):
+        """
+        Returns the tag names of a traced header, keyed by ``request`` and ``response``.
+        :param header_name: the header name
+        :type header_name: str
+        :return: the tag names, or None if the header is not traced
+        :rtype: dict
+        """
+        return (
+            self.http._header_tag_names(header_name)
+            if self.http.is_header_tracing_configured
+            else self.global_config._header_tag_names(header_name)
+        )
+
     def _is_analytics_enabled(self, use_global_config):
         # DEV: analytics flag can be None which should not be taken as
         # enabled when global flag is disabled
@@ -1,9 +1,11 @@
 import functools
 import json
 import logging
+import os
 from os import environ
 from os import getpid
 import sys
+import weakref
 
 from ddtrace.vendor import debtcollector
 
@@ -21,12 +23,14 @@ from .ext.priority import AUTO_REJECT
 from .internal import _rand
 from .internal import agent
 from .internal import debug
+from .internal import forksafe
 from .internal import hostname
 from .internal.logger import get_logger
 from .internal.logger import hasHandlers
 from .internal.runtime import RuntimeTags
 from .internal.runtime import RuntimeWorker
 from .internal.runtime import get_runtime_id
+from .internal.span_pool import span_pool
 from .internal.writer import AgentWriter
 from .internal.writer import LogWriter
 from .provider import DefaultContextProvider
@@ -80,6 +84,20 @@ def _parse_dogstatsd_url(url):
 
 _INTERNAL_APPLICATION_SPAN_TYPES = ["custom", "template", "web", "worker"]
 
+# With fork hooks, the tracers are flagged when the process forks rather than
+# comparing the current pid for every span
+_FORK_HOOKS = hasattr(os, "register_at_fork")
+
+_tracers = weakref.WeakSet()
+
+
+def _flag_forked_tracers():
+    for tracer in list(_tracers):
+        tracer._forked = True
+
+
+forksafe.register(_flag_forked_tracers)
+
 
 class Tracer(object):
     """
@@ -147,6 +165,9 @@ class Tracer(object):
         # Runtime id used for associating data collected during runtime to
         # traces
         self._pid = getpid()
+        # Whether the process forked since the tracer last checked
+        self._forked = False
+        _tracers.add(self)
 
         self.enabled = asbool(get_env("trace", "enabled", default=True))
 
@@ -428,9 +449,11 @@ class Tracer(object):
 
         mapped_service = config.service_mapping.get(service, service)
 
+        new_span = span_pool.acquire if span_pool.max_size else Span
+
         if trace_id:
             # child_of a non-empty context, so either a local child span or from a remote context
-            span = Span(
+            span = new_span(
                 self,
                 name,
                 trace_id=trace_id,
@@ -448,7 +471,7 @@ class Tracer(object):
 
         else:
             # this is the root span of a new trace
-            span = Span(
+            span = new_span(
                 self,
                 name,
                 service=mapped_service,
@@ -541,9 +564,15 @@ class Tracer(object):
         """Checks if the tracer is in a new process (was forked) and performs
         the necessary updates if it is a new process
         """
-        pid = getpid()
-        if self._pid == pid:
-            return
+        if _FORK_HOOKS:
+            if not self._forked:
+                return
+            self._forked = False
+            pid = getpid()
+        else:
+            pid = getpid()
+            if self._pid == pid:
+                return
 
         self._pid = pid
 
@@ -644,6 +673,84 @@ class Tracer(object):
             span_type=span_type,
         )
 
+    def create_child_spans(self, parent, records):
+        """
+        Create finished children of an unfinished span in a single call.
+
+        This is meant for tight loops creating many short child spans, e.g. one
+        per record of a batch, whose timing is known. The spans are added to the
+        trace of ``parent`` without being activated and ``start_span`` hooks are
+        not called for them.
+
+        :param ddtrace.Span parent: the parent of the spans.
+        :param records: an iterable of ``(name, resource, start_ns, duration_ns, tags)``
+            tuples, where ``start_ns`` is the start time of the span as a Unix
+            epoch in nanoseconds and ``tags`` a dict of tags to set on the span
+            or ``None``.
+        :returns: the list of the created spans.
+        :raises ValueError: if ``parent`` is finished or is not part of a trace.
+
+        Usage::
+
+            with tracer.trace("batch.process") as parent:
+                records = []
+                for item in batch:
+                    start_ns = time.time_ns()
+                    process(item)
+                    records.append(("item.process", item.kind, start_ns, time.time_ns() - start_ns, None))
+                tracer.create_child_spans(parent, records)
+        """
+        if parent.finished:
+            raise ValueError("cannot create children of a finished span")
+        context = parent.context
+        if context is None:
+            raise ValueError("cannot create children of a span that is not part of a trace")
+
+        self._check_new_process()
+
+        new_span = span_pool.acquire if span_pool.max_size else Span
+        service = parent.service
+        trace_id = parent.trace_id
+        parent_id = parent.span_id
+        sampled = parent.sampled
+        global_tags = self.tags
+        env = config.env
+        # Set the version tag as for the spans created with start_span
+        version = None
+        if config.version:
+            root_span = context.get_current_root_span()
+            if root_span and root_span.service == service and VERSION_KEY in root_span.meta:
+                version = config.version
+
+        spans = []
+        for name, resource, start_ns, duration_ns, tags in records:
+            span = new_span(
+                self,
+                name,
+                trace_id=trace_id,
+                parent_id=parent_id,
+                service=service,
+                resource=resource,
+                context=context,
+                _check_pid=False,
+            )
+            span.sampled = sampled
+            span._parent = parent
+            span.start_ns = start_ns
+            span.duration_ns = duration_ns
+            if global_tags:
+                span.set_tags(global_tags)
+            if env:
+                span._set_str_tag(ENV_KEY, env)
+            if version:
+                span._set_str_tag(VERSION_KEY, version)
+            if tags:
+                span.set_tags(tags)
+            spans.append(span)
+
+        context._add_finished_spans(spans)
+        return spans
+
     def current_root_span(self):
         """Returns the root span of the current context.
 
@@ -81,6 +81,7 @@ def override_global_config(values):
         "analytics_enabled",
         "report_hostname",
         "health_metrics_enabled",
+        "sql_normalization_enabled",
         "env",
         "version",
         "service",
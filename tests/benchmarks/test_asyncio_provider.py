@@ -0,0 +1,46 @@
+import asyncio
+import sys
+
+import pytest
+
+from ddtrace import Tracer
+from ddtrace.contrib.asyncio.provider import AsyncioContextProvider
+from ddtrace.contrib.asyncio.provider import AsyncioContextVarsProvider
+from tests import DummyWriter
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="asyncio copies the context variables since Python 3.7")
+@pytest.mark.parametrize(
+    "provider",
+    [
+        pytest.param(
+            AsyncioContextProvider,
+            marks=pytest.mark.skipif(
+                not hasattr(asyncio.Task, "current_task"), reason="Task.current_task was removed in Python 3.9"
+            ),
+        ),
+        AsyncioContextVarsProvider,
+    ],
+)
+def test_tracer_trace_in_loop(benchmark, loop, provider):
+    tracer = Tracer()
+    tracer.writer = DummyWriter()
+    tracer.configure(context_provider=provider())
+
+    def func():
+        with tracer.trace("parent"):
+            with tracer.trace("child"):
+                pass
+
+    async def run():
+        # Benchmark from a running task
+        benchmark(func)
+
+    loop.run_until_complete(run())
@@ -4,6 +4,8 @@ import pytest
 
 from ddtrace.encoding import MsgpackEncoder
 from ddtrace.encoding import _EncoderBase
+from ddtrace.internal._encoding import BufferedEncoder
+from ddtrace.internal._encoding import Packer as CPacker
 from tests.tracer.test_encoders import RefMsgpackEncoder
 from tests.tracer.test_encoders import gen_trace
 
@@ -62,6 +64,13 @@ def test_encode_1000_span_trace_custom(benchmark):
     benchmark(trace_encoder.encode_trace, trace_large)
 
 
+@pytest.mark.benchmark(group="encoding", min_time=0.005)
+def test_encode_1000_span_trace_custom_to_dict(benchmark):
+    # Reference for the direct span encoding: normalize spans with to_dict()
+    # first and pack the resulting dictionaries.
+    benchmark(lambda trace: CPacker().pack([span.to_dict() for span in trace]), trace_large)
+
+
 @pytest.mark.benchmark(group="encoding.small", min_time=0.005)
 def test_encode_trace_small_custom(benchmark):
     benchmark(trace_encoder.encode_trace, trace_small)
@@ -77,3 +86,21 @@ def test_join_encoded_custom(benchmark):
     benchmark(
         trace_encoder.join_encoded, [trace_encoder.encode_trace(trace_large), trace_encoder.encode_trace(trace_small)]
     )
+
+
+def _put_and_flush(encoder, traces):
+    for trace in traces:
+        encoder.put(trace)
+    return encoder.flush()
+
+
+@pytest.mark.benchmark(group="encoding.payload", min_time=0.005)
+def test_encode_payload_join_encoded(benchmark):
+    traces = [trace_small for _ in range(50)]
+    benchmark(lambda: trace_encoder.join_encoded([trace_encoder.encode_trace(trace) for trace in traces]))
+
+
+@pytest.mark.benchmark(group="encoding.payload", min_time=0.005)
+def test_encode_payload_buffered(benchmark):
+    encoder = BufferedEncoder(max_size=8 << 20, max_item_size=8 << 20)
+    benchmark(_put_and_flush, encoder, [trace_small for _ in range(50)])
@@ -0,0 +1,37 @@
+import pytest
+
+from ddtrace import Tracer
+from tests import DummyWriter
+
+
+gevent = pytest.importorskip("gevent")
+
+
+@pytest.fixture
+def tracer():
+    from ddtrace.contrib.gevent import patch
+    from ddtrace.contrib.gevent import unpatch
+    from ddtrace.contrib.gevent.provider import GeventContextProvider
+
+    patch()
+    tracer = Tracer()
+    tracer.writer = DummyWriter()
+    tracer.configure(context_provider=GeventContextProvider())
+    yield tracer
+    unpatch()
+
+
+@pytest.mark.parametrize("traced", [False, True])
+def test_spawn_greenlets(benchmark, tracer, traced):
+    # Spawn 10k concurrent greenlets from a traced greenlet, only some of them tracing
+    def greenlet(i):
+        if traced and i % 100 == 0:
+            with tracer.trace("greenlet"):
+                pass
+
+    def func():
+        with tracer.trace("parent"):
+            gevent.joinall([gevent.spawn(greenlet, i) for i in range(10000)])
+        tracer.writer.pop()
+
+    benchmark(func)
@@ -0,0 +1,26 @@
+import re
+
+import pytest
+
+from ddtrace.sampler import DatadogSampler
+from ddtrace.sampler import SamplingRule
+from ddtrace.span import Span
+
+
+def _rules(n):
+    rules = []
+    for i in range(n):
+        if i % 2:
+            rules.append(SamplingRule(sample_rate=0.5, service="service-%d" % i, name="name-%d" % i))
+        else:
+            rules.append(SamplingRule(sample_rate=0.5, service=re.compile("^service-%d$" % i)))
+    return rules
+
+
+@pytest.mark.parametrize("n_rules", [1, 10, 50, 200])
+def test_sampler_rules(benchmark, n_rules):
+    sampler = DatadogSampler(rules=_rules(n_rules), default_sample_rate=0.5, rate_limit=DatadogSampler.NO_RATE_LIMIT)
+    # A span matching none of the rules
+    span = Span(tracer=None, name="web.request", service="web")
+
+    benchmark(sampler.sample, span)
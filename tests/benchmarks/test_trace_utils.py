@@ -0,0 +1,57 @@
+import pytest
+
+from ddtrace.contrib import trace_utils
+from ddtrace.settings import Config
+from ddtrace.span import Span
+
+
+REQUEST_HEADERS = {
+    "Host": "localhost:8080",
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:84.0) Gecko/20100101 Firefox/84.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "Cookie": "csrftoken=7m2hYTGvXqlWFPNsvqY8s2bDGu5TMrf5cXcAihbwZMT3ViEQXKP9H92kEsCLrH4o",
+}
+
+RESPONSE_HEADERS = {
+    "Content-Type": "text/html; charset=utf-8",
+    "Content-Length": "1024",
+    "X-Frame-Options": "DENY",
+}
+
+
+@pytest.mark.parametrize(
+    "status_code,request_headers,response_headers",
+    [
+        # Django: int status code and dicts of headers
+        (200, REQUEST_HEADERS, RESPONSE_HEADERS),
+        # Flask: int status code and lists of header pairs
+        (404, list(REQUEST_HEADERS.items()), list(RESPONSE_HEADERS.items())),
+        # ASGI: int status code and header pairs, no response headers
+        (500, list(REQUEST_HEADERS.items()), None),
+        # WSGI: status code parsed from the status line
+        ("200", REQUEST_HEADERS, list(RESPONSE_HEADERS.items())),
+    ],
+    ids=["django", "flask", "asgi", "wsgi"],
+)
+@pytest.mark.parametrize("traced_headers", [False, True])
+def test_set_http_meta(benchmark, status_code, request_headers, response_headers, traced_headers):
+    config = Config()
+    config._add("web", dict())
+    if traced_headers:
+        config.web.http.trace_headers(["User-Agent", "Content-Type"])
+    span = Span(tracer=None, name="web.request")
+
+    benchmark(
+        trace_utils.set_http_meta,
+        span,
+        config.web,
+        method="GET",
+        url="http://localhost:8080/users/",
+        status_code=status_code,
+        query="page=1",
+        request_headers=request_headers,
+        response_headers=response_headers,
+    )
@@ -90,3 +90,28 @@ def test_tracer_large_trace(benchmark, tracer):
 
 def test_tracer_start_span(benchmark, tracer):
     benchmark(tracer.start_span, "benchmark")
+
+
+def test_tracer_current_span(benchmark, tracer):
+    with tracer.trace("parent"):
+        benchmark(tracer.current_span)
+
+
+def test_tracer_create_child_spans(benchmark, tracer):
+    records = [("child", "resource", 1000 * i, 10, None) for i in range(100)]
+
+    def func(tracer):
+        with tracer.trace("parent") as parent:
+            tracer.create_child_spans(parent, records)
+
+    benchmark(func, tracer)
+
+
+def test_tracer_start_finish_child_spans(benchmark, tracer):
+    # The spans are added to and closed in the context of an unfinished trace
+    def func(tracer):
+        with tracer.trace("root"):
+            for _ in range(100):
+                tracer.trace("child").finish()
+
+    benchmark(func, tracer)
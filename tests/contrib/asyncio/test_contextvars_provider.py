@@ -0,0 +1,73 @@
+import asyncio
+import sys
+
+import pytest
+
+from ddtrace.contrib.asyncio.provider import AsyncioContextVarsProvider
+
+from .utils import AsyncioTestCase
+from .utils import mark_asyncio
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="asyncio copies the context variables since Python 3.7")
+class TestAsyncioContextVarsProvider(AsyncioTestCase):
+    """Ensure that the contextvars asyncio provider propagates the context between tasks"""
+
+    def setUp(self):
+        super(TestAsyncioContextVarsProvider, self).setUp()
+        self.tracer.configure(context_provider=AsyncioContextVarsProvider())
+
+    @mark_asyncio
+    def test_get_call_context_twice(self):
+        assert self.tracer.get_call_context() is self.tracer.get_call_context()
+
+    def test_context_task_none(self):
+        ctx = self.tracer.get_call_context()
+        assert ctx is not None
+        assert self.tracer.get_call_context() is ctx
+
+    @mark_asyncio
+    def test_child_task(self):
+        @asyncio.coroutine
+        def child():
+            with self.tracer.trace("child"):
+                return self.tracer.get_call_context()
+
+        with self.tracer.trace("parent") as parent:
+            child_ctx = yield from self.loop.create_task(child())
+
+        assert child_ctx is not self.tracer.get_call_context()
+
+        traces = self.tracer.writer.pop_traces()
+        assert len(traces) == 2
+        (child_span,), (parent_span,) = traces
+        assert parent_span is parent
+        assert child_span.name == "child"
+        assert child_span.trace_id == parent.trace_id
+        assert child_span.parent_id == parent.span_id
+
+    @mark_asyncio
+    def test_concurrent_tasks(self):
+        @asyncio.coroutine
+        def child(name):
+            with self.tracer.trace(name):
+                yield from asyncio.sleep(0.01)
+
+        with self.tracer.trace("parent") as parent:
+            yield from asyncio.gather(child("child_1"), child("child_2"))
+
+        traces = self.tracer.writer.pop_traces()
+        assert len(traces) == 3
+        spans = [span for trace in traces for span in trace]
+        children = [span for span in spans if span is not parent]
+        assert sorted(span.name for span in children) == ["child_1", "child_2"]
+        for span in children:
+            assert span.trace_id == parent.trace_id
+            assert span.parent_id == parent.span_id
+
+    @mark_asyncio
+    def test_activate(self):
+        ctx = self.tracer.get_call_context()
+        new_ctx = ctx.clone()
+        assert self.tracer.context_provider.activate(new_ctx) is new_ctx
+        assert self.tracer.get_call_context() is new_ctx
@@ -42,6 +42,22 @@ class TestTracedCursor(TracerTestCase):
         assert '__result__' == traced_cursor.executemany('__query__', 'arg_1', kwarg1='kwarg1')
         cursor.executemany.assert_called_once_with('__query__', 'arg_1', kwarg1='kwarg1')
 
+    def test_executemany_batch_size(self):
+        cursor = self.cursor
+        cursor.rowcount = 3
+
+        pin = Pin('pin_name', tracer=self.tracer)
+        traced_cursor = TracedCursor(cursor, pin, {})
+        traced_cursor.executemany('__query__', [(1,), (2,), (3,)])
+        span = self.tracer.writer.pop()[0]
+        assert span.get_tag('sql.executemany') == 'true'
+        assert span.get_metric('sql.executemany.size') == 3
+
+        # The size of iterators is unknown
+        traced_cursor.executemany('__query__', iter([(1,), (2,), (3,)]))
+        span = self.tracer.writer.pop()[0]
+        assert span.get_metric('sql.executemany.size') is None
+
     def test_fetchone_wrapped_is_called_and_returned(self):
         cursor = self.cursor
         cursor.rowcount = 0
@@ -188,6 +204,22 @@ class TestTracedCursor(TracerTestCase):
         assert span.get_metric('db.rowcount') == 123, 'Row count is set as a metric'
         assert span.get_metric('sql.rows') == 123, 'Row count is set as a tag (for legacy django cursor replacement)'
 
+    def test_sql_normalization(self):
+        cursor = self.cursor
+        tracer = self.tracer
+        cursor.rowcount = 0
+        pin = Pin('my_service', app='my_app', tracer=tracer)
+        traced_cursor = TracedCursor(cursor, pin, {})
+
+        with self.override_global_config(dict(sql_normalization_enabled=True)):
+            traced_cursor.execute("SELECT * FROM users WHERE id IN (1, 2, 3) AND name = 'foo'")
+        span = tracer.writer.pop()[0]  # type: Span
+        assert span.resource == 'SELECT * FROM users WHERE id IN (?) AND name = ?'
+
+        traced_cursor.execute("SELECT * FROM users WHERE id = 1")
+        span = tracer.writer.pop()[0]  # type: Span
+        assert span.resource == 'SELECT * FROM users WHERE id = 1', 'Queries are only normalized if enabled'
+
     def test_cfg_service(self):
         cursor = self.cursor
         tracer = self.tracer
@@ -3,6 +3,7 @@ import time
 
 from ddtrace.contrib.futures import patch
 from ddtrace.contrib.futures import unpatch
+from ddtrace.provider import _DD_CONTEXTVAR
 from tests.opentracer.utils import init_tracer
 
 from ... import TracerTestCase
@@ -69,6 +70,28 @@ class PropagationTestCase(TracerTestCase):
             (dict(name="executor.thread"),),
         )
 
+    def test_propagation_context_created_lazily(self):
+        # a context must only be created if the future's thread needs it
+        def fn():
+            return _DD_CONTEXTVAR.get()
+
+        with self.override_global_tracer():
+            with self.tracer.trace("main.thread"):
+                with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                    self.assertIsNone(executor.submit(fn).result())
+
+    def test_propagation_origin(self):
+        # the origin of the trace must be propagated
+        def fn():
+            with self.tracer.trace("executor.thread"):
+                return self.tracer.get_call_context().dd_origin
+
+        with self.override_global_tracer():
+            with self.tracer.trace("main.thread") as span:
+                span.context.dd_origin = "synthetics"
+                with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                    self.assertEqual(executor.submit(fn).result(), "synthetics")
+
     def test_disabled_instrumentation(self):
         # it must not propagate if the module is disabled
         unpatch()
@@ -10,6 +10,7 @@ from ddtrace.constants import SAMPLING_PRIORITY_KEY
 from ddtrace.context import Context
 from ddtrace.contrib.gevent import patch
 from ddtrace.contrib.gevent import unpatch
+from ddtrace.contrib.gevent.provider import CONTEXT_ATTR
 from ddtrace.ext.priority import USER_KEEP
 from tests import TracerTestCase
 from tests.opentracer.utils import init_tracer
@@ -123,6 +124,56 @@ class TestGeventTracer(TracerTestCase):
         assert "greenlet" == traces[0][0].name
         assert "base" == traces[0][0].resource
 
+    def test_greenlet_context_created_lazily(self):
+        # a greenlet that does not trace does not create a context
+        def greenlet():
+            return getattr(gevent.getcurrent(), CONTEXT_ATTR, None)
+
+        with self.tracer.trace("parent"):
+            assert gevent.spawn(greenlet).get() is None
+
+    def test_nested_greenlet_inherits_context(self):
+        # a greenlet spawned by a greenlet that did not trace inherits the
+        # context of its grandparent
+        def grandchild():
+            with self.tracer.trace("grandchild"):
+                pass
+
+        def child():
+            gevent.spawn(grandchild).join()
+
+        with self.tracer.trace("parent") as parent:
+            gevent.spawn(child).join()
+
+        traces = self.tracer.writer.pop_traces()
+        assert 2 == len(traces)
+        spans = [span for trace in traces for span in trace]
+        (grandchild_span,) = [span for span in spans if span.name == "grandchild"]
+        assert grandchild_span.trace_id == parent.trace_id
+        assert grandchild_span.parent_id == parent.span_id
+
+    def test_greenlet_inherits_context_after_parent_finished(self):
+        # a greenlet that traces after the trace of its parent is closed
+        # continues the trace of the parent as it was when it was spawned
+        def greenlet():
+            with self.tracer.trace("greenlet"):
+                pass
+
+        with self.tracer.trace("parent") as parent:
+            parent.context.sampling_priority = USER_KEEP
+            g = gevent.spawn(greenlet)
+        g.join()
+
+        traces = self.tracer.writer.pop_traces()
+        assert 2 == len(traces)
+        parent_span = traces[0][0]
+        greenlet_span = traces[1][0]
+        assert parent_span.name == "parent"
+        assert greenlet_span.name == "greenlet"
+        assert greenlet_span.trace_id == parent.trace_id
+        assert greenlet_span.parent_id == parent.span_id
+        assert greenlet_span.get_metric(SAMPLING_PRIORITY_KEY) == USER_KEEP
+
     def test_trace_sampling_priority_spawn_multiple_greenlets_multiple_traces(self):
         # multiple greenlets must be part of the same trace
         def entrypoint():
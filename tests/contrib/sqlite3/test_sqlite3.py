@@ -119,6 +119,90 @@ class TestSQLite(TracerTestCase):
             assert_is_not_measured(fetchall_span)
             self.assertIsNone(fetchall_span.get_tag("sql.query"))
 
+    def _encoded_traces(self):
+        """Record the traces as they are when written, as AgentWriter encodes them."""
+        traces = []
+        write = self.tracer.writer.write
+
+        def encoding_write(spans=None, services=None):
+            if spans:
+                traces.append([span.to_dict() for span in spans])
+            return write(spans=spans, services=services)
+
+        self.tracer.writer.write = encoding_write
+        return traces
+
+    def test_sqlite_fetch_methods_aggregated(self):
+        # The metrics are recorded on the query span until the trace of the parent span is written
+        with self.override_config("dbapi2", dict(trace_fetch_methods=True, aggregate_fetch_methods=True)):
+            connection = self._given_a_traced_connection(self.tracer)
+            connection.execute("create table if not exists fetched (id integer)")
+            connection.executemany("insert into fetched values (?)", [(i,) for i in range(5)])
+            self.reset()
+            traces = self._encoded_traces()
+
+            with self.tracer.trace("batch") as batch:
+                cursor = connection.execute("select * from fetched")
+                # The query span is finished and not active anymore
+                assert self.tracer.current_span() is batch
+                assert cursor.fetchone() == (0,)
+                assert cursor.fetchmany(2) == [(1,), (2,)]
+                with self.tracer.trace("process"):
+                    pass
+                assert cursor.fetchall() == [(3,), (4,)]
+                assert not traces
+
+            # Only the query is traced
+            ((batch_span, query_span, process_span),) = traces
+            assert batch_span["name"] == "batch"
+            assert query_span["name"] == "sqlite.query"
+            assert query_span["resource"] == "select * from fetched"
+            assert query_span["parent_id"] == batch_span["span_id"]
+            assert query_span["metrics"]["db.fetch.count"] == 3
+            assert query_span["metrics"]["db.fetch.rows"] == 5
+            assert query_span["metrics"]["db.fetch.duration_ns"] > 0
+            assert process_span["parent_id"] == batch_span["span_id"]
+
+    def test_sqlite_fetch_methods_aggregated_root_query(self):
+        # The fetches done once the query span was written are reported by a separate span
+        with self.override_config("dbapi2", dict(trace_fetch_methods=True, aggregate_fetch_methods=True)):
+            connection = self._given_a_traced_connection(self.tracer)
+            connection.execute("create table if not exists fetched (id integer)")
+            connection.executemany("insert into fetched values (?)", [(i,) for i in range(5)])
+            self.reset()
+            traces = self._encoded_traces()
+
+            cursor = connection.execute("select * from fetched")
+            ((query_span,),) = traces
+            assert query_span["name"] == "sqlite.query"
+            assert "db.fetch.count" not in query_span["metrics"]
+            del traces[:]
+
+            assert cursor.fetchone() == (0,)
+            assert cursor.fetchmany(3) == [(1,), (2,), (3,)]
+            assert not traces
+            # Less rows than requested: the results are exhausted
+            assert cursor.fetchmany(3) == [(4,)]
+            ((fetch_span,),) = traces
+            assert fetch_span["name"] == "sqlite.query.fetch"
+            assert fetch_span["resource"] == "select * from fetched"
+            assert fetch_span["trace_id"] == query_span["trace_id"]
+            assert fetch_span["parent_id"] == query_span["span_id"]
+            assert fetch_span["metrics"]["db.fetch.count"] == 3
+            assert fetch_span["metrics"]["db.fetch.rows"] == 5
+            assert fetch_span["metrics"]["_sampling_priority_v1"] == query_span["metrics"]["_sampling_priority_v1"]
+            del traces[:]
+
+            # The fetches end when another query is executed
+            cursor.execute("select * from fetched")
+            cursor.fetchone()
+            del traces[:]
+            cursor.execute("select * from fetched")
+            (fetch_trace, query_trace) = traces
+            assert [span["name"] for span in fetch_trace] == ["sqlite.query.fetch"]
+            assert fetch_trace[0]["metrics"]["db.fetch.count"] == 1
+            assert [span["name"] for span in query_trace] == ["sqlite.query"]
+
     def test_sqlite_fetchone_is_traced(self):
         q = "select * from sqlite_master"
 
@@ -13,7 +13,8 @@ def test_repr():
     test_collector._test_repr(
         collector_threading.LockCollector,
         "LockCollector(status=<ServiceStatus.STOPPED: 'stopped'>, "
-        "recorder=Recorder(default_max_events=32768, max_events={}), capture_pct=2.0, nframes=64, tracer=None)",
+        "recorder=Recorder(default_max_events=32768, max_events={}, aggregators={}), "
+        "capture_pct=2.0, nframes=64, tracer=None)",
     )
 
 
@@ -22,3 +22,83 @@ def test_check_traceback_to_frames():
             "test_check_traceback_to_frames",
         ),
     ]
+
+
+def _convert(cache, key, frame, max_nframes):
+    # All the conversions see the frames suspended in this call
+    return (
+        cache.pyframe_to_frames(key, frame, max_nframes),
+        cache.pyframe_to_frames(key, frame, max_nframes),
+        _traceback.pyframe_to_frames(frame, max_nframes),
+    )
+
+
+def test_frames_cache_pyframe_to_frames():
+    cache = _traceback.FramesCache()
+    frame = sys._getframe()
+    (frames, nframes), (same_frames, same_nframes), expected = _convert(cache, "key", frame, 10)
+    assert (frames, nframes) == expected
+    assert same_frames is frames
+    assert same_nframes == nframes
+
+    (truncated_frames, truncated_nframes), _, expected = _convert(cache, "key", frame, 1)
+    assert (truncated_frames, truncated_nframes) == expected
+    assert truncated_nframes == nframes
+
+
+def test_frames_cache_changed_stack():
+    cache = _traceback.FramesCache()
+    frames, nframes = cache.pyframe_to_frames("key", sys._getframe(), 10)
+    new_frames, new_nframes = cache.pyframe_to_frames("key", sys._getframe(), 10)
+    assert new_frames is not frames
+    assert new_frames[0][1] == frames[0][1] + 1
+    assert new_frames[1:] == frames[1:]
+    # The unchanged frames are interned
+    assert all(new is old for new, old in zip(new_frames[1:], frames[1:]))
+    assert new_nframes == nframes
+
+
+def test_frames_cache_max_codes():
+    cache = _traceback.FramesCache(max_codes=2)
+    frame = sys._getframe()
+    first, _, expected = _convert(cache, "key", frame, 2)
+    assert first == expected
+    assert len(cache) == 2
+    first, _, expected = _convert(cache, "key", frame, 3)
+    assert first == expected
+    assert len(cache) == 1
+
+
+def _convert_after_clear(cache, frame):
+    first = cache.pyframe_to_frames(1, frame, 10)[0]
+    second = cache.pyframe_to_frames(2, frame, 10)[0]
+    cache.clear_stacks({2})
+    return (
+        (first, cache.pyframe_to_frames(1, frame, 10)[0]),
+        (second, cache.pyframe_to_frames(2, frame, 10)[0]),
+    )
+
+
+def test_frames_cache_clear_stacks():
+    cache = _traceback.FramesCache()
+    (first, new_first), (second, new_second) = _convert_after_clear(cache, sys._getframe())
+    assert new_first is not first
+    assert new_first == first
+    assert new_second is second
+
+
+def _make_get(filename):
+    namespace = {}
+    exec(compile("import sys\ndef get():\n    return sys._getframe()\n", filename, "exec"), namespace)
+    return namespace["get"]
+
+
+def test_frames_cache_equal_codes():
+    # Identical functions from different files have equal code objects
+    get_a = _make_get("a.py")
+    get_b = _make_get("b.py")
+    assert get_a.__code__ == get_b.__code__
+
+    cache = _traceback.FramesCache()
+    assert cache.pyframe_to_frames("a", get_a(), 1)[0] == [("a.py", 3, "get")]
+    assert cache.pyframe_to_frames("b", get_b(), 1)[0] == [("b.py", 3, "get")]
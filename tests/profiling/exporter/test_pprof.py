@@ -651,15 +651,6 @@ TEST_EVENTS = {
 }
 
 
-def test_sequence():
-    s = pprof._Sequence()
-    assert s.start_at == 1
-    assert s.next_id == 1
-    assert s.generate() == 1
-    assert s.start_at == 1
-    assert s.next_id == 2
-
-
 def test_string_table():
     t = pprof._StringTable()
     assert len(t) == 1
@@ -672,6 +663,7 @@ def test_string_table():
     assert id2 == t.to_id("foobaz")
     assert len(t) == 3
     assert id1 != id2
+    assert list(t) == ["", "foobar", "foobaz"]
 
 
 def test_to_str_none():
@@ -695,6 +687,44 @@ def test_ppprof_exporter():
         assert f.read() == str(exports), filename
 
 
+@pytest.mark.parametrize("events", [TEST_EVENTS, {}])
+def test_ppprof_exporter_serialized(events):
+    exp = pprof.PprofExporter()
+    exp._get_program_name = mock.Mock()
+    exp._get_program_name.return_value = "bonjour"
+    assert exp._export_serialized(events, 1, 7) == exp.export(events, 1, 7).SerializeToString()
+
+
+def _samples(profile):
+    """Return the samples of a profile independently of the ids of its strings, locations and functions."""
+    functions = {f.id: (profile.string_table[f.filename], profile.string_table[f.name]) for f in profile.function}
+    locations = {
+        location.id: [(functions[line.function_id], line.line) for line in location.line]
+        for location in profile.location
+    }
+    return sorted(
+        (
+            [locations[location_id] for location_id in sample.location_id],
+            sorted((profile.string_table[label.key], profile.string_table[label.str]) for label in sample.label),
+            list(sample.value),
+        )
+        for sample in profile.sample
+    )
+
+
+def test_ppprof_exporter_stack_sample_aggregate():
+    aggregate = stack.StackSampleAggregate()
+    aggregate.extend(TEST_EVENTS[stack.StackSampleEvent])
+    events = {stack.StackSampleEvent: TEST_EVENTS[stack.StackSampleEvent]}
+    aggregated_events = {stack.StackSampleEvent: aggregate}
+
+    exp = pprof.PprofExporter()
+    profile = exp.export(events, 1, 7)
+    aggregated_profile = exp.export(aggregated_events, 1, 7)
+    assert aggregated_profile.period == profile.period
+    assert _samples(aggregated_profile) == _samples(profile)
+
+
 def test_pprof_exporter_empty():
     exp = pprof.PprofExporter()
     export = exp.export({}, 0, 1)
@@ -140,6 +140,13 @@ def test_env_api_key(name_var, monkeypatch):
     _check_url(prof, "https://intake.profile.datadoghq.com", "foobar", endpoint_path="/v1/input")
 
 
+def test_env_aggregate_stack_samples(monkeypatch):
+    assert profiler.Profiler()._profiler._recorder.aggregators == {}
+    monkeypatch.setenv("DD_PROFILING_AGGREGATE_STACK_SAMPLES", "true")
+    prof = profiler.Profiler()
+    assert prof._profiler._recorder.aggregators == {stack.StackSampleEvent: stack.StackSampleAggregate}
+
+
 def test_url():
     prof = profiler.Profiler(url="https://foobar:123")
     _check_url(prof, "https://foobar:123")
@@ -49,3 +49,52 @@ def test_limit():
     )
     assert r.events[stack.StackExceptionSampleEvent].maxlen == 12
     assert r.events[stack.StackSampleEvent].maxlen == 24
+
+
+def _stack_sample_event(frames, thread_id=1, trace_ids=None, cpu_time_ns=10, wall_time_ns=20):
+    return stack.StackSampleEvent(
+        thread_id=thread_id,
+        thread_native_id=thread_id,
+        thread_name="MainThread",
+        frames=frames,
+        nframes=len(frames),
+        trace_ids=trace_ids,
+        sampling_period=1000,
+        cpu_time_ns=cpu_time_ns,
+        wall_time_ns=wall_time_ns,
+    )
+
+
+def test_aggregators():
+    r = recorder.Recorder(
+        default_max_events=12,
+        aggregators={stack.StackSampleEvent: stack.StackSampleAggregate},
+    )
+    frames = [("foobar.py", 23, "func1"), ("foobar.py", 44, "func2")]
+    r.push_events([_stack_sample_event(frames), _stack_sample_event(list(frames), cpu_time_ns=5)])
+    r.push_event(_stack_sample_event(frames, thread_id=2, trace_ids={123, 45}))
+    r.push_event(_stack_sample_event(frames[:1]))
+
+    aggregate = r.reset()[stack.StackSampleEvent]
+    assert isinstance(aggregate, stack.StackSampleAggregate)
+    assert aggregate.maxlen == 12
+    assert aggregate.nevents == 4
+    assert aggregate.sampling_period_sum == 4000
+    assert aggregate.stacks == [tuple(frames), tuple(frames[:1])]
+    assert aggregate.samples == {
+        (1, 1, "MainThread", None, None, 0, 2): [2, 15, 40],
+        (2, 2, "MainThread", 45, None, 0, 2): [1, 10, 20],
+        (1, 1, "MainThread", None, None, 1, 1): [1, 10, 20],
+    }
+    assert len(r.events[stack.StackSampleEvent]) == 0
+
+
+def test_aggregators_limit():
+    aggregate = stack.StackSampleAggregate(maxlen=1)
+    frames = [("foobar.py", 23, "func1")]
+    aggregate.extend([_stack_sample_event(frames), _stack_sample_event(frames, thread_id=2)])
+    aggregate.extend([_stack_sample_event([("foobar.py", 44, "func2")]), _stack_sample_event(frames)])
+    assert len(aggregate) == 1
+    assert aggregate.nevents == 2
+    assert aggregate.stacks == [tuple(frames)]
+    assert aggregate.samples == {(1, 1, "MainThread", None, None, 0, 1): [2, 20, 40]}
@@ -0,0 +1,51 @@
+from copy import deepcopy
+
+import pytest
+
+from ddtrace.internal.cache import LRUCache
+
+
+def test_min_size():
+    with pytest.raises(ValueError):
+        LRUCache(0)
+
+
+def test_get_set():
+    cache = LRUCache(2)
+
+    assert cache.get("a") is None
+    assert cache.get("a", 0) == 0
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache
+    cache.set("a", 2)
+    assert cache.get("a") == 2
+    assert len(cache) == 1
+
+    cache.clear()
+    assert len(cache) == 0
+    assert "a" not in cache
+
+
+def test_evict_least_recently_used():
+    cache = LRUCache(2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # "a" becomes the most recently used item
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_deepcopy():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+
+    cpy = deepcopy(cache)
+    assert cpy.maxsize == 2
+    assert len(cpy) == 0
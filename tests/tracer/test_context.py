@@ -193,3 +193,15 @@ class TestTracingContext(BaseTestCase):
         assert cloned_ctx.dd_origin == ctx.dd_origin
         assert cloned_ctx._current_span == ctx._current_span
         assert cloned_ctx._trace == []
+
+    def test_propagation_handle(self):
+        ctx = Context(trace_id=1, span_id=2, sampling_priority=2, dd_origin="synthetics")
+        root = Span(tracer=None, name="root", trace_id=1, parent_id=2)
+        ctx.add_span(root)
+        new_ctx = Context._from_propagation_handle(ctx._propagation_handle())
+        assert new_ctx._parent_trace_id == ctx._parent_trace_id
+        assert new_ctx._parent_span_id == ctx._parent_span_id
+        assert new_ctx._sampling_priority == 2
+        assert new_ctx.dd_origin == "synthetics"
+        assert new_ctx._current_span is root
+        assert new_ctx._trace == []
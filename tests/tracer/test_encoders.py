@@ -14,6 +14,9 @@ from ddtrace.encoding import JSONEncoder
 from ddtrace.encoding import JSONEncoderV2
 from ddtrace.encoding import MsgpackEncoder
 from ddtrace.encoding import _EncoderBase
+from ddtrace.internal._encoding import BufferedEncoder
+from ddtrace.internal.buffer import BufferFull
+from ddtrace.internal.buffer import BufferItemTooLarge
 from ddtrace.span import Span
 from ddtrace.span import SpanTypes
 from ddtrace.tracer import Tracer
@@ -396,3 +399,108 @@ def test_span_types(span, tags):
 
     trace = [span]
     assert decode(refencoder.encode_trace(trace)) == decode(encoder.encode_trace(trace))
+
+
+def test_custom_msgpack_encode_span_bytes():
+    # The span map is packed directly from the span attributes: check the
+    # output matches the v0.4 map layout byte for byte.
+    span = Span(None, "span_name", service="my-svc", resource="/my-resource", span_type=SpanTypes.WEB)
+    span.set_tag("key", "value")
+    span.set_metric("metric", 1.5)
+    span.finish()
+
+    expected = [
+        [
+            (b"trace_id", span.trace_id),
+            (b"parent_id", None),
+            (b"span_id", span.span_id),
+            (b"service", b"my-svc"),
+            (b"resource", b"/my-resource"),
+            (b"name", b"span_name"),
+            (b"error", 0),
+            (b"start", span.start_ns),
+            (b"duration", span.duration_ns),
+            (b"type", b"web"),
+            (b"meta", {b"key": b"value"}),
+            (b"metrics", {b"metric": 1.5}),
+        ]
+    ]
+    packed = msgpack.Packer(use_bin_type=False).pack([dict(_) for _ in expected])
+    assert MsgpackEncoder().encode_trace([span]) == packed
+
+
+@pytest.mark.parametrize("n_traces", [1, 15, 16, 0xFFFF + 1])
+def test_buffered_encoder_flush(n_traces):
+    encoder = MsgpackEncoder()
+    buffered = BufferedEncoder(max_size=64 * 1000000, max_item_size=1000000)
+
+    trace = gen_trace(nspans=2, ntags=2, nmetrics=2)
+    for _ in range(n_traces):
+        buffered.put(trace)
+    assert len(buffered) == n_traces
+
+    payload, count = buffered.flush()
+    assert count == n_traces
+    assert isinstance(payload, memoryview)
+    assert payload.readonly
+    assert payload.tobytes() == encoder.join_encoded([encoder.encode_trace(trace) for _ in range(n_traces)])
+
+    assert len(buffered) == 0
+    assert buffered.size == 0
+    assert buffered.flush() == (None, 0)
+
+
+def test_buffered_encoder_payload_outlives_flush():
+    buffered = BufferedEncoder(max_size=1000000, max_item_size=1000000)
+
+    buffered.put([Span(None, "first")])
+    payload, count = buffered.flush()
+    expected = payload.tobytes()
+
+    # Traces put after a flush must not overwrite a payload being sent
+    buffered.put([Span(None, "second" * 100)])
+    assert payload.tobytes() == expected
+    assert decode(payload)[0][0][b"name"] == b"first"
+
+
+def test_buffered_encoder_limits():
+    encoder = MsgpackEncoder()
+    trace = [Span(None, "name", span_id=1, trace_id=1)]
+    item_size = len(encoder.encode_trace(trace))
+
+    buffered = BufferedEncoder(max_size=item_size * 2, max_item_size=item_size)
+    buffered.put(trace)
+    buffered.put(trace)
+    assert buffered.size == item_size * 2
+
+    with pytest.raises(BufferFull) as e:
+        buffered.put(trace)
+    assert e.value.args[0] == item_size
+
+    with pytest.raises(BufferItemTooLarge) as e:
+        buffered.put([Span(None, "name" * 10, span_id=1, trace_id=1)])
+    assert e.value.args[0] > item_size
+
+    # Rejected traces leave the buffer untouched
+    assert len(buffered) == 2
+    assert buffered.size == item_size * 2
+    payload, count = buffered.flush()
+    assert count == 2
+    assert decode(payload) == decode(encoder.join_encoded([encoder.encode_trace(trace)] * 2))
+
+
+def test_buffered_encoder_encoding_error():
+    buffered = BufferedEncoder(max_size=1000000, max_item_size=1000000)
+    buffered.put([Span(None, "name")])
+    size = buffered.size
+
+    span = Span(None, "name")
+    span.meta["key"] = object()
+    with pytest.raises(TypeError):
+        buffered.put([span])
+
+    assert len(buffered) == 1
+    assert buffered.size == size
+    payload, count = buffered.flush()
+    assert count == 1
+    assert decode(payload)[0][0][b"name"] == b"name"
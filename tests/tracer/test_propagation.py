@@ -72,6 +72,74 @@ class TestHttpPropagation(TestCase):
             assert span.context.sampling_priority == 1
             assert span.context.dd_origin == "synthetics"
 
+    def test_extract_environ(self):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": "/",
+            "HTTP_HOST": "localhost",
+            "HTTP_X_DATADOG_TRACE_ID": "1234",
+            "HTTP_X_DATADOG_PARENT_ID": "5678",
+            "HTTP_X_DATADOG_SAMPLING_PRIORITY": "2",
+        }
+
+        context = HTTPPropagator().extract(environ)
+        assert context.trace_id == 1234
+        assert context.span_id == 5678
+        assert context.sampling_priority == 2
+        assert context.dd_origin is None
+
+    def test_extract_asgi(self):
+        headers = [
+            (b"host", b"localhost"),
+            (b"x-datadog-trace-id", b"1234"),
+            (b"x-datadog-parent-id", b"5678"),
+            (b"x-datadog-sampling-priority", b"1"),
+            (b"x-datadog-origin", b"synthetics"),
+        ]
+
+        context = HTTPPropagator().extract(headers)
+        assert context.trace_id == 1234
+        assert context.span_id == 5678
+        assert context.sampling_priority == 1
+        assert context.dd_origin == "synthetics"
+
+        # Servers may also use tuples of pairs
+        context = HTTPPropagator().extract(tuple([name, value] for name, value in headers))
+        assert context.trace_id == 1234
+        assert context.span_id == 5678
+
+    def test_extract_case_insensitive(self):
+        headers = {
+            "Host": "localhost",
+            "X-Datadog-Trace-Id": "1234",
+            "X-DataDog-Parent-ID": "5678",
+            "http_x_datadog_sampling_priority": "1",
+            "X-DATADOG-ORIGIN": "synthetics",
+        }
+
+        context = HTTPPropagator().extract(headers)
+        assert context.trace_id == 1234
+        assert context.span_id == 5678
+        assert context.sampling_priority == 1
+        assert context.dd_origin == "synthetics"
+
+    def test_extract_no_headers(self):
+        for headers in ({}, {"Host": "localhost"}, [(b"host", b"localhost")], {"REQUEST_METHOD": "GET"}):
+            context = HTTPPropagator().extract(headers)
+            assert not context.trace_id
+            assert context.sampling_priority is None
+            assert context.dd_origin is None
+
+    def test_extract_invalid(self):
+        headers = {
+            "x-datadog-trace-id": "1234",
+            "x-datadog-parent-id": "invalid",
+        }
+
+        context = HTTPPropagator().extract(headers)
+        assert context.trace_id is None
+        assert context.span_id is None
+
 
 class TestPropagationUtils(object):
     def test_get_wsgi_header(self):
@@ -1,5 +1,7 @@
 from __future__ import division
 
+import threading
+
 import mock
 import pytest
 
@@ -189,3 +191,49 @@ def test_rate_liimter_effective_rate_starting_rate():
         assert limiter.effective_rate == 0.75
         assert limiter.current_window == (now + 100.0)
         assert limiter.prev_window_rate == 0.5
+
+
+def test_rate_limiter_single_clock_read():
+    limiter = RateLimiter(rate_limit=10)
+
+    now = compat.monotonic()
+    with mock.patch("ddtrace.compat.monotonic") as mock_time:
+        mock_time.return_value = now
+        for i in range(20):
+            limiter.is_allowed()
+            assert mock_time.call_count == i + 1
+
+
+def test_rate_limiter_threads():
+    limiter = RateLimiter(rate_limit=100)
+    n_threads = 10
+    n_calls = 1000
+    allowed = []
+
+    def check():
+        allowed.append(sum(limiter.is_allowed() for _ in range(n_calls)))
+
+    now = compat.monotonic()
+    with mock.patch("ddtrace.compat.monotonic") as mock_time:
+        # Keep the same timeframe
+        mock_time.return_value = now
+        threads = [threading.Thread(target=check) for _ in range(n_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    # The token bucket is updated under the lock: no more requests than the
+    # limit are allowed. The counts of the effective rate are not locked.
+    assert sum(allowed) == 100
+
+
+@pytest.mark.parametrize("rate_limit", [0, -1])
+def test_rate_limiter_no_lock_without_limit(rate_limit):
+    limiter = RateLimiter(rate_limit=rate_limit)
+    limiter._lock = mock.MagicMock()
+
+    for _ in range(10):
+        assert limiter.is_allowed() is (rate_limit < 0)
+    limiter._lock.__enter__.assert_not_called()
+    assert limiter.tokens_total == 10
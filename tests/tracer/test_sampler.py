@@ -481,6 +481,115 @@ def test_datadog_sampler_init():
     assert sampler.rules == [rule_1, rule_2, rule_3]
 
 
+def _first_matching_rule(rules, span):
+    for rule in rules:
+        if rule.matches(span):
+            return rule
+    return None
+
+
+@pytest.mark.parametrize(
+    "service,name",
+    [
+        ("web", "flask.request"),
+        ("web", "sqlite.query"),
+        ("web-db", "sqlite.query"),
+        ("worker", "celery.run"),
+        ("other", "other"),
+        (None, "other"),
+        ("other", None),
+    ],
+)
+def test_datadog_sampler_rule_matcher(service, name):
+    rules = [
+        SamplingRule(sample_rate=0.1, service="web", name="flask.request"),
+        SamplingRule(sample_rate=0.2, service=re.compile("-db$")),
+        SamplingRule(sample_rate=0.3, name="sqlite.query"),
+        SamplingRule(sample_rate=0.4, service=lambda service: service and service.startswith("work")),
+        SamplingRule(sample_rate=0.5, service="web"),
+        SamplingRule(sample_rate=0.6, service=None),
+        SamplingRule(sample_rate=0.7, name=None),
+        SamplingRule(sample_rate=0.8, name="celery.run"),
+    ]
+    sampler = DatadogSampler(rules=rules)
+    span = Span(tracer=None, name=name, service=service)
+
+    expected = _first_matching_rule(rules, span)
+    # Match once to fill the cache
+    assert sampler._rule_matcher.match(span) is expected
+    assert sampler._rule_matcher.match(span) is expected
+
+
+def test_datadog_sampler_rule_matcher_no_match():
+    sampler = DatadogSampler(rules=[SamplingRule(sample_rate=0.5, service="web")])
+    span = Span(tracer=None, name="name", service="other")
+
+    assert sampler._rule_matcher.match(span) is None
+    assert sampler._rule_matcher.match(span) is None
+    assert sampler._rule_matcher.match(Span(tracer=None, name="name", service="web")) is sampler.rules[0]
+
+
+def test_datadog_sampler_rule_matcher_cache():
+    pattern = mock.Mock(return_value=False)
+    sampler = DatadogSampler(
+        rules=[
+            SamplingRule(sample_rate=0.5, service=re.compile("^web")),
+            SamplingRule(sample_rate=0.5, service=pattern),
+        ]
+    )
+    span = Span(tracer=None, name="name", service="web")
+
+    with mock.patch.object(SamplingRule, "matches", autospec=True, side_effect=SamplingRule.matches) as matches:
+        assert sampler._rule_matcher.match(span) is sampler.rules[0]
+        assert sampler._rule_matcher.match(span) is sampler.rules[0]
+        # The first rule is only evaluated once
+        matches.assert_called_once_with(sampler.rules[0], span)
+
+    # Rules with a function pattern are always evaluated
+    span = Span(tracer=None, name="name", service="worker")
+    assert sampler._rule_matcher.match(span) is None
+    assert sampler._rule_matcher.match(span) is None
+    assert pattern.call_count == 2
+
+    # The cache is invalidated when the rules are changed
+    sampler.rules = [SamplingRule(sample_rate=0.25)]
+    assert sampler._rule_matcher.match(span) is sampler.rules[0]
+
+
+def test_datadog_sampler_rules_changed_in_place():
+    web = SamplingRule(sample_rate=0, service="web")
+    sampler = DatadogSampler(rules=[web], default_sample_rate=1)
+    span = Span(tracer=None, name="name", service="web")
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_RULE_DECISION) == 0
+
+    # Appended rules are applied
+    worker = SamplingRule(sample_rate=0.5, service="worker")
+    sampler.rules.append(worker)
+    span = Span(tracer=None, name="name", service="worker")
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_RULE_DECISION) == 0.5
+
+    # Inserted rules take precedence
+    sampler.rules.insert(0, SamplingRule(sample_rate=0.25))
+    span = Span(tracer=None, name="name", service="web")
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_RULE_DECISION) == 0.25
+
+    # Removed rules are not applied anymore
+    sampler.rules.pop(0)
+    sampler.rules.pop()
+    span = Span(tracer=None, name="name", service="worker")
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_RULE_DECISION) == 1
+
+    # Replaced rules are not applied anymore
+    sampler.rules[0] = SamplingRule(sample_rate=0.75, service="web")
+    span = Span(tracer=None, name="name", service="web")
+    sampler.sample(span)
+    assert span.get_metric(SAMPLING_RULE_DECISION) == 0.75
+
+
 @mock.patch("ddtrace.sampler.RateByServiceSampler.sample")
 def test_datadog_sampler_sample_no_rules(mock_sample, dummy_tracer):
     sampler = DatadogSampler()
@@ -130,6 +130,27 @@ class TestHttpConfig(BaseTestCase):
         http_config.trace_headers("some_header")
         assert not http_config.header_is_traced(None)
 
+    def test_header_tag_names(self):
+        http_config = HttpConfig()
+        http_config.trace_headers("Some-Header")
+        assert http_config._header_tag_names("some-header") == {
+            "request": "http.request.headers.some-header",
+            "response": "http.response.headers.some-header",
+        }
+        assert http_config._header_tag_names("some_other_header") is None
+
+    def test_header_tag_names_cache_cleared_by_trace_headers(self):
+        http_config = HttpConfig()
+        http_config.trace_headers("some_header")
+        assert http_config.header_is_traced("some_header")
+        assert not http_config.header_is_traced("some_other_header")
+        assert len(http_config._header_tags) == 2
+
+        http_config.trace_headers("some_other_header")
+        assert len(http_config._header_tags) == 0
+        assert http_config.header_is_traced("some_header")
+        assert http_config.header_is_traced("some_other_header")
+
 
 class TestIntegrationConfig(BaseTestCase):
     def setUp(self):
@@ -0,0 +1,125 @@
+import weakref
+
+import mock
+
+from ddtrace import Tracer
+from ddtrace.api import Response
+from ddtrace.internal.span_pool import SpanPool
+from ddtrace.internal.span_pool import span_pool
+from ddtrace.internal.writer import AgentWriter
+from ddtrace.span import Span
+
+
+def _trace(n=3):
+    root = Span(tracer=None, name="root", trace_id=1, span_id=1)
+    trace = [root]
+    for i in range(2, n + 1):
+        span = Span(tracer=None, name="child", trace_id=1, span_id=i, parent_id=1)
+        span._parent = root
+        trace.append(span)
+    return trace
+
+
+def _release(pool, traces):
+    # DEV: The released trace must not be referenced anymore, which it would be
+    # by pytest if the call was in an assert statement.
+    return pool.release(traces.pop())
+
+
+def test_acquire_empty():
+    pool = SpanPool(max_size=10)
+    span = pool.acquire(None, "name", service="s")
+    assert isinstance(span, Span)
+    assert span.name == "name"
+    assert span.service == "s"
+
+
+def test_release_acquire():
+    pool = SpanPool(max_size=10)
+    released = _release(pool, [_trace()])
+    assert released
+    assert len(pool) == 3
+
+    span = pool.acquire(None, "new", resource="r", trace_id=42)
+    assert len(pool) == 2
+    assert span.name == "new"
+    assert span.resource == "r"
+    assert span.trace_id == 42
+    assert span.parent_id is None
+    assert span._parent is None
+    assert span.meta == {}
+    assert span.metrics == {}
+    assert span.duration_ns is None
+
+
+def test_release_full():
+    pool = SpanPool(max_size=4)
+    released = _release(pool, [_trace()])
+    assert released
+    released = _release(pool, [_trace()])
+    assert not released
+    assert len(pool) == 3
+
+
+def test_release_referenced():
+    pool = SpanPool(max_size=10)
+
+    traces = [_trace()]
+    root, child = traces[0][0], traces[0][2]
+    released = _release(pool, traces)
+    assert not released
+    # The spans are left untouched
+    assert child._parent is root
+    assert child.meta == {}
+
+    traces = [_trace()]
+    ref = weakref.ref(traces[0][1])  # noqa: F841
+    released = _release(pool, traces)
+    assert not released
+
+    # The trace itself is referenced
+    trace = _trace()
+    released = pool.release(trace)
+    assert not released
+    assert trace[0].meta == {}
+
+    traces = [_trace()]
+    released = _release(pool, traces)
+    assert released
+
+
+def test_disabled():
+    pool = SpanPool(max_size=0)
+    released = _release(pool, [_trace()])
+    assert not released
+    assert len(pool) == 0
+
+
+def test_writer_releases_encoded_traces():
+    tracer = Tracer()
+    writer = AgentWriter(hostname="asdf", port=1234)
+    writer._put = mock.Mock(return_value=Response(status=200))
+    writer.run_periodic = mock.Mock()
+    tracer.writer = writer
+
+    with mock.patch.object(span_pool, "max_size", 100), mock.patch.object(span_pool, "_spans", []):
+        with tracer.trace("root"):
+            with tracer.trace("child"):
+                pass
+        writer.flush_queue()
+        writer._put.assert_called_once()
+        assert len(span_pool) == 2
+
+        # New spans are taken from the pool
+        with tracer.trace("root"):
+            assert len(span_pool) == 1
+        writer.flush_queue()
+        assert len(span_pool) == 2
+
+        # Spans still referenced are not released
+        with tracer.trace("root") as span:
+            pass
+        writer.flush_queue()
+        assert len(span_pool) == 1
+        assert span.name == "root"
+        assert span.duration_ns is not None
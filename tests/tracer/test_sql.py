@@ -0,0 +1,59 @@
+import mock
+import pytest
+
+from ddtrace.internal import sql
+from ddtrace.internal.sql import normalize_query
+from ddtrace.internal.sql import sql_resource
+from tests import override_global_config
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [
+        ("SELECT * FROM users WHERE id = 42", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT * FROM users WHERE name = 'O''Brien'", "SELECT * FROM users WHERE name = ?"),
+        ("SELECT * FROM users WHERE name = 'it\\'s'", "SELECT * FROM users WHERE name = ?"),
+        ("SELECT * FROM t1 WHERE x IN (1, 2, 3)", "SELECT * FROM t1 WHERE x IN (?)"),
+        ("SELECT * FROM t1 WHERE x IN ('a','b')", "SELECT * FROM t1 WHERE x IN (?)"),
+        ("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y'),(3,'z')", "INSERT INTO t (a, b) VALUES (?)"),
+        ("SELECT 1.5, .5, 1e10, 2.5E-3, 0x1F", "SELECT ?, ?, ?, ?, ?"),
+        ("SELECT $$text$$, $tag$ a $ b $tag$", "SELECT ?, ?"),
+        ("SELECT E'a', N'b', X'0F'", "SELECT ?, ?, ?"),
+        # Comments and whitespaces
+        ("SELECT a -- the a column\n  FROM t /* the table */  WHERE b = 1", "SELECT a FROM t WHERE b = ?"),
+        ("\n  SELECT a\n\tFROM t  ", "SELECT a FROM t"),
+        # Identifiers and placeholders are kept
+        ('SELECT "Col1", `col2`, t2.col3 FROM "Table1", t2', 'SELECT "Col1", `col2`, t2.col3 FROM "Table1", t2'),
+        (
+            "SELECT * FROM t WHERE a = %s AND b = %(b)s AND c = :c AND d = $1 AND e = ?",
+            "SELECT * FROM t WHERE a = %s AND b = %(b)s AND c = :c AND d = $1 AND e = ?",
+        ),
+        ("SELECT x::int FROM t", "SELECT x::int FROM t"),
+        # Unterminated literals are left as is
+        ("SELECT 'unterminated", "SELECT 'unterminated"),
+    ],
+)
+def test_normalize_query(query, expected):
+    assert normalize_query(query) == expected
+
+
+def test_normalize_query_same_resource():
+    assert normalize_query("SELECT * FROM t WHERE id = 1") == normalize_query("SELECT  * FROM t WHERE id = 2")
+
+
+def test_normalize_query_cache():
+    query = "SELECT * FROM cached WHERE id = 1"
+    with mock.patch.object(sql, "_TOKENS", wraps=sql._TOKENS) as tokens:
+        assert normalize_query(query) == "SELECT * FROM cached WHERE id = ?"
+        assert normalize_query(query) == "SELECT * FROM cached WHERE id = ?"
+        assert tokens.sub.call_count == 1
+
+
+def test_sql_resource():
+    query = "SELECT * FROM t WHERE id = 1"
+    assert sql_resource(query) == query
+
+    with override_global_config(dict(sql_normalization_enabled=True)):
+        assert sql_resource(query) == "SELECT * FROM t WHERE id = ?"
+        # Only strings are normalized
+        assert sql_resource(None) is None
@@ -0,0 +1,111 @@
+from ddtrace.constants import SPAN_MEASURED_KEY
+from ddtrace.ext import http
+from ddtrace.internal.stats import SpanStatsAggregator
+from ddtrace.span import Span
+
+
+def _span(name, service="svc", resource=None, span_id=1, parent_id=None, start=0, duration=1, error=0):
+    span = Span(
+        tracer=None, name=name, service=service, resource=resource, trace_id=1, span_id=span_id, parent_id=parent_id
+    )
+    span.start_ns = start
+    span.duration_ns = duration
+    span.error = error
+    return span
+
+
+def test_aggregate_top_level_spans():
+    aggregator = SpanStatsAggregator(bucket_size_ns=100)
+    measured = _span("measured", span_id=4, parent_id=1, duration=3)
+    measured.set_metric(SPAN_MEASURED_KEY, 1)
+    root = _span("root", span_id=1, duration=10, error=1)
+    root.set_tag(http.STATUS_CODE, "200")
+    aggregator.add_trace(
+        [
+            root,
+            # Child of a span of the same service
+            _span("child", span_id=2, parent_id=1, duration=5),
+            # Child of a span of another service
+            _span("db", service="db", span_id=3, parent_id=1, duration=2),
+            measured,
+        ]
+    )
+    aggregator.add_trace([_span("root", span_id=1, duration=20)])
+    # Partial trace: the parent of the same service is not part of it
+    child = _span("child", span_id=2, parent_id=1, duration=5)
+    child._parent = root
+    aggregator.add_trace([child])
+    # Remote parent
+    aggregator.add_trace([_span("remote", span_id=5, parent_id=9, duration=4)])
+
+    assert aggregator.flush() == [
+        (
+            0,
+            {
+                ("svc", "root", "root", "200"): [1, 1, 1, 10],
+                ("svc", "root", "root", None): [1, 1, 0, 20],
+                ("db", "db", "db", None): [1, 1, 0, 2],
+                ("svc", "measured", "measured", None): [1, 0, 0, 3],
+                ("svc", "remote", "remote", None): [1, 1, 0, 4],
+            },
+        )
+    ]
+    assert aggregator.flush() == []
+
+
+def test_flush_buckets():
+    aggregator = SpanStatsAggregator(bucket_size_ns=100)
+    # Buckets are based on the end of the spans
+    aggregator.add_trace([_span("a", start=50, duration=49)])
+    aggregator.add_trace([_span("a", start=50, duration=50)])
+    aggregator.add_trace([_span("a", start=250, duration=1)])
+
+    assert aggregator.flush(now_ns=99) == []
+    assert aggregator.flush(now_ns=200) == [
+        (0, {("svc", "a", "a", None): [1, 1, 0, 49]}),
+        (100, {("svc", "a", "a", None): [1, 1, 0, 50]}),
+    ]
+    assert aggregator.flush(now_ns=200) == []
+    assert aggregator.flush() == [(200, {("svc", "a", "a", None): [1, 1, 0, 1]})]
+
+
+def test_payload():
+    aggregator = SpanStatsAggregator(bucket_size_ns=100)
+    span = _span("a", resource="GET /", duration=10, error=1)
+    span.set_tag(http.STATUS_CODE, 404)
+    aggregator.add_trace([span])
+    aggregator.add_trace([_span("a", service=None, duration=5)])
+
+    assert aggregator.payload(aggregator.flush(), env="prod", version="1.0") == {
+        "Hostname": "",
+        "Env": "prod",
+        "Version": "1.0",
+        "Stats": [
+            {
+                "Start": 0,
+                "Duration": 100,
+                "Stats": [
+                    {
+                        "Service": "svc",
+                        "Name": "a",
+                        "Resource": "GET /",
+                        "HTTPStatusCode": 404,
+                        "Hits": 1,
+                        "TopLevelHits": 1,
+                        "Errors": 1,
+                        "Duration": 10,
+                    },
+                    {
+                        "Service": "",
+                        "Name": "a",
+                        "Resource": "a",
+                        "HTTPStatusCode": 0,
+                        "Hits": 1,
+                        "TopLevelHits": 1,
+                        "Errors": 0,
+                        "Duration": 5,
+                    },
+                ],
+            }
+        ],
+    }
@@ -8,6 +8,7 @@ from ddtrace.compat import stringify
 from ddtrace.contrib import trace_utils
 from ddtrace.ext import http
 from ddtrace.settings import Config
+from tests import override_config
 from tests import override_global_config
 from tests.tracer.test_tracer import get_dummy_tracer
 
@@ -160,3 +161,33 @@ def test_set_http_meta_custom_errors(mock_log, span, int_config, error_codes, st
         mock_log.exception.assert_called_once_with(*log_call)
     else:
         mock_log.exception.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "error_codes,status_code,error",
+    [
+        ("500-599", "500", True),
+        ("500-599", "200", False),
+        ("600-699", 650, True),
+        ("400,1000", 1000, True),
+        ("0-2000", 1500, True),
+        ("0-2000", 2001, False),
+    ],
+)
+def test_is_error_code(error_codes, status_code, error):
+    with override_config("http_server", dict(error_statuses=error_codes)):
+        assert trace_utils.is_error_code(status_code) is error
+
+
+def test_is_error_code_parses_error_statuses_once():
+    with override_config("http_server", dict(error_statuses="400-404")):
+        with mock.patch("ddtrace.contrib.trace_utils.get_error_ranges", wraps=trace_utils.get_error_ranges) as parse:
+            config.http_server.error_statuses = "401-403"
+            assert trace_utils.is_error_code(401)
+            assert not trace_utils.is_error_code(404)
+            assert parse.call_count == 1
+
+            config.http_server.error_statuses = "404"
+            assert not trace_utils.is_error_code(401)
+            assert trace_utils.is_error_code(404)
+            assert parse.call_count == 2
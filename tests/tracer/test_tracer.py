@@ -6,6 +6,7 @@ import contextlib
 import multiprocessing
 import os
 from os import getpid
+import sys
 import threading
 from unittest.case import SkipTest
 import warnings
@@ -27,6 +28,7 @@ from ddtrace.ext import system
 from ddtrace.internal.writer import AgentWriter
 from ddtrace.internal.writer import LogWriter
 from ddtrace.settings import Config
+from ddtrace.span import Span
 from ddtrace.tracer import Tracer
 from ddtrace.vendor import six
 from tests import DummyTracer
@@ -681,11 +683,11 @@ def test_tracer_fork():
             with capture_failures(errors):
                 assert t._pid != original_pid
                 assert t.writer != original_writer
-                assert t.writer._buffer != original_writer._buffer
+                assert t.writer._encoder != original_writer._encoder
 
         # Assert the trace got written into the correct queue
-        assert len(original_writer._buffer) == 0
-        assert len(t.writer._buffer) == 1
+        assert len(original_writer._encoder) == 0
+        assert len(t.writer._encoder) == 1
 
     # Assert tracer in a new process correctly recreates the writer
     errors = multiprocessing.Queue()
@@ -701,11 +703,41 @@ def test_tracer_fork():
     with t.trace("test", service="test"):
         assert t._pid == original_pid
         assert t.writer == original_writer
-        assert t.writer._buffer == original_writer._buffer
+        assert t.writer._encoder == original_writer._encoder
 
     # Assert the trace got written into the correct queue
-    assert len(original_writer._buffer) == 1
-    assert len(t.writer._buffer) == 1
+    assert len(original_writer._encoder) == 1
+    assert len(t.writer._encoder) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="fork hooks are not available")
+def test_tracer_fork_hooks():
+    t = ddtrace.Tracer()
+    t.writer = DummyWriter()
+
+    # The pid is not checked when the process did not fork
+    # DEV: ``ddtrace.tracer`` is the global tracer rather than the module
+    with mock.patch.object(sys.modules["ddtrace.tracer"], "getpid") as getpid:
+        t.trace("test").finish()
+    getpid.assert_not_called()
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            assert t._forked
+            writer = t.writer
+            t.trace("test").finish()
+            assert not t._forked
+            assert t._pid == os.getpid()
+            assert t.writer is not writer
+            code = 0
+        finally:
+            os._exit(code)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert not t._forked
 
 
 def test_tracer_trace_across_fork():
@@ -1296,6 +1328,27 @@ class TestPartialFlush(TracerTestCase):
         assert len(traces) == 1
         assert [s.name for s in traces[0]] == ["root", "child0", "child1", "child2", "child3", "child4"]
 
+    @TracerTestCase.run_in_subprocess(
+        env_overrides=dict(DD_TRACER_PARTIAL_FLUSH_ENABLED="true", DD_TRACER_PARTIAL_FLUSH_MIN_SPANS="3")
+    )
+    def test_partial_flush_open_spans(self):
+        root = self.tracer.trace("root")
+        parent = self.tracer.trace("parent")
+        for name in ("child0", "child1", "child2"):
+            self.tracer.trace(name).finish()
+
+        # The open spans are kept until they are finished
+        traces = self.tracer.writer.pop_traces()
+        assert [[s.name for s in t] for t in traces] == [["child0", "child1", "child2"]]
+
+        self.tracer.trace("child3").finish()
+        parent.finish()
+        assert self.tracer.writer.pop_traces() == []
+
+        root.finish()
+        traces = self.tracer.writer.pop_traces()
+        assert [[s.name for s in t] for t in traces] == [["root", "parent", "child3"]]
+
 
 def test_unicode_config_vals():
     t = ddtrace.Tracer()
@@ -1558,3 +1611,63 @@ def test_service_mapping():
             assert _.service == "foo"
         with ddtrace.Tracer().trace("renaming", "sna") as _:
             assert _.service == "fu"
+
+
+def test_create_child_spans():
+    tracer = DummyTracer()
+    tracer.set_tags({"global": "tag"})
+
+    with override_global_config(dict(env="my-env", version="1.2.3", service="svc")):
+        with tracer.trace("parent") as parent:
+            spans = tracer.create_child_spans(
+                parent,
+                [
+                    ("child", "r0", 1000, 10, {"i": 0}),
+                    ("child", "r1", 2000, 20, None),
+                ],
+            )
+            # The children are not activated
+            assert tracer.current_span() is parent
+            with tracer.trace("other") as other:
+                assert other.parent_id == parent.span_id
+
+    assert [s.resource for s in spans] == ["r0", "r1"]
+    for s in spans:
+        assert s.finished
+        assert s.trace_id == parent.trace_id
+        assert s.parent_id == parent.span_id
+        assert s.service == "svc"
+        assert s.get_tag("global") == "tag"
+        assert s.get_tag(ENV_KEY) == "my-env"
+        assert s.get_tag(VERSION_KEY) == "1.2.3"
+    assert (spans[0].start_ns, spans[0].duration_ns, spans[0].get_metric("i")) == (1000, 10, 0)
+    assert (spans[1].start_ns, spans[1].duration_ns, spans[1].get_metric("i")) == (2000, 20, None)
+
+    # The trace is written once the parent is finished
+    traces = tracer.writer.pop_traces()
+    assert len(traces) == 1
+    assert [s.name for s in traces[0]] == ["parent", "child", "child", "other"]
+
+
+def test_create_child_spans_finished_parent():
+    tracer = DummyTracer()
+    span = tracer.trace("parent")
+    span.finish()
+    with pytest.raises(ValueError):
+        tracer.create_child_spans(span, [("child", "r", 0, 1, None)])
+
+
+def test_create_child_spans_no_context():
+    tracer = DummyTracer()
+    span = Span(tracer, "parent")
+    with pytest.raises(ValueError):
+        tracer.create_child_spans(span, [("child", "r", 0, 1, None)])
+
+
+def test_create_child_spans_sampling_tags():
+    tracer = DummyTracer()
+    with tracer.trace("parent") as parent:
+        tracer.create_child_spans(parent, [("child", "r", 0, 1, {MANUAL_KEEP_KEY: True})])
+        assert parent.context.sampling_priority == priority.USER_KEEP
+        tracer.create_child_spans(parent, [("child", "r", 0, 1, {MANUAL_DROP_KEY: True})])
+        assert parent.context.sampling_priority == priority.USER_REJECT
@@ -1,3 +1,6 @@
+import os
+import threading
+
 import pytest
 
 from ddtrace import _worker
@@ -30,6 +33,26 @@ def test_periodic():
     assert results
 
 
+def test_wakeup():
+    results = []
+
+    class MyWorker(_worker.PeriodicWorkerThread):
+        @staticmethod
+        def run_periodic():
+            results.append(object())
+
+    w = MyWorker(interval=60)
+    w.start()
+    assert not results
+    w.wakeup()
+    # results should be filled really quickly, but just in case the thread is a snail, wait
+    while not results:
+        pass
+    w.stop()
+    w.join()
+    assert len(results) == 1
+
+
 def test_on_shutdown():
     results = []
 
@@ -46,6 +69,22 @@ def test_on_shutdown():
     assert results
 
 
+def test_on_shutdown_once():
+    # A worker stopped while the scheduler is about to run it is run again before being dropped
+    results = []
+
+    class MyWorker(_worker.PeriodicWorkerThread):
+        @staticmethod
+        def on_shutdown():
+            results.append(object())
+
+    w = MyWorker()
+    w._stop_requested = True
+    w._run_scheduled()
+    w._run_scheduled()
+    assert len(results) == 1
+
+
 def test_restart():
     w = _worker.PeriodicWorkerThread()
     w.start()
@@ -69,3 +108,81 @@ def test_atexit_not_started():
     w = _worker.PeriodicWorkerThread(exit_timeout=1)
     assert not w.started
     w._atexit()
+
+
+def test_shared_thread():
+    threads = []
+
+    class MyWorker(_worker.PeriodicWorkerThread):
+        def run_periodic(self):
+            threads.append(threading.current_thread())
+
+    workers = [MyWorker(interval=0), MyWorker(interval=0)]
+    for w in workers:
+        w.start()
+    while len(threads) < 4:
+        pass
+    for w in workers:
+        w.stop()
+        w.join()
+    assert len(set(threads)) == 1
+
+
+def test_error_does_not_stop_other_workers():
+    results = []
+
+    class FailingWorker(_worker.PeriodicWorkerThread):
+        @staticmethod
+        def run_periodic():
+            raise ValueError("hey!")
+
+    class MyWorker(_worker.PeriodicWorkerThread):
+        @staticmethod
+        def run_periodic():
+            results.append(object())
+
+    failing = FailingWorker(interval=0)
+    failing.start()
+    w = MyWorker(interval=0)
+    w.start()
+    while len(results) < 2:
+        pass
+    assert failing.is_alive()
+    for worker in (failing, w):
+        worker.stop()
+        worker.join()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not available")
+def test_fork():
+    results = []
+
+    class MyWorker(_worker.PeriodicWorkerThread):
+        @staticmethod
+        def run_periodic():
+            results.append(object())
+
+    w = MyWorker(interval=60)
+    w.start()
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            # The worker of the parent is not running in the child
+            code = int(w.is_alive())
+            child = MyWorker(interval=0)
+            child.start()
+            while not results:
+                pass
+            child.stop()
+            child.join()
+        finally:
+            os._exit(code)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert w.is_alive()
+    w.stop()
+    w.join()
+    assert not results
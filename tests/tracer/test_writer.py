@@ -13,15 +13,24 @@ from ddtrace.compat import PY3
 from ddtrace.compat import get_connection_response
 from ddtrace.compat import httplib
 from ddtrace.constants import KEEP_SPANS_RATE_KEY
+from ddtrace.constants import SAMPLING_PRIORITY_KEY
+from ddtrace.context import Context
+from ddtrace.ext import http
+from ddtrace.ext.priority import AUTO_KEEP
+from ddtrace.ext.priority import AUTO_REJECT
+from ddtrace.ext.priority import USER_KEEP
+from ddtrace.ext.priority import USER_REJECT
 from ddtrace.internal.uds import UDSHTTPConnection
 from ddtrace.internal.writer import AgentWriter
 from ddtrace.internal.writer import LogWriter
+from ddtrace.internal.writer import _get_flush_threshold
 from ddtrace.internal.writer import _human_size
 from ddtrace.span import Span
 from ddtrace.vendor.six.moves import BaseHTTPServer
 from ddtrace.vendor.six.moves import socketserver
 from tests import AnyInt
 from tests import BaseTestCase
+from tests import override_env
 
 
 class DummyOutput:
@@ -197,7 +206,9 @@ class AgentWriterTests(BaseTestCase):
     def test_drop_reason_buffer_full(self):
         statsd = mock.Mock()
         writer_metrics_reset = mock.Mock()
-        writer = AgentWriter(buffer_size=5300, dogstatsd=statsd, report_metrics=False, hostname="asdf", port=1234)
+        writer = AgentWriter(
+            buffer_size=5300, flush_threshold=1, dogstatsd=statsd, report_metrics=False, hostname="asdf", port=1234
+        )
         writer._metrics_reset = writer_metrics_reset
         for i in range(10):
             writer.write(
@@ -216,7 +227,8 @@ class AgentWriterTests(BaseTestCase):
         statsd = mock.Mock()
         writer_encoder = mock.Mock()
         writer_metrics_reset = mock.Mock()
-        writer_encoder.encode_trace.side_effect = Exception
+        writer_encoder.put.side_effect = Exception
+        writer_encoder.flush.return_value = (None, 0)
         writer = AgentWriter(dogstatsd=statsd, report_metrics=False, hostname="asdf", port=1234)
         writer._encoder = writer_encoder
         writer._metrics_reset = writer_metrics_reset
@@ -308,6 +320,279 @@ class AgentWriterTests(BaseTestCase):
         for trace in payload:
             assert 0.6 == trace[0]["metrics"].get(KEEP_SPANS_RATE_KEY, -1)
 
+    def test_flush_threshold(self):
+        writer_put = mock.Mock()
+        writer_put.return_value = Response(status=200)
+        writer = AgentWriter(buffer_size=5300, flush_threshold=0.5, processing_interval=60, hostname="asdf", port=1234)
+        writer._put = writer_put
+
+        try:
+            # The buffer crosses the threshold: it gets flushed before the processing interval
+            for i in range(10):
+                writer.write(
+                    [Span(tracer=None, name="name", trace_id=i, span_id=j, parent_id=j - 1 or None) for j in range(5)]
+                )
+
+            for _ in range(100):
+                if writer_put.called:
+                    break
+                time.sleep(0.05)
+            writer_put.assert_called_once()
+        finally:
+            writer.stop()
+            writer.join()
+
+        assert 0 == writer._metrics["buffer.dropped.traces"]["count"]
+
+    def test_flush_threshold_invalid(self):
+        with pytest.raises(ValueError):
+            AgentWriter(flush_threshold=0)
+        with pytest.raises(ValueError):
+            AgentWriter(flush_threshold=1.5)
+
+    def test_flush_threshold_env(self):
+        with override_env(dict(DD_TRACE_WRITER_FLUSH_THRESHOLD="0.8")):
+            assert _get_flush_threshold() == 0.8
+        assert _get_flush_threshold() == 0.5
+
+        # Invalid values fall back to the default
+        for value in ("half", "0", "1.5"):
+            with override_env(dict(DD_TRACE_WRITER_FLUSH_THRESHOLD=value)):
+                with mock.patch("ddtrace.internal.writer.log") as log:
+                    assert _get_flush_threshold() == 0.5
+                log.warning.assert_called_once()
+
+    def test_deferred_encoding(self):
+        writer_put = mock.Mock()
+        writer_put.return_value = Response(status=200)
+        writer = AgentWriter(deferred_encoding=True, hostname="asdf", port=1234)
+        writer.run_periodic = mock.Mock()
+        writer._put = writer_put
+
+        for i in range(1, 11):
+            writer.write(
+                [Span(tracer=None, name="name", trace_id=i, span_id=j, parent_id=j - 1 or None) for j in range(5)]
+            )
+
+        # Nothing is encoded until the worker flushes
+        assert len(writer._pending) == 10
+        assert len(writer._encoder) == 0
+
+        writer.flush_queue()
+        assert len(writer._pending) == 0
+        writer_put.assert_called_once()
+        payload = msgpack.unpackb(writer_put.call_args.args[0])
+        assert [[span["trace_id"] for span in trace] for trace in payload] == [[i] * 5 for i in range(1, 11)]
+        assert "10" == writer_put.call_args.args[1]["X-Datadog-Trace-Count"]
+
+    def test_deferred_encoding_metrics(self):
+        statsd = mock.Mock()
+        writer = AgentWriter(deferred_encoding=True, dogstatsd=statsd, report_metrics=True, hostname="asdf", port=1234)
+        for i in range(10):
+            writer.write(
+                [Span(tracer=None, name="name", trace_id=i, span_id=j, parent_id=j - 1 or None) for j in range(5)]
+            )
+        writer.stop()
+        writer.join()
+
+        statsd.distribution.assert_has_calls(
+            [
+                mock.call("datadog.tracer.buffer.accepted.traces", 10, tags=[]),
+                mock.call("datadog.tracer.buffer.accepted.spans", 50, tags=[]),
+                mock.call("datadog.tracer.http.requests", 1, tags=[]),
+                mock.call("datadog.tracer.http.errors", 1, tags=["type:err"]),
+                mock.call("datadog.tracer.http.dropped.bytes", AnyInt(), tags=[]),
+            ],
+            any_order=True,
+        )
+
+    def test_deferred_encoding_drop_reason_buffer_full(self):
+        writer = AgentWriter(
+            deferred_encoding=True, buffer_size=10 * 256, flush_threshold=1, hostname="asdf", port=1234
+        )
+        writer.run_periodic = mock.Mock()
+        writer._metrics_reset = mock.Mock()
+        for i in range(2):
+            writer.write(
+                [Span(tracer=None, name="name", trace_id=i, span_id=j, parent_id=j - 1 or None) for j in range(5)]
+            )
+        writer.write([Span(tracer=None, name="name", trace_id=2, span_id=1)])
+
+        assert len(writer._pending) == 2
+        assert 1 == writer._metrics["buffer.dropped.traces"]["count"]
+        assert ["reason:full"] == writer._metrics["buffer.dropped.traces"]["tags"]
+
+    def test_deferred_encoding_encoding_error(self):
+        writer_encoder = mock.Mock()
+        writer_encoder.put.side_effect = Exception
+        writer_encoder.size = 0
+        writer_encoder.flush.return_value = (None, 0)
+        writer = AgentWriter(deferred_encoding=True, hostname="asdf", port=1234)
+        writer.run_periodic = mock.Mock()
+        writer._encoder = writer_encoder
+        writer._metrics_reset = mock.Mock()
+        for i in range(10):
+            writer.write(
+                [Span(tracer=None, name="name", trace_id=i, span_id=j, parent_id=j - 1 or None) for j in range(5)]
+            )
+
+        writer_encoder.put.assert_not_called()
+        writer.flush_queue()
+        assert 10 == writer._metrics["encoder.dropped.traces"]["count"]
+
+    def _stats_writer(self, stats_status=200):
+        writer = AgentWriter(compute_stats=True, hostname="asdf", port=1234)
+        writer.run_periodic = mock.Mock()
+        writer._connection.request = mock.Mock()
+        writer._connection.request.side_effect = lambda method, endpoint, payload, headers: Response(
+            status=stats_status if endpoint == "/v0.6/stats" else 200
+        )
+        return writer
+
+    @staticmethod
+    def _trace(trace_id, priority=None, n=5):
+        trace = [
+            Span(tracer=None, name="name", trace_id=trace_id, span_id=j + 1, parent_id=j or None) for j in range(n)
+        ]
+        if priority is not None:
+            trace[0].set_metric(SAMPLING_PRIORITY_KEY, priority)
+        return trace
+
+    def test_compute_stats_drops_rejected_traces(self):
+        writer = self._stats_writer()
+        writer.flush_queue()
+        assert writer._stats_supported is True
+        writer._metrics_reset = mock.Mock()
+        for i, priority in enumerate([USER_REJECT, AUTO_REJECT, AUTO_KEEP, USER_KEEP, None]):
+            writer.write(self._trace(i + 1, priority))
+
+        # Rejected traces with errors are kept
+        trace = self._trace(10, AUTO_REJECT)
+        trace[3].error = 1
+        writer.write(trace)
+
+        assert len(writer._encoder) == 4
+        assert 2 == writer._metrics["writer.rejected.traces"]["count"]
+        assert 4 == writer._metrics["writer.accepted.traces"]["count"]
+
+        # The stats account for all the traces
+        ((_, stats),) = writer._stats.flush()
+        assert stats == {(None, "name", "name", None): [6, 6, 0, 0]}
+
+        # The dropped traces are reported with the next payload
+        writer._flush_encoded()
+        method, endpoint, payload, headers = writer._connection.request.call_args_list[-1].args
+        assert endpoint == "/v0.3/traces"
+        assert headers["Datadog-Client-Computed-Stats"] == "yes"
+        assert headers["Datadog-Client-Dropped-P0-Traces"] == "2"
+        assert headers["Datadog-Client-Dropped-P0-Spans"] == "10"
+        assert (writer._dropped_p0_traces, writer._dropped_p0_spans) == (0, 0)
+
+    def test_compute_stats_dropped_counts_kept_on_error(self):
+        writer = self._stats_writer()
+        writer.flush_queue()
+        writer.write(self._trace(1, AUTO_REJECT))
+        writer.write(self._trace(2, AUTO_KEEP))
+
+        request = writer._connection.request.side_effect
+        writer._connection.request.side_effect = OSError
+        encoded, n_traces = writer._encoder.flush()
+        assert writer._send_encoded(encoded, n_traces, computed_stats=True) is False
+        assert (writer._dropped_p0_traces, writer._dropped_p0_spans) == (1, 5)
+        writer._connection.request.side_effect = request
+
+    def test_compute_stats_partial_trace(self):
+        # The chunks of a partially flushed trace do not include the span with the sampling priority
+        writer = self._stats_writer()
+        writer.flush_queue()
+        context = Context(sampling_priority=AUTO_REJECT)
+        trace = self._trace(1)
+        for span in trace:
+            span._context = context
+        writer.write(trace)
+
+        assert len(writer._encoder) == 0
+        assert writer._dropped_p0_traces == 1
+
+    def test_compute_stats_before_agent_check(self):
+        # The traces are sent without stats until the agent is known to accept them
+        writer = self._stats_writer()
+        assert writer._stats_supported is None
+        writer.write(self._trace(1, AUTO_REJECT))
+        assert len(writer._encoder) == 1
+        assert writer._stats.flush() == []
+
+        writer.flush_queue()
+        assert writer._stats_supported is True
+        (stats_call, traces_call) = writer._connection.request.call_args_list
+        assert stats_call.args[1] == "/v0.6/stats"
+        assert traces_call.args[1] == "/v0.3/traces"
+        assert "Datadog-Client-Computed-Stats" not in traces_call.args[3]
+
+        writer.write(self._trace(2, AUTO_REJECT))
+        assert len(writer._encoder) == 0
+        assert writer._dropped_p0_traces == 1
+
+    def test_compute_stats_unsupported_agent(self):
+        writer = self._stats_writer(stats_status=404)
+        writer.flush_queue()
+        assert writer._stats_supported is False
+
+        writer.write(self._trace(1, AUTO_REJECT))
+        assert len(writer._encoder) == 1
+        assert writer._stats.flush() == []
+        writer.flush_queue()
+        headers = writer._connection.request.call_args_list[-1].args[3]
+        assert "Datadog-Client-Computed-Stats" not in headers
+        assert "Datadog-Client-Dropped-P0-Traces" not in headers
+
+    def test_compute_stats_disabled(self):
+        writer = AgentWriter(hostname="asdf", port=1234)
+        writer.run_periodic = mock.Mock()
+        trace = [Span(tracer=None, name="name", trace_id=1, span_id=1)]
+        trace[0].set_metric(SAMPLING_PRIORITY_KEY, AUTO_REJECT)
+        writer.write(trace)
+
+        assert writer._stats is None
+        assert len(writer._encoder) == 1
+
+    def test_compute_stats_flush(self):
+        writer = self._stats_writer()
+        writer.flush_queue()
+        writer_put = writer._connection.request
+        span = Span(tracer=None, name="name", service="web", resource="GET /", trace_id=1, span_id=1, start=1.0)
+        span.set_tag(http.STATUS_CODE, 500)
+        span.error = 1
+        span.duration_ns = 100
+        writer.write([span])
+
+        writer.flush_queue()
+        method, endpoint, payload, headers = writer_put.call_args_list[-1].args
+        assert ("PUT", "/v0.6/stats") == (method, endpoint)
+        assert msgpack.unpackb(payload, raw=False)["Stats"] == [
+            {
+                "Start": 0,
+                "Duration": 10 * 1000000000,
+                "Stats": [
+                    {
+                        "Service": "web",
+                        "Name": "name",
+                        "Resource": "GET /",
+                        "HTTPStatusCode": 500,
+                        "Hits": 1,
+                        "TopLevelHits": 1,
+                        "Errors": 1,
+                        "Duration": 100,
+                    }
+                ],
+            }
+        ]
+
+        # Nothing is left to send
+        writer_put.reset_mock()
+        writer.flush_queue()
+        writer_put.assert_not_called()
+
 
 class LogWriterTests(BaseTestCase):
     N_TRACES = 11
@@ -347,6 +632,30 @@ class _APIEndpointRequestHandlerTest(_BaseHTTPRequestHandler):
         self.send_error(200, "OK")
 
 
+class _KeepAliveAPIEndpointRequestHandlerTest(_BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_PUT(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.requests.append(self.path)
+        body = b"OK"
+        if self.path == "/partial":
+            # The request is processed, but the connection is closed while sending the response
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body) + 10))
+            self.end_headers()
+            self.wfile.write(body)
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/close":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+
 class _TimeoutAPIEndpointRequestHandlerTest(_BaseHTTPRequestHandler):
     def do_PUT(self):
         # This server sleeps longer than our timeout
@@ -361,6 +670,7 @@ class _ResetAPIEndpointRequestHandlerTest(_BaseHTTPRequestHandler):
 _HOST = "0.0.0.0"
 _TIMEOUT_PORT = 8743
 _RESET_PORT = _TIMEOUT_PORT + 1
+_KEEPALIVE_PORT = _TIMEOUT_PORT + 2
 
 
 class UDSHTTPServer(socketserver.UnixStreamServer, BaseHTTPServer.HTTPServer):
@@ -430,6 +740,24 @@ def endpoint_test_reset_server():
         thread.join()
 
 
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def endpoint_test_keepalive_server():
+    server = _ThreadingHTTPServer((_HOST, _KEEPALIVE_PORT), _KeepAliveAPIEndpointRequestHandlerTest)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
 def test_flush_connection_timeout_connect():
     writer = AgentWriter(_HOST, 2019)
     if PY3:
@@ -459,3 +787,62 @@ def test_flush_connection_reset(endpoint_test_reset_server):
 def test_flush_connection_uds(endpoint_uds_server):
     writer = AgentWriter(_HOST, 2019, uds_path=endpoint_uds_server.server_address)
     writer._send_payload("foobar", 12)
+
+
+def test_flush_connection_keepalive(endpoint_test_keepalive_server):
+    writer = AgentWriter(_HOST, _KEEPALIVE_PORT)
+    for _ in range(3):
+        assert writer._put(b"foobar", {}).status == 200
+
+    assert writer.connection_stats.requests == 3
+    assert writer.connection_stats.connects == 1
+    assert writer.connection_stats.reuses == 2
+    assert writer.connection_stats.reconnects == 0
+    assert writer.connection_stats.errors == 0
+
+
+def test_flush_connection_keepalive_closed_by_agent(endpoint_test_keepalive_server):
+    writer = AgentWriter(_HOST, _KEEPALIVE_PORT)
+    writer._endpoint = "/close"
+    for _ in range(2):
+        assert writer._put(b"foobar", {}).status == 200
+
+    assert writer.connection_stats.connects == 2
+    assert writer.connection_stats.reuses == 0
+    assert writer.connection_stats.reconnects == 1
+
+
+def test_flush_connection_keepalive_reconnect(endpoint_test_keepalive_server):
+    writer = AgentWriter(_HOST, _KEEPALIVE_PORT)
+    assert writer._put(b"foobar", {}).status == 200
+
+    # Simulate the agent dropping the idle connection
+    writer._connection._conn.sock.shutdown(socket.SHUT_RDWR)
+    assert writer._put(b"foobar", {}).status == 200
+
+    assert writer.connection_stats.connects == 2
+    assert writer.connection_stats.reuses == 1
+    assert writer.connection_stats.reconnects == 1
+    assert writer.connection_stats.errors == 1
+
+
+def test_flush_connection_keepalive_no_retry(endpoint_test_keepalive_server):
+    writer = AgentWriter(_HOST, _KEEPALIVE_PORT)
+    assert writer._put(b"foobar", {}).status == 200
+
+    # The request is not sent again once the agent may have processed it
+    del _KeepAliveAPIEndpointRequestHandlerTest.requests[:]
+    writer._endpoint = "/partial"
+    with pytest.raises(httplib.HTTPException):
+        writer._put(b"foobar", {})
+
+    assert _KeepAliveAPIEndpointRequestHandlerTest.requests == ["/partial"]
+    assert writer.connection_stats.connects == 1
+    assert writer.connection_stats.reuses == 1
+    assert writer.connection_stats.errors == 1
+
+
+def test_recreate_new_connection():
+    writer = AgentWriter(_HOST, _KEEPALIVE_PORT)
+    new_writer = writer.recreate()
+    assert new_writer._connection is not writer._connection